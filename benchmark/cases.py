@@ -0,0 +1,215 @@
+# benchmark/cases.py
+from __future__ import annotations
+
+import contextlib
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from src.io.scanner import scan_files
+
+
+EXTENSIONS = [".xlsx", ".csv"]
+HEADER_SEARCH_ROWS = 60
+MIN_HEADER_CONFIDENCE = 0.60
+
+# Pure-CPU / metadata-only cases are repeated until they run at least this long (stable per-item timings)
+MIN_CPU_CASE_SECONDS = 1.0
+
+
+@dataclass
+class CaseResult:
+    wall_s: float
+    files: int
+    bytes: int
+    peak_rss_mb: float = 0.0  # set by run_case
+
+
+def run_case(name: str, lake: Path, work: Path, workers: int) -> CaseResult:
+    res = CASES[name](lake, work, workers)
+    res.peak_rss_mb = peak_rss_mb()
+    return res
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process and its (finished) workers.
+    VmHWM, not ru_maxrss: on Linux ru_maxrss survives exec, so a child would
+    report the benchmark driver's peak when that was larger.
+    """
+    import resource
+
+    own = 0.0
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    own = int(line.split()[1]) / 1024  # kB
+                    break
+    except OSError:
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return max(own, workers)
+
+
+def case_scan(lake: Path, work: Path, workers: int) -> CaseResult:
+    loops, t0 = 0, time.perf_counter()
+    while True:
+        files = scan_files(lake, EXTENSIONS)
+        loops += 1
+        if time.perf_counter() - t0 >= MIN_CPU_CASE_SECONDS:
+            break
+    return CaseResult(time.perf_counter() - t0, loops * len(files), loops * sum(f.size_bytes for f in files))
+
+
+def case_preview(lake: Path, work: Path, workers: int) -> CaseResult:
+    from src.io.preview_reader import read_csv_preview, read_excel_preview
+
+    files = scan_files(lake, EXTENSIONS)
+    t0 = time.perf_counter()
+    for f in files:
+        if f.path.suffix.lower() == ".csv":
+            read_csv_preview(f.path, HEADER_SEARCH_ROWS)
+        else:
+            read_excel_preview(f.path, HEADER_SEARCH_ROWS)
+    return CaseResult(time.perf_counter() - t0, len(files), sum(f.size_bytes for f in files))
+
+
+def case_detect_header(lake: Path, work: Path, workers: int) -> CaseResult:
+    from src.fingerprint.header_detector import detect_header_row
+
+    previews = _ok_previews(lake)
+    loops, t0 = 0, time.perf_counter()
+    while True:
+        for prev in previews:
+            detect_header_row(prev.rows, MIN_HEADER_CONFIDENCE)
+        loops += 1
+        if time.perf_counter() - t0 >= MIN_CPU_CASE_SECONDS:
+            break
+    return CaseResult(time.perf_counter() - t0, loops * len(previews), 0)
+
+
+def case_normalize(lake: Path, work: Path, workers: int) -> CaseResult:
+    from src.fingerprint import header_normalizer
+    from src.fingerprint.header_detector import detect_header_row
+
+    headers = []
+    for prev in _ok_previews(lake):
+        det = detect_header_row(prev.rows, MIN_HEADER_CONFIDENCE)
+        if det.header_row_index is not None:
+            headers.append(det.raw_headers)
+
+    cached = [getattr(header_normalizer, n) for n in ("_normalize_header_cached", "_to_snake_cached")]
+    loops, t0 = 0, time.perf_counter()
+    while True:
+        for fn in cached:
+            fn.cache_clear()  # a fresh process sees every spelling once
+        for raw in headers:
+            header_normalizer.normalize_headers(raw)
+        loops += 1
+        if time.perf_counter() - t0 >= MIN_CPU_CASE_SECONDS:
+            break
+    return CaseResult(time.perf_counter() - t0, loops * len(headers), 0)
+
+
+def case_main_cold(lake: Path, work: Path, workers: int) -> CaseResult:
+    # first run: no detection cache, no header templates, empty classified/
+    shutil.rmtree(work / "data", ignore_errors=True)
+    return _run_main(lake, work, workers, [])
+
+
+def case_main_warm(lake: Path, work: Path, workers: int) -> CaseResult:
+    return _run_main(lake, work, workers, [])
+
+
+def case_main_streaming(lake: Path, work: Path, workers: int) -> CaseResult:
+    # same work as main_cold, bounded-memory pipeline
+    shutil.rmtree(work / "data", ignore_errors=True)
+    return _run_main(lake, work, workers, ["--streaming"])
+
+
+def case_processed_full(lake: Path, work: Path, workers: int) -> CaseResult:
+    return _run_processed(work, workers, ["--full-rebuild"])
+
+
+def case_processed_fragments(lake: Path, work: Path, workers: int) -> CaseResult:
+    # first fragment-cached run: every file parsed once and stored as a fragment
+    return _run_processed(work, workers, [])
+
+
+def case_processed_warm(lake: Path, work: Path, workers: int) -> CaseResult:
+    # nothing changed since processed_fragments: every output is skipped
+    return _run_processed(work, workers, [])
+
+
+# Run order matters: main_* build data/ in the work dir that processed_* read,
+# and each *_warm case reuses what the case before it cached.
+CASES: Dict[str, Callable[[Path, Path, int], CaseResult]] = {
+    "scan": case_scan,
+    "preview": case_preview,
+    "detect_header": case_detect_header,
+    "normalize": case_normalize,
+    "main_cold": case_main_cold,
+    "main_warm": case_main_warm,
+    "processed_full": case_processed_full,
+    "processed_fragments": case_processed_fragments,
+    "processed_warm": case_processed_warm,
+    "main_streaming": case_main_streaming,  # last: wipes data/
+}
+
+
+def _ok_previews(lake: Path) -> List:
+    from src.io.preview_reader import read_csv_preview, read_excel_preview
+
+    out = []
+    for f in scan_files(lake, EXTENSIONS):
+        read = read_csv_preview if f.path.suffix.lower() == ".csv" else read_excel_preview
+        prev = read(f.path, HEADER_SEARCH_ROWS)
+        if prev.status == "ok":
+            out.append(prev)
+    return out
+
+
+def _run_main(lake: Path, work: Path, workers: int, extra: List[str]) -> CaseResult:
+    from src import main as classify
+
+    files = scan_files(lake, EXTENSIONS)
+    argv = ["src.main", "--input-root", str(lake), "--workers", str(workers), *extra]
+    with _in_project(work, argv):
+        t0 = time.perf_counter()
+        classify.main()
+        wall = time.perf_counter() - t0
+    return CaseResult(wall, len(files), sum(f.size_bytes for f in files))
+
+
+def _run_processed(work: Path, workers: int, extra: List[str]) -> CaseResult:
+    from src.pipelines import run_processed
+
+    classified = [p for p in (work / "data" / "classified").rglob("*") if p.is_file()]
+    argv = ["run_processed", "--workers", str(workers), *extra]
+    with _in_project(work, argv):
+        args = run_processed._parse_args()
+        t0 = time.perf_counter()
+        run_processed.run_processed(
+            workers=args.workers,
+            use_fragments=not args.full_rebuild,
+        )
+        wall = time.perf_counter() - t0
+    return CaseResult(wall, len(classified), sum(p.stat().st_size for p in classified))
+
+
+@contextlib.contextmanager
+def _in_project(work: Path, argv: List[str]):
+    """cwd = bench project (relative config/ and data/ paths), argv for the CLI parsers."""
+    old_cwd, old_argv = os.getcwd(), sys.argv
+    os.chdir(work)
+    sys.argv = argv
+    try:
+        yield
+    finally:
+        os.chdir(old_cwd)
+        sys.argv = old_argv
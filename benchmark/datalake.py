@@ -0,0 +1,267 @@
+# benchmark/datalake.py
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+
+# Bump when the generator changes what a lake contains (existing lakes are regenerated).
+GENERATOR_VERSION = 1
+
+LAKE_FILE = "lake.json"
+
+# Files are stamped with fixed mtimes so scans, caches and "newest file" choices are reproducible.
+BASE_MTIME = datetime(2024, 1, 1).timestamp()
+
+
+@dataclass(frozen=True)
+class SchemaSpec:
+    label: str
+    headers: tuple          # canonical header text (as exported)
+
+
+@dataclass(frozen=True)
+class LakeProfile:
+    """Shape of a generated lake. `rows` ranges are per file (log-uniform between bounds)."""
+    name: str
+    files: int
+    small_rows: tuple       # most files
+    big_files: int          # a few very large CSV exports (the "hundreds of MB" tail)
+    big_rows: int
+    big_xlsx_rows: int      # one large workbook (streaming reader / sidecar path)
+    duplicate_ratio: float  # byte-identical re-exports under other names
+    broken_files: int       # unreadable workbooks / header-less CSVs
+
+
+PROFILES: Dict[str, LakeProfile] = {
+    # CI smoke: seconds to generate and run
+    "tiny": LakeProfile("tiny", files=40, small_rows=(20, 2_000), big_files=0, big_rows=0,
+                        big_xlsx_rows=5_000, duplicate_ratio=0.1, broken_files=2),
+    # default: a few hundred files, tens of MB
+    "small": LakeProfile("small", files=200, small_rows=(20, 20_000), big_files=1, big_rows=300_000,
+                         big_xlsx_rows=50_000, duplicate_ratio=0.1, broken_files=4),
+    # nightly-scale: several hundred MB
+    "large": LakeProfile("large", files=600, small_rows=(20, 50_000), big_files=3, big_rows=1_500_000,
+                         big_xlsx_rows=200_000, duplicate_ratio=0.1, broken_files=8),
+}
+
+_WIDE_HEADERS = tuple(f"Metric {i:03d}" for i in range(1, 151))
+
+SCHEMAS: Sequence[SchemaSpec] = (
+    SchemaSpec("wellsky_clients", ("Client ID", "Client Name", "Location", "Status", "Start Date", "Hours", "Rate")),
+    SchemaSpec("wellsky_carelogs", ("Carelog ID", "Caregiver", "Client", "Location", "Visit Date",
+                                    "Clock In", "Clock Out", "Billable Hours", "Notes")),
+    SchemaSpec("salesforce_inquiries", ("Inquiry Id", "Created Date", "Lead Source", "Owner", "Stage", "Amount")),
+    SchemaSpec("ringcentral_calls", ("Call Id", "From", "To", "Direction", "Result", "Duration (sec)", "Start Time")),
+    SchemaSpec("ukg_recruiting_logs", ("Applicant", "Requisition", "Step", "Changed By", "Changed On", "Comment")),
+    SchemaSpec("wide_metrics", ("Period", "Site") + _WIDE_HEADERS),
+)
+
+_LOCATIONS = np.array([f"Home Instead {n} - {c}" for n, c in (
+    (149, "Green Bay"), (203, "Appleton"), (238, "Sheboygan"), (363, "Madison"), (391, "Cedarburg"),
+    (427, "Racine"), (850, "Burlington"), (237, "Nashville"), (668, "Clarksville"), (827, "Goodlettsville"),
+)], dtype=object)
+_WORDS = np.array("alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima".split(), dtype=object)
+_DELIMITERS = (",", ";", "\t", "|")
+_ENCODINGS = ("utf-8", "utf-8-sig", "cp1252")
+
+
+@dataclass(frozen=True)
+class LakeFile:
+    path: str               # relative to the lake root
+    label: Optional[str]    # None: broken on purpose
+    kind: str               # xlsx | csv | duplicate | broken
+    rows: int
+    size_bytes: int
+
+
+def generate_datalake(root: Path, profile: str = "small", *, seed: int = 0, force: bool = False) -> List[LakeFile]:
+    """
+    Write a reproducible messy lake under root: XLSX and CSV exports of SCHEMAS with
+    preamble rows, BOMs, mixed delimiters/encodings, header spelling variants, quoted
+    newlines, wide sheets, byte-identical duplicates, broken files and a large tail.
+    Data depends only on (profile, seed, file index); mtimes are fixed.
+
+    An existing lake with the same profile/seed/generator version is reused (see lake.json).
+    """
+    spec = PROFILES[profile]
+    root = Path(root)
+    marker = root / LAKE_FILE
+    meta = {"generator_version": GENERATOR_VERSION, "profile": profile, "seed": seed}
+    if not force and marker.exists():
+        saved = json.loads(marker.read_text(encoding="utf-8"))
+        if saved.get("meta") == meta:
+            return [LakeFile(**f) for f in saved["files"]]
+
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    files: List[LakeFile] = []
+    master = np.random.default_rng(seed)
+    file_seeds = master.integers(0, 2**32, size=spec.files + spec.big_files + 1)
+    for i in range(spec.files):
+        rng = np.random.default_rng(file_seeds[i])
+        schema = SCHEMAS[i % len(SCHEMAS)]
+        lo, hi = spec.small_rows
+        rows = int(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+        if schema.label == "wide_metrics":
+            rows = max(lo, rows // 10)  # 150+ columns: keep cell counts comparable
+        fmt = "xlsx" if rng.random() < 0.5 else "csv"
+        rel = Path(f"{schema.label.split('_')[0]}/{2024 + i % 3}/{schema.label}_{i:04d}.{fmt}")
+        files.append(_write_export(root, rel, schema, rows, fmt, rng))
+
+    for j in range(spec.big_files):
+        rng = np.random.default_rng(file_seeds[spec.files + j])
+        schema = SCHEMAS[1]  # carelogs: the widest text-heavy schema
+        rel = Path(f"bulk/{schema.label}_full_{j}.csv")
+        files.append(_write_export(root, rel, schema, spec.big_rows, "csv", rng))
+
+    if spec.big_xlsx_rows:
+        rng = np.random.default_rng(file_seeds[-1])
+        rel = Path(f"bulk/{SCHEMAS[0].label}_full.xlsx")
+        files.append(_write_export(root, rel, SCHEMAS[0], spec.big_xlsx_rows, "xlsx", rng))
+
+    # byte-identical re-exports ("Copy of ...", re-downloads into another folder)
+    n_dup = int(len(files) * spec.duplicate_ratio)
+    for k, src in enumerate(files[: n_dup * 3 : 3]):
+        rel = Path("downloads") / f"Copy of {Path(src.path).name}"
+        shutil.copyfile(root / src.path, root / _mkparent(root, rel))
+        files.append(LakeFile(str(rel), src.label, "duplicate", src.rows, src.size_bytes))
+
+    for b in range(spec.broken_files):
+        if b % 2 == 0:
+            rel = Path(f"broken/corrupt_{b}.xlsx")
+            (root / _mkparent(root, rel)).write_bytes(b"PK\x03\x04 not really a workbook")
+        else:
+            rel = Path(f"broken/numbers_only_{b}.csv")
+            data = np.random.default_rng(b).integers(0, 10_000, size=(50, 6))
+            pd.DataFrame(data).to_csv(root / _mkparent(root, rel), index=False, header=False)
+        files.append(LakeFile(str(rel), None, "broken", 0, (root / rel).stat().st_size))
+
+    # noise the scanner must skip
+    (root / _mkparent(root, Path("misc/readme.txt"))).write_text("not data\n", encoding="utf-8")
+    (root / _mkparent(root, Path("misc/~$locked.xlsx.tmp"))).write_bytes(b"\0" * 64)
+
+    for n, f in enumerate(sorted(files, key=lambda f: f.path)):
+        ts = BASE_MTIME + n * 3600
+        os.utime(root / f.path, (ts, ts))
+
+    marker.write_text(
+        json.dumps({"meta": meta, "files": [asdict(f) for f in files]}, indent=2),
+        encoding="utf-8",
+    )
+    return files
+
+
+def lake_labels(aliases: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """{schema_hash: label} for every generated schema (what config/schema_labels.yaml needs)."""
+    from src.fingerprint.header_normalizer import normalize_headers
+    from src.fingerprint.schema_identity import schema_identity
+
+    out = {}
+    for schema in SCHEMAS:
+        norm = normalize_headers(list(schema.headers), aliases=aliases)
+        _, schema_hash = schema_identity(norm.normalized_headers)
+        out[schema_hash] = schema.label
+    return out
+
+
+def _mkparent(root: Path, rel: Path) -> Path:
+    (root / rel).parent.mkdir(parents=True, exist_ok=True)
+    return rel
+
+
+def _write_export(root: Path, rel: Path, schema: SchemaSpec, rows: int, fmt: str, rng: np.random.Generator) -> LakeFile:
+    df = _frame(schema, rows, rng)
+    df.columns = _header_variant(list(schema.headers), rng)
+    preamble = _preamble(rel.stem, rng)
+    path = root / _mkparent(root, rel)
+    if fmt == "xlsx":
+        _write_xlsx(path, df, preamble)
+    else:
+        _write_csv(path, df, preamble, rng)
+    return LakeFile(str(rel), schema.label, fmt, rows, path.stat().st_size)
+
+
+def _frame(schema: SchemaSpec, rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Column values typed by header name (ids, dates, amounts, categories, free text)."""
+    start = np.datetime64("2023-01-01")
+    cols = {}
+    for h in schema.headers:
+        key = h.lower()
+        if key.endswith("id"):
+            cols[h] = np.arange(rows, dtype=np.int64) + int(rng.integers(1, 10**6))
+        elif "date" in key or "time" in key or key.endswith(" on") or key.startswith("clock"):
+            offsets = rng.integers(0, 365 * 24 * 60, size=rows).astype("timedelta64[m]")
+            cols[h] = pd.to_datetime(start + offsets)
+        elif key in ("hours", "rate", "amount", "billable hours") or key.startswith(("metric", "duration")):
+            vals = rng.gamma(2.0, 20.0, size=rows).round(2)
+            if rows and rng.random() < 0.3:
+                vals[rng.random(rows) < 0.05] = np.nan  # gaps
+            cols[h] = vals
+        elif key in ("location", "site"):
+            cols[h] = _LOCATIONS[rng.integers(0, len(_LOCATIONS), size=rows)]
+        elif key in ("notes", "comment"):
+            words = _WORDS[rng.integers(0, len(_WORDS), size=(rows, 4))]
+            text = pd.Series([" ".join(w) for w in words], dtype=object)
+            # some free text carries delimiters, quotes and line breaks
+            mask = rng.random(rows) < 0.02
+            text[mask] = text[mask] + ', "see below";\nfollow-up'
+            cols[h] = text.to_numpy()
+        else:
+            cols[h] = _WORDS[rng.integers(0, len(_WORDS), size=rows)]
+    return pd.DataFrame(cols)
+
+
+def _header_variant(headers: List[str], rng: np.random.Generator) -> List[str]:
+    """Same schema, different spelling: case, padding, punctuation (normalization must fold them)."""
+    style = int(rng.integers(0, 4))
+    if style == 1:
+        return [h.upper() for h in headers]
+    if style == 2:
+        return [f" {h.lower()}  " for h in headers]
+    if style == 3:
+        return [h.replace(" ", "_") for h in headers]
+    return headers
+
+
+def _preamble(title: str, rng: np.random.Generator) -> List[List[str]]:
+    n = int(rng.choice([0, 0, 1, 2, 3, 5]))
+    lines = [["Report: " + title], ["Generated " + (datetime(2024, 1, 1) + timedelta(days=int(rng.integers(0, 365)))).strftime("%m/%d/%Y")],
+             [], ["Filters: all locations"], ["Confidential"]]
+    return lines[:n]
+
+
+def _write_xlsx(path: Path, df: pd.DataFrame, preamble: List[List[str]]) -> None:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Report")
+    for line in preamble:
+        ws.append(line)
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append([None if isinstance(v, float) and v != v else v for v in row])
+    wb.save(path)
+
+
+def _write_csv(path: Path, df: pd.DataFrame, preamble: List[List[str]], rng: np.random.Generator) -> None:
+    sep = _DELIMITERS[int(rng.integers(0, len(_DELIMITERS)))]
+    encoding = _ENCODINGS[int(rng.integers(0, len(_ENCODINGS)))]
+    chunk = 100_000  # bounded memory for the large tail
+    with open(path, "w", encoding=encoding, newline="") as fh:
+        for line in preamble:
+            fh.write(sep.join(line) + "\r\n")
+        for start in range(0, max(len(df), 1), chunk):
+            df.iloc[start:start + chunk].to_csv(
+                fh, sep=sep, index=False, header=start == 0, lineterminator="\r\n",
+                date_format="%Y-%m-%d %H:%M",
+            )
@@ -0,0 +1,191 @@
+# benchmark/run.py
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+from tabulate import tabulate
+
+from benchmark.cases import CASES, run_case
+from benchmark.datalake import PROFILES, generate_datalake, lake_labels
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_ROOT = Path("data/benchmark")
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="benchmark")
+    p.add_argument("--profile", default="tiny", choices=sorted(PROFILES), help="Generated lake size")
+    p.add_argument("--seed", type=int, default=0, help="Generator seed (same seed => same lake)")
+    p.add_argument("--root", default=str(DEFAULT_ROOT), help="Where lakes and bench projects live")
+    p.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), help="Cases to run (in order)")
+    p.add_argument("--workers", type=int, default=1, help="--workers passed to src.main / run_processed")
+    p.add_argument("--regenerate", action="store_true", help="Rebuild the lake even if an identical one exists")
+    p.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    p.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for --profile")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth (0.25 = 25%%)")
+    p.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.5,
+        help="Cases faster than this (now and in the baseline) are compared but never flagged (timer noise)",
+    )
+    p.add_argument("--check", action="store_true", help="Exit 1 when a case regressed beyond --tolerance")
+    p.add_argument("--out", default=None, help="Also write this run's results as JSON")
+    # internal: run one case in a fresh interpreter (isolated peak RSS)
+    p.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    p.add_argument("--lake", default=None, help=argparse.SUPPRESS)
+    p.add_argument("--work", default=None, help=argparse.SUPPRESS)
+    p.add_argument("--result", default=None, help=argparse.SUPPRESS)
+    return p.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    if args.child:
+        res = run_case(args.child, Path(args.lake), Path(args.work), args.workers)
+        Path(args.result).write_text(json.dumps(asdict(res)), encoding="utf-8")
+        return 0
+
+    root = Path(args.root).resolve()
+    lake = root / f"lake_{args.profile}_s{args.seed}"
+    work = root / f"project_{args.profile}"
+
+    print(f"Datalake: {lake} (profile={args.profile}, seed={args.seed})")
+    files = generate_datalake(lake, args.profile, seed=args.seed, force=args.regenerate)
+    total_mb = sum(f.size_bytes for f in files) / 1e6
+    print(f"  {len(files)} files, {total_mb:,.1f} MB")
+
+    _prepare_project(work)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for case in args.cases:
+        print(f"Running {case} ...", flush=True)
+        results[case] = _run_child(case, lake, work, args.workers)
+
+    baseline = _load_baseline(Path(args.baseline)).get(args.profile, {}).get("cases", {})
+    rows, regressions = _compare(results, baseline, args.tolerance, args.min_seconds)
+    print()
+    print(tabulate(rows, headers=["case", "files", "MB", "wall s", "files/s", "MB/s", "peak MB", "vs baseline"], tablefmt="psql"))
+
+    run = {"meta": _host_meta(args), "cases": results}
+    if args.out:
+        Path(args.out).write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    if args.save_baseline:
+        _save_baseline(Path(args.baseline), args.profile, run)
+        print(f"Baseline saved: {args.baseline} [{args.profile}]")
+
+    for r in regressions:
+        print(f"REGRESSION: {r}")
+    return 1 if args.check and regressions else 0
+
+
+def _prepare_project(work: Path) -> None:
+    """Fresh bench project: repo config + labels for every generated schema, empty data/."""
+    if work.exists():
+        shutil.rmtree(work)
+    (work / "config").mkdir(parents=True)
+    for name in ("settings.yaml", "header_aliases.yaml"):
+        shutil.copyfile(REPO_ROOT / "config" / name, work / "config" / name)
+
+    from src.fingerprint.header_normalizer import load_header_aliases
+
+    labels = lake_labels(load_header_aliases(work / "config" / "header_aliases.yaml"))
+    (work / "config" / "schema_labels.yaml").write_text(yaml.safe_dump(labels, sort_keys=True), encoding="utf-8")
+
+
+def _run_child(case: str, lake: Path, work: Path, workers: int) -> Dict[str, Any]:
+    """Run one case in a fresh interpreter, so peak RSS is the case's own (workers included)."""
+    result = work / f"_result_{case}.json"
+    log_dir = work / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        sys.executable, "-m", "benchmark.run",
+        "--child", case, "--lake", str(lake), "--work", str(work),
+        "--workers", str(workers), "--result", str(result),
+    ]
+    with open(log_dir / f"{case}.log", "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0 or not result.exists():
+        raise RuntimeError(f"benchmark case {case} failed (exit {proc.returncode}); see {log_dir / f'{case}.log'}")
+
+    res = json.loads(result.read_text(encoding="utf-8"))
+    result.unlink()
+    wall = res["wall_s"]
+    res["files_per_s"] = res["files"] / wall if wall > 0 else None
+    res["mb_per_s"] = res["bytes"] / 1e6 / wall if wall > 0 and res["bytes"] else None
+    return res
+
+
+def _compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+    min_seconds: float,
+):
+    rows: List[List[Any]] = []
+    regressions: List[str] = []
+    for case, r in results.items():
+        b = baseline.get(case)
+        note = ""
+        if b and b.get("files_per_s") and r.get("files_per_s"):
+            speed = r["files_per_s"] / b["files_per_s"]
+            mem = r["peak_rss_mb"] / b["peak_rss_mb"] if b.get("peak_rss_mb") else 1.0
+            note = f"{speed:,.2f}x speed, {mem:,.2f}x mem"
+            if speed < 1 - tolerance and max(r["wall_s"], b["wall_s"]) >= min_seconds:
+                regressions.append(f"{case}: {speed:,.2f}x baseline throughput")
+            if mem > 1 + tolerance:
+                regressions.append(f"{case}: {mem:,.2f}x baseline peak RSS")
+        rows.append([
+            case,
+            r["files"],
+            f"{r['bytes'] / 1e6:,.1f}" if r["bytes"] else "",
+            f"{r['wall_s']:,.3f}",
+            f"{r['files_per_s']:,.1f}" if r["files_per_s"] else "",
+            f"{r['mb_per_s']:,.1f}" if r["mb_per_s"] else "",
+            f"{r['peak_rss_mb']:,.0f}",
+            note or "(no baseline)",
+        ])
+    return rows, regressions
+
+
+def _host_meta(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+        "profile": args.profile,
+        "seed": args.seed,
+        "workers": args.workers,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _load_baseline(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_baseline(path: Path, profile: str, run: Dict[str, Any]) -> None:
+    data = _load_baseline(path)
+    data[profile] = run
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,25 @@
 from __future__ import annotations
 
 import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Iterable
+from typing import Dict, List, Optional, Iterable, Sequence, Tuple
+
+from src.io.content_hash import MTIME_TOLERANCE_S
 
 
 @dataclass(frozen=True)
 class CopyResult:
     src: Path
     dst: Path
-    status: str  # copied | skipped_exists | error
+    status: str  # copied | skipped_exists | skipped_unchanged | removed | error
+                 # (manifest copy_status adds skipped_duplicate for content duplicates)
     error_message: Optional[str] = None
+    bytes_copied: int = 0
+    elapsed_s: float = 0.0
 
 
 def _safe_rm_tree(path: Path) -> None:
@@ -36,19 +44,191 @@ def prepare_snapshot_folders(output_root: Path, labels_in_run: Iterable[str]) ->
 def copy_file(src: str | Path, dst: str | Path, overwrite: bool = False) -> CopyResult:
     s = Path(src)
     d = Path(dst)
-    d.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
 
     try:
+        d.parent.mkdir(parents=True, exist_ok=True)
         if d.exists() and not overwrite:
-            return CopyResult(src=s, dst=d, status="skipped_exists")
+            return CopyResult(src=s, dst=d, status="skipped_exists", elapsed_s=time.perf_counter() - t0)
 
         # copy2 preserves metadata (mtime)
         shutil.copy2(s, d)
-        return CopyResult(src=s, dst=d, status="copied")
+        return CopyResult(
+            src=s,
+            dst=d,
+            status="copied",
+            bytes_copied=d.stat().st_size,
+            elapsed_s=time.perf_counter() - t0,
+        )
     except Exception as e:
         return CopyResult(
             src=s,
             dst=d,
             status="error",
             error_message=f"{type(e).__name__}: {e}",
+            elapsed_s=time.perf_counter() - t0,
         )
+
+
+class _ByteBudget:
+    """Blocks submission while more than `limit` bytes are being copied."""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, limit)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n: int) -> int:
+        n = min(n, self._limit)  # a single file larger than the budget still runs (alone)
+        with self._cond:
+            while self._in_flight + n > self._limit:
+                self._cond.wait()
+            self._in_flight += n
+        return n
+
+    def release(self, n: int) -> None:
+        with self._cond:
+            self._in_flight -= n
+            self._cond.notify_all()
+
+
+def copy_files(
+    jobs: Sequence[Tuple[Path, Path]],
+    *,
+    overwrite: bool = False,
+    workers: int = 1,
+    max_inflight_bytes: int = 512 * 1024 * 1024,
+) -> List[CopyResult]:
+    """
+    Copy (src, dst) pairs with a thread pool (copies are I/O/latency bound).
+    Results are returned in `jobs` order. Jobs sharing a destination run in
+    job order, so skipped_exists/copied statuses match a serial run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return [copy_file(s, d, overwrite=overwrite) for s, d in jobs]
+
+    budget = _ByteBudget(max_inflight_bytes)
+
+    def run(src: Path, dst: Path, before: Optional[Future], reserved: int) -> CopyResult:
+        try:
+            if before is not None:
+                before.result()
+            return copy_file(src, dst, overwrite=overwrite)
+        finally:
+            budget.release(reserved)
+
+    futures: List[Future] = []
+    last_for_dst: Dict[str, Future] = {}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for src, dst in jobs:
+            reserved = budget.acquire(_size_or_zero(src))
+            fut = ex.submit(run, src, dst, last_for_dst.get(str(dst)), reserved)
+            last_for_dst[str(dst)] = fut
+            futures.append(fut)
+        return [f.result() for f in futures]
+
+
+def _size_or_zero(p: Path) -> int:
+    try:
+        return Path(p).stat().st_size
+    except OSError:
+        return 0
+
+
+@dataclass(frozen=True)
+class SnapshotSyncPlan:
+    actions: List[str]  # per job: added | updated | unchanged | duplicate
+    stale: List[Path]   # entries in label folders that are not part of the new snapshot
+
+
+def plan_snapshot_sync(
+    output_root: Path,
+    jobs: Sequence[Tuple[Path, Path]],
+    labels_in_run: Iterable[str],
+    overwrite: bool = False,
+) -> SnapshotSyncPlan:
+    """
+    Sync mode (alternative to prepare_snapshot_folders):
+    compare the desired <schema_hash>__<name> files of each label with what is
+    already in its gold folder (size + mtime), so only new/changed files get
+    copied and stale ones removed. The final folder content is the same as
+    wiping and re-copying.
+    """
+    # which job ends up owning each destination when copying into an empty folder
+    owner: Dict[str, int] = {}
+    for i, (_, d) in enumerate(jobs):
+        if overwrite or str(d) not in owner:
+            owner[str(d)] = i
+
+    actions: List[str] = []
+    for i, (s, d) in enumerate(jobs):
+        if owner[str(d)] != i:
+            actions.append("duplicate")
+        else:
+            actions.append(_sync_action(Path(s), Path(d)))
+
+    stale: List[Path] = []
+    for label in sorted(set(labels_in_run)):
+        label_dir = output_root / label
+        label_dir.mkdir(parents=True, exist_ok=True)
+        for p in sorted(label_dir.iterdir()):
+            if str(p) not in owner:
+                stale.append(p)
+
+    return SnapshotSyncPlan(actions=actions, stale=stale)
+
+
+def _sync_action(src: Path, dst: Path) -> str:
+    try:
+        ds = dst.stat()
+    except FileNotFoundError:
+        return "added"
+    try:
+        ss = src.stat()
+    except OSError:
+        return "updated"  # let the copy report the error
+    if ds.st_size == ss.st_size and abs(ds.st_mtime - ss.st_mtime) <= MTIME_TOLERANCE_S:
+        return "unchanged"
+    return "updated"
+
+
+def apply_snapshot_sync(
+    jobs: Sequence[Tuple[Path, Path]],
+    plan: SnapshotSyncPlan,
+    *,
+    workers: int = 1,
+    max_inflight_bytes: int = 512 * 1024 * 1024,
+) -> Tuple[List[CopyResult], List[CopyResult]]:
+    """
+    Execute a sync plan. Returns (results aligned with `jobs`, results for removed entries).
+    Added/updated files are (over)written; unchanged/duplicate ones are not touched.
+    """
+    todo = [i for i, a in enumerate(plan.actions) if a in ("added", "updated")]
+    copied = copy_files(
+        [jobs[i] for i in todo],
+        overwrite=True,
+        workers=workers,
+        max_inflight_bytes=max_inflight_bytes,
+    )
+
+    results: List[Optional[CopyResult]] = [None] * len(jobs)
+    for i, res in zip(todo, copied):
+        results[i] = res
+    for i, a in enumerate(plan.actions):
+        if results[i] is None:
+            s, d = jobs[i]
+            status = "skipped_unchanged" if a == "unchanged" else "skipped_exists"
+            results[i] = CopyResult(src=Path(s), dst=Path(d), status=status)
+
+    removed: List[CopyResult] = []
+    for p in plan.stale:
+        try:
+            if p.is_dir() and not p.is_symlink():
+                shutil.rmtree(p)
+            else:
+                p.unlink()
+            removed.append(CopyResult(src=p, dst=p, status="removed"))
+        except Exception as e:
+            removed.append(CopyResult(src=p, dst=p, status="error", error_message=f"{type(e).__name__}: {e}"))
+
+    return [r for r in results if r is not None], removed
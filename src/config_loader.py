@@ -37,11 +37,47 @@ def load_config(path: str | Path, overrides: Optional[Dict[str, Any]] = None) ->
         },
         "header_detection": {
             "min_header_confidence": 0.60,
+            "workers": 1,                # >1 => process pool for preview + detection
+            "use_templates": True,       # let known header rows of labeled schemas break scoring ties
         },
         "copy": {
             "mode": "copy",              # copy | move (move later if you want)
             "overwrite": False,
             "dry_run": False,
+            "workers": 8,                # concurrent copies (latency-bound on network shares)
+            "max_inflight_mb": 512,      # bytes being copied at once
+            "snapshot_mode": "wipe",     # wipe | sync (only copy new/changed, delete stale)
+        },
+        "row_count": {
+            "enabled": True,             # data_row_count per file (byte-level count, no cell parsing)
+        },
+        "cache": {
+            "enabled": True,             # reuse detection results for unchanged files
+        },
+        "dedup": {
+            "enabled": True,             # content_hash per file; identical exports are copied once
+        },
+        "scan": {
+            "exclude": [],               # glob patterns of junk dirs/files (name or path under input_root)
+            "workers": 1,                # >1 => subdirectories listed by a thread pool (network shares)
+        },
+        "metrics": {
+            "enabled": True,             # per-stage timings -> staging/run_metrics.parquet
+            "slowest_n": 20,             # slowest files kept per stage
+        },
+        "processed": {
+            "compact_dtypes": True,      # run_processed: integral floats -> Int, repetitive text -> category
+        },
+        "xlsx_cache": {
+            "enabled": True,             # run_processed: parsed workbooks as zstd Arrow sidecars (paths.xlsx_cache_dir)
+        },
+        "history": {
+            "enabled": True,             # append each run's staging outputs to staging/history/ (by run date)
+            "retention_days": 0,         # staging_history compact drops older partitions (0 = keep all)
+        },
+        "streaming": {
+            "enabled": False,            # --streaming: generator pipeline, catalog written in parquet parts
+            "batch_rows": 10000,         # rows per part file / row group
         },
         "paths": {},  # filled below
         "logging": {
@@ -58,6 +94,7 @@ def load_config(path: str | Path, overrides: Optional[Dict[str, Any]] = None) ->
     cfg["paths"].setdefault("staging_dir", str(out / "staging"))
     cfg["paths"].setdefault("classified_dir", str(out / "classified"))
     cfg["paths"].setdefault("quarantine_dir", str(out / "quarantine"))
+    cfg["paths"].setdefault("xlsx_cache_dir", str(Path(cfg["paths"]["staging_dir"]) / "xlsx_cache"))
 
     if overrides:
         cfg = _deep_merge(cfg, overrides)
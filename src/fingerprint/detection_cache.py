@@ -0,0 +1,237 @@
+# src/fingerprint/detection_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.fingerprint.file_detection import DETECTION_FIELDS
+
+
+# Bump when the detection record layout or its semantics change.
+CACHE_VERSION = 11
+
+CacheKey = Tuple[str, int, float]  # (path, size_bytes, modified_ts)
+
+_INT_FIELDS = ("header_row_index", "data_row_count")
+
+# Arrow schema of detection_cache.parquet (what save_detection_cache writes via pandas)
+CACHE_SCHEMA = pa.schema(
+    [
+        ("fingerprint", pa.string()),
+        ("path", pa.string()),
+        ("size_bytes", pa.int64()),
+        ("modified_ts", pa.float64()),
+        *[
+            (k, pa.int64() if k in _INT_FIELDS else pa.float64() if k == "header_confidence" else pa.string())
+            for k in DETECTION_FIELDS
+        ],
+    ]
+)
+
+
+def settings_fingerprint(
+    *,
+    aliases_path: str | Path,
+    header_search_rows: int,
+    min_header_confidence: float,
+    count_rows: bool = False,
+    hash_content: bool = False,
+) -> str:
+    """
+    Fingerprint of everything (besides the file itself) that influences scored detection.
+    If aliases or detection settings change, every cached row becomes stale.
+    Schema labels and header templates are not part of it: records are cached before
+    templates are applied, so editing labels keeps every cached row.
+    """
+    p = Path(aliases_path).expanduser()
+    aliases_bytes = p.read_bytes() if p.exists() else b""
+
+    payload = json.dumps(
+        {
+            "cache_version": CACHE_VERSION,
+            "aliases_sha1": hashlib.sha1(aliases_bytes).hexdigest(),
+            "header_search_rows": int(header_search_rows),
+            "min_header_confidence": float(min_header_confidence),
+            "count_rows": bool(count_rows),
+            "hash_content": bool(hash_content),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def config_fingerprint(cfg: Dict[str, Any], *, aliases_path: str | Path) -> str:
+    """settings_fingerprint() of a loaded config (src.main's detection settings)."""
+    return settings_fingerprint(
+        aliases_path=aliases_path,
+        header_search_rows=int(cfg["excel"]["header_search_rows"]),
+        min_header_confidence=float(cfg["header_detection"]["min_header_confidence"]),
+        count_rows=bool(cfg["row_count"]["enabled"]),
+        hash_content=bool(cfg["dedup"]["enabled"]),
+    )
+
+
+def cache_key(path: str | Path, size_bytes: int, modified_ts: float) -> CacheKey:
+    return (str(path), int(size_bytes), float(modified_ts))
+
+
+def load_detection_cache(path: str | Path, fingerprint: str) -> Dict[CacheKey, Dict[str, Any]]:
+    """
+    Load cached detection records for the given settings fingerprint.
+    Missing/corrupt cache or a different fingerprint => empty cache (full rebuild).
+    """
+    p = Path(path)
+    if not p.exists():
+        return {}
+
+    try:
+        df = pd.read_parquet(p)
+    except Exception:
+        return {}
+
+    if df.empty or "fingerprint" not in df.columns:
+        return {}
+
+    df = df[df["fingerprint"].eq(fingerprint)]
+    out: Dict[CacheKey, Dict[str, Any]] = {}
+    for r in df.to_dict(orient="records"):
+        rec = {k: _none_if_na(r.get(k)) for k in DETECTION_FIELDS}
+        for k in _INT_FIELDS:
+            if rec[k] is not None:
+                rec[k] = int(rec[k])
+        out[cache_key(r["path"], r["size_bytes"], r["modified_ts"])] = rec
+    return out
+
+
+def save_detection_cache(
+    path: str | Path,
+    fingerprint: str,
+    entries: Iterable[Tuple[CacheKey, Dict[str, Any]]],
+) -> None:
+    """
+    Overwrite the cache with the given entries (files no longer present are dropped).
+    """
+    rows = [cache_row(fingerprint, key, rec) for key, rec in entries]
+
+    df = pd.DataFrame(rows, columns=["fingerprint", "path", "size_bytes", "modified_ts", *DETECTION_FIELDS])
+    # stable dtype even when every value is None
+    df["header_row_index"] = df["header_row_index"].astype("Int64")
+    df["data_row_count"] = df["data_row_count"].astype("Int64")
+
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(p.suffix + ".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(p)
+
+
+def cache_row(fingerprint: str, key: CacheKey, rec: Dict[str, Any]) -> Dict[str, Any]:
+    src, size_bytes, modified_ts = key
+    row: Dict[str, Any] = {
+        "fingerprint": fingerprint,
+        "path": src,
+        "size_bytes": size_bytes,
+        "modified_ts": modified_ts,
+    }
+    for k in DETECTION_FIELDS:
+        row[k] = rec.get(k)
+    return row
+
+
+class DetectionCacheIndex:
+    """
+    Read-only detection cache for streaming runs, without loading the records:
+    keeps a sorted array of 64-bit key hashes (+ row numbers), 16 bytes per file,
+    and reads the row groups holding requested records on demand (the last few
+    are kept, since lookups follow the scan order the cache was written in).
+    """
+
+    def __init__(self, path: str | Path, fingerprint: str, *, cached_row_groups: int = 2):
+        self._pf: Optional[pq.ParquetFile] = None
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._group_starts = np.zeros(1, dtype=np.int64)
+        self._groups: Dict[int, pa.Table] = {}
+        self._max_groups = max(1, cached_row_groups)
+
+        p = Path(path)
+        if not p.exists():
+            return
+        try:
+            pf = pq.ParquetFile(p)
+            if "fingerprint" not in pf.schema_arrow.names:
+                return
+            hashes, rows = [], []
+            start = 0
+            for g in range(pf.num_row_groups):
+                t = pf.read_row_group(g, columns=["fingerprint", "path", "size_bytes", "modified_ts"])
+                for i, (fp, src, size, mtime) in enumerate(zip(*(c.to_pylist() for c in t.columns))):
+                    if fp == fingerprint:
+                        hashes.append(_key_hash((src, size, mtime)))
+                        rows.append(start + i)
+                start += t.num_rows
+        except Exception:
+            return  # corrupt cache => empty (full rebuild), like load_detection_cache
+
+        order = np.argsort(np.asarray(hashes, dtype=np.uint64), kind="stable")
+        self._hashes = np.asarray(hashes, dtype=np.uint64)[order]
+        self._rows = np.asarray(rows, dtype=np.int64)[order]
+        self._group_starts = np.cumsum([0] + [pf.metadata.row_group(g).num_rows for g in range(pf.num_row_groups)])
+        self._pf = pf
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def lookup(self, keys: Sequence[CacheKey]) -> List[Optional[Dict[str, Any]]]:
+        """Cached record per key (None = miss), same shape as load_detection_cache values."""
+        out: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+        if self._pf is None or not len(keys) or not len(self._hashes):
+            return out
+        wanted = np.fromiter((_key_hash(k) for k in keys), dtype=np.uint64, count=len(keys))
+        pos = np.searchsorted(self._hashes, wanted)
+        for i, (k, j) in enumerate(zip(keys, pos)):
+            while j < len(self._hashes) and self._hashes[j] == wanted[i]:
+                rec = self._record(int(self._rows[j]), k)
+                if rec is not None:
+                    out[i] = rec
+                    break
+                j += 1  # 64-bit collision: try the next candidate
+        return out
+
+    def _record(self, row: int, key: CacheKey) -> Optional[Dict[str, Any]]:
+        g = int(np.searchsorted(self._group_starts, row, side="right")) - 1
+        table = self._groups.pop(g, None)
+        if table is None:
+            table = self._pf.read_row_group(g)
+        self._groups[g] = table  # most recently used last
+        while len(self._groups) > self._max_groups:
+            self._groups.pop(next(iter(self._groups)))
+
+        r = table.slice(row - int(self._group_starts[g]), 1).to_pylist()[0]
+        if cache_key(r["path"], r["size_bytes"], r["modified_ts"]) != key:
+            return None
+        rec = {k: _none_if_na(r.get(k)) for k in DETECTION_FIELDS}
+        for k in _INT_FIELDS:
+            if rec[k] is not None:
+                rec[k] = int(rec[k])
+        return rec
+
+
+def _key_hash(key: CacheKey) -> int:
+    src, size_bytes, modified_ts = key
+    payload = f"{src}\0{int(size_bytes)}\0{float(modified_ts)!r}".encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little")
+
+
+def _none_if_na(v: Optional[Any]) -> Optional[Any]:
+    try:
+        return None if pd.isna(v) else v
+    except (TypeError, ValueError):
+        return v
@@ -0,0 +1,312 @@
+# src/fingerprint/file_detection.py
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.fingerprint.header_detector import HeaderDetectionResult, PreviewRows, detect_header_row, extract_raw_headers
+from src.fingerprint.header_templates import HeaderTemplates, TemplateCandidate, match_header_template
+from src.fingerprint.header_normalizer import normalize_headers
+from src.fingerprint.schema_identity import schema_identity
+from src.io.content_hash import content_hash
+from src.io.csv_dialect import CsvDialect, count_csv_records
+from src.io.preview_reader import read_excel_preview, read_csv_preview
+from src.io.xlsx_stream import count_xlsx_rows
+
+
+# Fields produced by detect_file(); these are exactly what the detection cache stores.
+DETECTION_FIELDS = (
+    "sheet_name",
+    "status",
+    "error_message",
+    "header_row_index",
+    "header_confidence",
+    "header_detection_mode",
+    "raw_headers_json",
+    "normalized_headers_json",
+    "schema_key",
+    "schema_hash",
+    "csv_encoding",
+    "csv_delimiter",
+    "csv_quotechar",
+    "data_row_count",
+    "content_hash",
+    "template_candidates_json",
+)
+
+
+def detect_file(
+    path: str | Path,
+    *,
+    header_search_rows: int,
+    min_header_confidence: float,
+    aliases: Optional[Dict[str, str]] = None,
+    count_rows: bool = False,
+    hash_content: bool = False,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Preview + header detection + normalization + schema hash for a single file.
+    Returns a flat record with DETECTION_FIELDS (no run-specific values like label).
+
+    Every preview row is scored (header_detection_mode="scored"). Rows a header template
+    may still pick later are kept in template_candidates_json (see apply_header_template).
+    With `count_rows`, OK files also get data_row_count (rows below the header).
+    With `hash_content`, every file gets content_hash (identical bytes => same hash).
+    With `timings`, seconds per step (preview, hash, detect, normalize, count_rows) are added to it.
+    """
+    p = Path(path)
+    clock = _StepClock(timings)
+    if p.suffix.lower() == ".csv":
+        prev = read_csv_preview(p, header_search_rows)
+    else:
+        prev = read_excel_preview(p, header_search_rows)
+    clock.lap("preview")
+
+    rec: Dict[str, Any] = {k: None for k in DETECTION_FIELDS}
+    rec["sheet_name"] = prev.sheet_name
+    rec["error_message"] = prev.error_message
+    if hash_content:
+        try:
+            rec["content_hash"] = content_hash(p)
+        except OSError:
+            pass
+        clock.lap("hash")
+    if prev.csv_dialect is not None:
+        # recorded so downstream readers don't re-sniff
+        rec["csv_encoding"] = prev.csv_dialect.encoding
+        rec["csv_delimiter"] = prev.csv_dialect.delimiter
+        rec["csv_quotechar"] = prev.csv_dialect.quotechar
+
+    if prev.status != "ok":
+        rec["status"] = "unreadable"
+        return rec
+
+    det = detect_header_row(prev.rows, min_header_confidence)
+    candidates = _template_candidates(prev.rows, det)
+    if candidates:
+        rec["template_candidates_json"] = json.dumps(candidates, ensure_ascii=False)
+    clock.lap("detect")
+
+    rec["header_row_index"] = det.header_row_index
+    rec["header_confidence"] = float(det.confidence)
+    rec["header_detection_mode"] = "scored"
+
+    if det.header_row_index is None:
+        rec["status"] = "low_confidence"
+        return rec
+
+    # Normalize + aliases
+    norm = normalize_headers(det.raw_headers, aliases=aliases)
+    raw_headers: List[str] = list(det.raw_headers)
+    normalized_headers: List[str] = list(norm.normalized_headers)
+
+    rec["raw_headers_json"] = json.dumps(raw_headers, ensure_ascii=False)
+    rec["normalized_headers_json"] = json.dumps(normalized_headers, ensure_ascii=False)
+
+    schema_key, schema_hash = schema_identity(normalized_headers)
+    rec["schema_key"] = schema_key
+    rec["schema_hash"] = schema_hash
+    rec["status"] = "ok"
+    clock.lap("normalize")
+    if count_rows:
+        rec["data_row_count"] = _count_data_rows(p, det.header_row_index, prev.csv_dialect)
+        clock.lap("count_rows")
+    return rec
+
+
+def _template_candidates(rows: PreviewRows, det: HeaderDetectionResult) -> List[TemplateCandidate]:
+    """
+    Rows a template may pick without contradicting scoring: rows other than the scored
+    choice that score at least as well (ties), or every non-empty row when no row
+    reached min_header_confidence.
+    """
+    best = det.header_row_index
+    out: List[TemplateCandidate] = []
+    for i, score in enumerate(det.row_scores):
+        if best is not None and (i == best or score < det.confidence):
+            continue
+        raw_headers = extract_raw_headers(rows[i])
+        if any(raw_headers):
+            out.append([i, score, raw_headers])
+    return out
+
+
+def scored_header_rows(dets: Iterable[Dict[str, Any]]) -> Counter:
+    """{(header_row_index, schema_hash): files} over scored OK records (what templates are learned from)."""
+    return Counter(
+        (int(d["header_row_index"]), d["schema_hash"])
+        for d in dets
+        if d["status"] == "ok" and d["header_detection_mode"] == "scored"
+    )
+
+
+def apply_header_template(
+    path: str | Path,
+    rec: Dict[str, Any],
+    templates: HeaderTemplates,
+    *,
+    aliases: Optional[Dict[str, str]] = None,
+    count_rows: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Copy of a detect_file() record with its header taken from a template hit among its
+    template_candidates_json (header_detection_mode="template"); None when no candidate hits.
+    Cheap: only the stored candidate rows are checked, the file is reopened just for
+    data_row_count.
+    """
+    if not rec.get("template_candidates_json"):
+        return None
+    hit = match_header_template(json.loads(rec["template_candidates_json"]), templates, aliases)
+    if hit is None:
+        return None
+
+    out = dict(rec)
+    out["header_row_index"] = hit.header_row_index
+    out["header_confidence"] = hit.confidence
+    out["header_detection_mode"] = "template"
+    out["raw_headers_json"] = json.dumps(hit.raw_headers, ensure_ascii=False)
+    out["normalized_headers_json"] = json.dumps(hit.normalized_headers, ensure_ascii=False)
+    out["schema_key"] = hit.schema_key
+    out["schema_hash"] = hit.schema_hash
+    out["status"] = "ok"
+    if count_rows:
+        dialect = None
+        if rec.get("csv_encoding"):
+            dialect = CsvDialect(rec["csv_encoding"], rec["csv_delimiter"], rec["csv_quotechar"])
+        out["data_row_count"] = _count_data_rows(Path(path), hit.header_row_index, dialect)
+    return out
+
+
+class _StepClock:
+    """Adds the seconds since the previous lap to timings[step] (no-op without timings)."""
+
+    def __init__(self, timings: Optional[Dict[str, float]]):
+        self.timings = timings
+        self.t = time.perf_counter()
+
+    def lap(self, step: str) -> None:
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[step] = self.timings.get(step, 0.0) + (now - self.t)
+        self.t = now
+
+
+def _detect_file_timed(path: str | Path, **kwargs: Any) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    rec = detect_file(path, timings=timings, **kwargs)
+    timings["total"] = time.perf_counter() - t0
+    return rec, timings
+
+
+def _count_data_rows(p: Path, header_row_index: int, csv_dialect: Optional[CsvDialect]) -> Optional[int]:
+    """
+    Data rows below the detected header, without parsing cells.
+    None when the file can't be counted (the catalog row is still valid).
+    """
+    try:
+        if csv_dialect is not None:
+            total = count_csv_records(p, csv_dialect)
+        else:
+            total = count_xlsx_rows(p)
+    except Exception:
+        return None
+    return max(0, total - (header_row_index + 1))
+
+
+def detect_files(
+    paths: Sequence[str | Path],
+    *,
+    header_search_rows: int,
+    min_header_confidence: float,
+    aliases: Optional[Dict[str, str]] = None,
+    count_rows: bool = False,
+    hash_content: bool = False,
+    workers: int = 1,
+    timings: Optional[List[Dict[str, float]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    detect_file() over many paths. Results come back in the same order as `paths`,
+    so downstream schema_id assignment is identical to a serial run.
+    workers > 1 fans the work out to a process pool.
+    With `timings`, one dict of step seconds (+ "total") per path is appended to it, in order.
+    """
+    fn = partial(
+        detect_file if timings is None else _detect_file_timed,
+        header_search_rows=header_search_rows,
+        min_header_confidence=min_header_confidence,
+        aliases=aliases,
+        count_rows=count_rows,
+        hash_content=hash_content,
+    )
+
+    if workers <= 1 or len(paths) <= 1:
+        out = [fn(p) for p in paths]
+    else:
+        workers = min(workers, len(paths))
+        # small chunks keep big workbooks from piling up on one worker
+        chunksize = max(1, min(16, len(paths) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            out = list(ex.map(fn, paths, chunksize=chunksize))
+
+    if timings is None:
+        return out
+    timings.extend(t for _, t in out)
+    return [rec for rec, _ in out]
+
+
+def iter_detect_files(
+    items: Iterable[Tuple[str | Path, Optional[Dict[str, Any]]]],
+    *,
+    header_search_rows: int,
+    min_header_confidence: float,
+    aliases: Optional[Dict[str, str]] = None,
+    count_rows: bool = False,
+    hash_content: bool = False,
+    workers: int = 1,
+    max_inflight: int = 0,
+) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, float]]]]:
+    """
+    Streaming detect_files(): items are (path, known record or None), consumed lazily.
+    Known records (cache hits) pass through; the others are detected. Yields
+    (record, step timings incl. "total" / None for known records) in input order.
+
+    At most `max_inflight` items (default 32 per worker) are pending at a time,
+    so memory does not grow with the number of files.
+    """
+    fn = partial(
+        _detect_file_timed,
+        header_search_rows=header_search_rows,
+        min_header_confidence=min_header_confidence,
+        aliases=aliases,
+        count_rows=count_rows,
+        hash_content=hash_content,
+    )
+
+    if workers <= 1:
+        for path, known in items:
+            yield (known, None) if known is not None else fn(path)
+        return
+
+    limit = max_inflight or 32 * workers
+    window: Deque[Tuple[Any, Optional[Dict[str, Any]]]] = deque()  # (future | None, known)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for path, known in items:
+            window.append((None, known) if known is not None else (ex.submit(fn, path), None))
+            while window and (len(window) > limit or window[0][0] is None or window[0][0].done()):
+                yield _settle(window.popleft())
+        while window:
+            yield _settle(window.popleft())
+
+
+def _settle(entry: Tuple[Any, Optional[Dict[str, Any]]]) -> Tuple[Dict[str, Any], Optional[Dict[str, float]]]:
+    fut, known = entry
+    return (known, None) if fut is None else fut.result()
+
@@ -2,7 +2,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+# Preview matrix: 2-D object ndarray from src.io.preview_reader, or plain lists of rows
+PreviewRows = Union[np.ndarray, Sequence[Sequence[Any]]]
 
 
 @dataclass(frozen=True)
@@ -11,68 +17,118 @@ class HeaderDetectionResult:
     confidence: float                # 0..1
     raw_headers: List[str]
     score_breakdown: Dict[str, float]
+    row_scores: Tuple[float, ...] = ()  # clamped score of every preview row (same scale as confidence)
 
 
 def detect_header_row(
-    rows: Sequence[Sequence[Any]],
+    rows: PreviewRows,
     min_confidence: float,
 ) -> HeaderDetectionResult:
     """
     Given a preview matrix (top N rows), choose the best header row candidate.
     If confidence < min_confidence => header_row_index=None (quarantine decision upstream).
     """
-    if not rows:
+    if len(rows) == 0:
         return HeaderDetectionResult(None, 0.0, [], {"reason": 0.0})
 
-    best_idx = None
-    best_score = -1.0
-    best_breakdown: Dict[str, float] = {}
+    stats = _classify_cells(rows)
+    scores, parts = _score_all_rows(stats)
 
-    # Score each row as candidate header
-    for idx in range(len(rows)):
-        score, breakdown = _score_row_as_header(rows, idx)
-        if score > best_score:
-            best_score = score
-            best_idx = idx
-            best_breakdown = breakdown
+    # Best candidate = first row with the highest (clamped) score
+    best_idx = int(np.argmax(scores))
+    best_breakdown = _breakdown(stats, parts, best_idx)
 
     # Convert score to confidence in 0..1 (score already 0..1-ish, clamp)
-    confidence = max(0.0, min(1.0, best_score))
+    row_scores = tuple(np.clip(scores, 0.0, 1.0).tolist())
+    confidence = row_scores[best_idx]
 
-    if best_idx is None or confidence < min_confidence:
-        return HeaderDetectionResult(None, confidence, [], best_breakdown)
+    if confidence < min_confidence:
+        return HeaderDetectionResult(None, confidence, [], best_breakdown, row_scores)
 
-    raw_headers = _extract_raw_headers(rows[best_idx])
-    return HeaderDetectionResult(best_idx, confidence, raw_headers, best_breakdown)
+    raw_headers = extract_raw_headers(rows[best_idx])
+    return HeaderDetectionResult(best_idx, confidence, raw_headers, best_breakdown, row_scores)
 
 
-def _score_row_as_header(rows: Sequence[Sequence[Any]], idx: int) -> Tuple[float, Dict[str, float]]:
-    row = rows[idx]
-    vals = [_clean_cell(v) for v in row]
-    nonempty = [v for v in vals if v is not None]
+# Cell kinds (each preview cell is classified exactly once)
+_ABSENT = -1      # ragged list rows: no cell at this position
+_EMPTY = 0        # None / blank string
+_SHORT_TEXT = 1   # str, 1..40 chars after strip
+_LONG_TEXT = 2    # str, > 40 chars
+_NUMBER = 3       # int/float (not bool), NaN included
+_OTHER = 4        # dates, bools, ...
 
-    if not vals:
-        return 0.0, {"nonempty_density": 0.0, "reason": 0.0}
 
-    nonempty_density = len(nonempty) / max(1, len(vals))
-    if len(nonempty) == 0:
-        return 0.0, {"nonempty_density": 0.0, "reason": 0.0}
+@dataclass(frozen=True)
+class _CellStats:
+    kinds: np.ndarray        # (n_rows, width) int8 matrix of cell kinds
+    n_cells: np.ndarray      # cells per row (row length)
+    n_nonempty: np.ndarray
+    n_text: np.ndarray
+    n_short: np.ndarray
+    n_numeric: np.ndarray
+    n_strings: np.ndarray    # non-blank str(v) values (uniqueness denominator)
+    n_unique: np.ndarray     # distinct lowercased str(v) values
+
+
+def _classify_cells(rows: PreviewRows) -> _CellStats:
+    n = len(rows)
+    width = rows.shape[1] if isinstance(rows, np.ndarray) else max((len(r) for r in rows), default=0)
+    kinds = np.full((n, width), _ABSENT, dtype=np.int8)
+    n_strings = np.zeros(n, dtype=np.int64)
+    n_unique = np.zeros(n, dtype=np.int64)
+
+    for i in range(n):
+        row = rows[i]
+        seen = set()
+        strings = 0
+        for j, v in enumerate(row):
+            v = _clean_cell(v)
+            if v is None:
+                kinds[i, j] = _EMPTY
+                continue
+            if _is_texty(v):
+                kinds[i, j] = _SHORT_TEXT if len(v) <= 40 else _LONG_TEXT
+            elif _is_numeric(v):
+                kinds[i, j] = _NUMBER
+            else:
+                kinds[i, j] = _OTHER
+
+            s = str(v).strip()
+            if s != "":
+                strings += 1
+                seen.add(s.lower())
+        n_strings[i] = strings
+        n_unique[i] = len(seen)
+
+    text = (kinds == _SHORT_TEXT) | (kinds == _LONG_TEXT)
+    return _CellStats(
+        kinds=kinds,
+        n_cells=(kinds != _ABSENT).sum(axis=1),
+        n_nonempty=(kinds > _EMPTY).sum(axis=1),
+        n_text=text.sum(axis=1),
+        n_short=(kinds == _SHORT_TEXT).sum(axis=1),
+        n_numeric=(kinds == _NUMBER).sum(axis=1),
+        n_strings=n_strings,
+        n_unique=n_unique,
+    )
 
-    # text vs numeric ratio
-    text_count = sum(1 for v in nonempty if _is_texty(v))
-    numeric_count = sum(1 for v in nonempty if _is_numeric(v))
-    text_ratio = text_count / max(1, len(nonempty))
 
-    # short string dominance (headers tend to be short)
-    short_count = sum(1 for v in nonempty if isinstance(v, str) and 1 <= len(v) <= 40)
-    short_ratio = short_count / max(1, len(nonempty))
+def _score_all_rows(st: _CellStats) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score every row as header candidate at once.
+    Same formulas (and float operation order) as the original per-row heuristic.
+    """
+    nonempty_safe = np.maximum(1, st.n_nonempty)
 
+    nonempty_density = st.n_nonempty / np.maximum(1, st.n_cells)
+    # text vs numeric ratio
+    text_ratio = st.n_text / nonempty_safe
+    # short string dominance (headers tend to be short)
+    short_ratio = st.n_short / nonempty_safe
     # uniqueness: headers likely mostly unique
-    norm_strings = [str(v).strip().lower() for v in nonempty if str(v).strip() != ""]
-    unique_ratio = len(set(norm_strings)) / max(1, len(norm_strings))
-
+    unique_ratio = st.n_unique / np.maximum(1, st.n_strings)
     # coherence with following rows: after header, data rows often have fewer strings-as-labels
-    follow_score = _following_rows_coherence(rows, idx)
+    follow_score = _following_rows_coherence(nonempty_density, text_ratio, st.n_numeric / nonempty_safe)
 
     # Weighted sum (tuned for messy excel)
     score = (
@@ -83,7 +139,10 @@ def _score_row_as_header(rows: Sequence[Sequence[Any]], idx: int) -> Tuple[float
         + 0.12 * follow_score
     )
 
-    breakdown = {
+    # rows without any non-empty cell can't be headers
+    clamped = np.where(st.n_nonempty > 0, np.clip(score, 0.0, 1.0), 0.0)
+
+    parts = {
         "nonempty_density": nonempty_density,
         "text_ratio": text_ratio,
         "short_ratio": short_ratio,
@@ -91,43 +150,46 @@ def _score_row_as_header(rows: Sequence[Sequence[Any]], idx: int) -> Tuple[float
         "follow_score": follow_score,
         "score": score,
     }
-    return max(0.0, min(1.0, score)), breakdown
+    return clamped, parts
 
 
-def _following_rows_coherence(rows: Sequence[Sequence[Any]], idx: int) -> float:
+def _following_rows_coherence(
+    density: np.ndarray,
+    text_ratio: np.ndarray,
+    numeric_ratio: np.ndarray,
+) -> np.ndarray:
     """
     Heuristic: a header row tends to be followed by rows with:
     - similar non-empty density
     - more numeric / mixed values than pure label strings
+    Lookahead up to 5 rows; rows with nothing after them get 0.3 (unknown, mild support).
     """
-    next_rows = rows[idx + 1 : idx + 6]  # lookahead up to 5 rows
-    if not next_rows:
-        return 0.3  # unknown, mild support
-
-    header_vals = [_clean_cell(v) for v in rows[idx]]
-    header_nonempty = sum(1 for v in header_vals if v is not None)
-    header_len = max(1, len(header_vals))
-    header_density = header_nonempty / header_len
-
-    scores: List[float] = []
-    for r in next_rows:
-        vals = [_clean_cell(v) for v in r]
-        nonempty = [v for v in vals if v is not None]
-        density = len(nonempty) / max(1, len(vals))
-
-        numeric_ratio = (sum(1 for v in nonempty if _is_numeric(v)) / max(1, len(nonempty))) if nonempty else 0.0
-        text_ratio = (sum(1 for v in nonempty if _is_texty(v)) / max(1, len(nonempty))) if nonempty else 0.0
-
+    n = len(density)
+    total = np.zeros(n, dtype=np.float64)
+    count = np.zeros(n, dtype=np.int64)
+
+    for k in range(1, 6):
+        if k >= n:
+            break
+        # candidate rows [0, n-k) looking at row idx+k
+        h = density[: n - k]
+        d = density[k:]
         # prefer similar density, and not "all text labels" like metadata blocks
-        density_sim = 1.0 - min(1.0, abs(density - header_density) / 0.6)
-        mixedness = min(1.0, numeric_ratio + 0.5 * (1.0 - text_ratio))
+        density_sim = 1.0 - np.minimum(1.0, np.abs(d - h) / 0.6)
+        mixedness = np.minimum(1.0, numeric_ratio[k:] + 0.5 * (1.0 - text_ratio[k:]))
+        total[: n - k] += 0.55 * density_sim + 0.45 * mixedness
+        count[: n - k] += 1
+
+    return np.where(count > 0, total / np.maximum(1, count), 0.3)
 
-        scores.append(0.55 * density_sim + 0.45 * mixedness)
 
-    return sum(scores) / max(1, len(scores))
+def _breakdown(st: _CellStats, parts: Dict[str, np.ndarray], idx: int) -> Dict[str, float]:
+    if st.n_cells[idx] == 0 or st.n_nonempty[idx] == 0:
+        return {"nonempty_density": 0.0, "reason": 0.0}
+    return {k: float(v[idx]) for k, v in parts.items()}
 
 
-def _extract_raw_headers(row: Sequence[Any]) -> List[str]:
+def extract_raw_headers(row: Sequence[Any]) -> List[str]:
     out: List[str] = []
     for v in row:
         v2 = _clean_cell(v)
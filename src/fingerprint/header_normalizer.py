@@ -4,6 +4,7 @@ from __future__ import annotations
 import re
 import unicodedata
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence
 
@@ -11,8 +12,12 @@ import yaml
 
 
 _NON_ALNUM_UNDERSCORE = re.compile(r"[^a-z0-9_]+")
+_NON_WORD = re.compile(r"[^\w]+")
 _MULTI_UNDERSCORE = re.compile(r"_+")
 
+# Bounded LRU shared by every file in the process
+NORMALIZE_CACHE_SIZE = 65536
+
 
 @dataclass(frozen=True)
 class HeaderNormalizationResult:
@@ -87,17 +92,22 @@ def normalize_headers(
 def normalize_header(header: str) -> str:
     """
     Normalize a single header according to project rules.
+    Memoized: the same header strings recur across the whole datalake.
     """
     if header is None:
         return ""
+    return _normalize_header_cached(str(header))
+
 
-    s = str(header).strip().lower()
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_header_cached(header: str) -> str:
+    s = header.strip().lower()
     if not s:
         return ""
 
-    # remove accents
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    # remove accents (ASCII has nothing to decompose)
+    if not s.isascii():
+        s = _strip_accents(s)
 
     # replace separators with underscore
     s = s.replace(" ", "_").replace("-", "_").replace("/", "_").replace(".", "_")
@@ -109,3 +119,43 @@ def normalize_header(header: str) -> str:
     s = _MULTI_UNDERSCORE.sub("_", s).strip("_")
 
     return s
+
+
+def to_snake(s: str) -> str:
+    """
+    snake_case used for DataFrame columns in the processed pipelines
+    (keeps unicode word characters, unlike normalize_header). Memoized.
+    """
+    if s is None:
+        return ""
+    return _to_snake_cached(str(s))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _to_snake_cached(s: str) -> str:
+    s = s.strip()
+    if not s.isascii():
+        s = _strip_accents(s)
+    s = s.lower()
+    s = _NON_WORD.sub("_", s)  # spaces/punct -> _
+    s = _MULTI_UNDERSCORE.sub("_", s).strip("_")
+    return s
+
+
+def _strip_accents(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+
+def normalization_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters of the header caches (per process)."""
+    h = _normalize_header_cached.cache_info()
+    t = _to_snake_cached.cache_info()
+    return {
+        "normalize_header_hits": h.hits,
+        "normalize_header_misses": h.misses,
+        "normalize_header_size": h.currsize,
+        "to_snake_hits": t.hits,
+        "to_snake_misses": t.misses,
+        "to_snake_size": t.currsize,
+    }
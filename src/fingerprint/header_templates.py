@@ -0,0 +1,87 @@
+# src/fingerprint/header_templates.py
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from src.fingerprint.header_normalizer import normalize_headers
+from src.fingerprint.schema_identity import schema_identity
+
+
+# Rows a template may still pick in one file: [header_row_index, score, raw header cells]
+TemplateCandidate = Tuple[int, float, List[str]]
+
+
+@dataclass(frozen=True)
+class HeaderTemplates:
+    """
+    Known header positions of labeled schemas, learned from the scored detections
+    of the current run (so the result depends on the lake and config, not on run history).
+    """
+    by_row: Dict[int, FrozenSet[str]]  # header_row_index -> labeled schema_hashes seen there
+    rows_in_order: Tuple[int, ...]     # candidate header rows, most frequent first
+
+
+@dataclass(frozen=True)
+class TemplateMatch:
+    header_row_index: int
+    confidence: float                  # the row's detection score
+    raw_headers: List[str]
+    normalized_headers: List[str]
+    schema_key: str
+    schema_hash: str
+
+
+def build_header_templates(
+    seen: Mapping[Tuple[int, str], int],
+    schema_labels: Dict[str, str],
+) -> Optional[HeaderTemplates]:
+    """
+    Templates from {(header_row_index, schema_hash): files} of scored OK detections;
+    only labeled schema_hashes count. None when there are none.
+    """
+    by_row: Dict[int, set] = defaultdict(set)
+    freq: Dict[int, int] = defaultdict(int)
+    for (idx, schema_hash), n in seen.items():
+        if idx is None or schema_hash not in schema_labels:
+            continue
+        by_row[int(idx)].add(str(schema_hash))
+        freq[int(idx)] += n
+    if not by_row:
+        return None
+
+    return HeaderTemplates(
+        by_row={k: frozenset(v) for k, v in by_row.items()},
+        rows_in_order=tuple(sorted(freq, key=lambda k: (-freq[k], k))),
+    )
+
+
+def match_header_template(
+    candidates: Sequence[TemplateCandidate],
+    templates: HeaderTemplates,
+    aliases: Optional[Dict[str, str]] = None,
+) -> Optional[TemplateMatch]:
+    """
+    Check the candidate rows at known header positions, most frequent position first:
+    a hit means that row's normalized header set hashes to a labeled schema seen with
+    its header at that same row.
+    """
+    by_idx = {int(idx): (float(score), raw) for idx, score, raw in candidates}
+    for idx in templates.rows_in_order:
+        if idx not in by_idx:
+            continue
+
+        score, raw_headers = by_idx[idx]
+        normalized = list(normalize_headers(raw_headers, aliases=aliases).normalized_headers)
+        schema_key, schema_hash = schema_identity(normalized)
+        if schema_hash in templates.by_row[idx]:
+            return TemplateMatch(
+                header_row_index=idx,
+                confidence=score,
+                raw_headers=list(raw_headers),
+                normalized_headers=normalized,
+                schema_key=schema_key,
+                schema_hash=schema_hash,
+            )
+    return None
@@ -0,0 +1,16 @@
+# src/fingerprint/schema_identity.py
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence, Tuple
+
+
+def schema_identity(normalized_headers: Sequence[str]) -> Tuple[str, str]:
+    """
+    Schema = exact set of normalized headers (order ignored).
+    Returns (schema_key, schema_hash).
+    """
+    canonical = tuple(sorted(set(normalized_headers)))
+    schema_key = "|".join(canonical)  # stable string key for audit
+    schema_hash = hashlib.sha1(schema_key.encode("utf-8")).hexdigest()[:12]
+    return schema_key, schema_hash
@@ -0,0 +1,66 @@
+# src/io/artifact_schemas.py
+from __future__ import annotations
+
+import pyarrow as pa
+
+
+# Fixed column types of the staging artifacts (file_catalog, schema_registry,
+# classification_manifest), shared by streaming runs and the staging history.
+CATALOG_SCHEMA = pa.schema(
+    [
+        ("run_ts", pa.string()),
+        ("path", pa.string()),
+        ("size_bytes", pa.int64()),
+        ("modified_ts", pa.float64()),
+        ("sheet_name", pa.string()),
+        ("status", pa.string()),
+        ("error_message", pa.string()),
+        ("header_row_index", pa.int64()),
+        ("header_confidence", pa.float64()),
+        ("header_detection_mode", pa.string()),
+        ("raw_headers_json", pa.string()),
+        ("normalized_headers_json", pa.string()),
+        ("schema_key", pa.string()),
+        ("schema_hash", pa.string()),
+        ("csv_encoding", pa.string()),
+        ("csv_delimiter", pa.string()),
+        ("csv_quotechar", pa.string()),
+        ("data_row_count", pa.int64()),
+        ("content_hash", pa.string()),
+        ("duplicate_of", pa.string()),
+        ("schema_id", pa.string()),
+        ("label", pa.string()),
+    ]
+)
+
+REGISTRY_SCHEMA = pa.schema(
+    [
+        ("run_ts", pa.string()),
+        ("schema_id", pa.string()),
+        ("schema_key", pa.string()),
+        ("schema_hash", pa.string()),
+        ("canonical_headers_json", pa.string()),
+        ("file_count", pa.int64()),
+        ("data_row_count", pa.int64()),
+        ("example_files_json", pa.string()),
+    ]
+)
+
+MANIFEST_SCHEMA = pa.schema(
+    [
+        ("run_ts", pa.string()),
+        ("src_path", pa.string()),
+        ("dst_path", pa.string()),
+        ("src_status", pa.string()),
+        ("copy_status", pa.string()),
+        ("error_message", pa.string()),
+        ("schema_id", pa.string()),
+        ("schema_key", pa.string()),
+        ("schema_hash", pa.string()),
+        ("label", pa.string()),
+        ("copy_bytes", pa.int64()),
+        ("copy_seconds", pa.float64()),
+        ("copy_bytes_per_s", pa.float64()),
+        ("sync_action", pa.string()),
+    ]
+)
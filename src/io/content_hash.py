@@ -0,0 +1,34 @@
+# src/io/content_hash.py
+from __future__ import annotations
+
+import hashlib
+import mmap
+from pathlib import Path
+
+
+HASH_CHUNK = 8 * 1024 * 1024
+
+# Same size and an mtime within this many seconds => same file, no re-hash / re-copy.
+# copy2 preserves mtime; allow for filesystems that store it with less precision.
+MTIME_TOLERANCE_S = 0.001
+
+
+def content_hash(path: str | Path) -> str:
+    """
+    Hash of the file bytes (blake2b-128), streamed in chunks over a memory map
+    so even very large exports are hashed without loading them into memory.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    p = Path(path)
+    with p.open("rb") as f:
+        size = p.stat().st_size
+        if size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for start in range(0, size, HASH_CHUNK):
+                    h.update(view[start : start + HASH_CHUNK])
+            finally:
+                view.release()
+    return h.hexdigest()
@@ -0,0 +1,266 @@
+# src/io/csv_dialect.py
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+CANDIDATE_DELIMITERS = (",", ";", "\t", "|")
+SAMPLE_BYTES = 64 * 1024
+MAX_SAMPLE_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CsvDialect:
+    encoding: str   # python codec name, e.g. utf-8-sig | utf-16 | utf-8 | cp1252 | latin-1
+    delimiter: str
+    quotechar: str
+
+
+def sniff_csv_head(path: str | Path, max_rows: int) -> Tuple[CsvDialect, List[List[str]]]:
+    """
+    Read only the first bytes of a CSV, sniff encoding/delimiter/quotechar once
+    on that sample and return (dialect, first `max_rows` raw rows).
+
+    Rows are returned as-is: no row is treated as the header (that's the
+    header detector's job), blank lines are skipped like pandas does.
+    """
+    p = Path(path)
+    raw, at_eof = _read_head_bytes(p, max_rows)
+
+    encoding = _sniff_encoding(raw)
+    text = _decode_sample(raw, encoding, at_eof)
+
+    delimiter = _sniff_delimiter(text)
+    quotechar = _sniff_quotechar(text, delimiter)
+    dialect = CsvDialect(encoding=encoding, delimiter=delimiter, quotechar=quotechar)
+
+    rows = parse_rows(text, dialect, max_rows)
+    return dialect, rows
+
+
+def parse_rows(text: str, dialect: CsvDialect, max_rows: Optional[int] = None) -> List[List[str]]:
+    rows: List[List[str]] = []
+    reader = csv.reader(
+        io.StringIO(text, newline=""),
+        delimiter=dialect.delimiter,
+        quotechar=dialect.quotechar,
+    )
+    for row in reader:
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue  # blank line
+        rows.append(row)
+        if max_rows is not None and len(rows) >= max_rows:
+            break
+    return rows
+
+
+def record_span(path: str | Path, dialect: CsvDialect, row_index: int) -> Tuple[int, int]:
+    """
+    Byte range [start, end) of the `row_index`-th non-blank record, numbered like
+    parse_rows() (so a detected header_row_index maps straight to a file offset).
+    Only reads up to that record. Not for UTF-16 (byte-level scan).
+    """
+    if dialect.encoding.startswith("utf-16"):
+        raise ValueError("record_span needs a byte-compatible encoding (not UTF-16)")
+
+    quote = dialect.quotechar.encode("ascii")
+    delimiter = dialect.delimiter.encode("ascii")
+    rows = 0
+    pos = 0
+    start = 0
+    parts: List[bytes] = []
+    in_quotes = False
+    with Path(path).open("rb") as f:
+        for line in f:  # split on b"\n"; quoted newlines are joined via quote parity
+            if not in_quotes:
+                start = pos
+                parts = []
+            pos += len(line)
+            parts.append(line)
+            if line.count(quote) & 1:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue
+            record = b"".join(parts) if len(parts) > 1 else line
+            if delimiter not in record and _is_blank_record(record, dialect):
+                continue  # blank line (single field, nothing but whitespace)
+            if rows == row_index:
+                return start, pos
+            rows += 1
+    raise ValueError(f"CSV has fewer than {row_index + 1} records")
+
+
+def _is_blank_record(line: bytes, dialect: CsvDialect) -> bool:
+    text = line.lstrip(b"\xef\xbb\xbf").decode("latin-1")
+    return not parse_rows(text, dialect)
+
+
+def _read_head_bytes(p: Path, max_rows: int) -> Tuple[bytes, bool]:
+    """
+    Read SAMPLE_BYTES, doubling until the sample holds `max_rows` lines
+    (or EOF / MAX_SAMPLE_BYTES).
+    """
+    size = SAMPLE_BYTES
+    with p.open("rb") as f:
+        buf = f.read(size)
+        while True:
+            at_eof = len(buf) < size
+            if at_eof or buf.count(b"\n") > max_rows or size >= MAX_SAMPLE_BYTES:
+                return buf, at_eof
+            more = f.read(size)
+            buf += more
+            size *= 2
+            if not more:
+                return buf, True
+
+
+def _sniff_encoding(raw: bytes) -> str:
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if raw.startswith(b"\xff\xfe") or raw.startswith(b"\xfe\xff"):
+        return "utf-16"
+    for enc in ("utf-8", "cp1252"):
+        try:
+            _trim_partial_line(raw, at_eof=False).decode(enc)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"  # never fails
+
+
+def _decode_sample(raw: bytes, encoding: str, at_eof: bool) -> str:
+    if encoding == "utf-16":
+        text = raw.decode(encoding, errors="ignore")  # may cut a code unit at the end
+        return text if at_eof else text[: text.rfind("\n") + 1]
+    return _trim_partial_line(raw, at_eof).decode(encoding, errors="replace")
+
+
+def _trim_partial_line(raw: bytes, at_eof: bool) -> bytes:
+    if at_eof:
+        return raw
+    cut = raw.rfind(b"\n")
+    return raw[: cut + 1] if cut >= 0 else raw
+
+
+def _sniff_delimiter(text: str) -> str:
+    """
+    Pick the delimiter that gives the most lines sharing the same (>1) field count.
+    Preamble lines (titles, export dates) don't share the table's field count,
+    so they don't confuse it the way sniffing only the first line does.
+    """
+    lines = [ln for ln in text.splitlines() if ln.strip()][:200]
+    best, best_score = CANDIDATE_DELIMITERS[0], (0, 0)
+    for d in CANDIDATE_DELIMITERS:
+        counts = Counter(len(r) for r in csv.reader(lines, delimiter=d) if len(r) > 1)
+        if not counts:
+            continue
+        width, n_lines = max(counts.items(), key=lambda kv: (kv[1], kv[0]))
+        score = (n_lines, width)
+        if score > best_score:
+            best, best_score = d, score
+    return best
+
+
+def _sniff_quotechar(text: str, delimiter: str) -> str:
+    """Double quote unless fields are clearly wrapped in single quotes."""
+    def wrapped(q: str) -> int:
+        return text.count(f"{delimiter}{q}") + text.count(f"\n{q}")
+
+    return "'" if wrapped("'") > wrapped('"') else '"'
+
+
+_COUNT_CHUNK = 16 * 1024 * 1024
+
+
+def count_csv_records(path: str | Path, dialect: CsvDialect) -> int:
+    """
+    Number of non-blank CSV records (newlines inside quoted fields don't count).
+    Byte-level over a memory map; only UTF-16 files are decoded and parsed.
+    """
+    p = Path(path)
+    if dialect.encoding.startswith("utf-16"):
+        with p.open("r", encoding=dialect.encoding, newline="") as f:
+            text = f.read()
+        return len(parse_rows(text, dialect))
+
+    if p.stat().st_size == 0:
+        return 0
+
+    quote = ord(dialect.quotechar)
+    delimiter = dialect.delimiter.encode("ascii")
+    # bytes a blank line may consist of (a tab-only line is a record when tab is the delimiter)
+    blank_bytes = np.frombuffer(_WHITESPACE.replace(delimiter, b""), dtype=np.uint8)
+    records = 0
+    in_quotes = False
+    prev_nl = -1       # position of the previous record-ending newline
+    last_byte = None
+
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        for start in range(0, size, _COUNT_CHUNK):
+            buf = np.frombuffer(mm, dtype=np.uint8, count=min(_COUNT_CHUNK, size - start), offset=start)
+
+            # quote parity per byte ("" escapes toggle twice, so they cancel out)
+            is_quote = buf == quote
+            parity = np.cumsum(is_quote, dtype=np.int64) & 1
+            if in_quotes:
+                parity ^= 1
+            nl = np.flatnonzero((buf == 0x0A) & (parity == 0)) + start
+
+            records += _count_nonblank(mm, buf, start, nl, prev_nl, blank_bytes, delimiter)
+            if len(nl):
+                prev_nl = int(nl[-1])
+            in_quotes = bool(parity[-1])
+            last_byte = int(buf[-1])
+            del buf, is_quote, parity  # release views before the mmap closes
+
+        # last record without trailing newline
+        tail_len = size - prev_nl - 1
+        if last_byte != 0x0A and tail_len > 0 and not _is_blank(mm[prev_nl + 1 :], delimiter):
+            records += 1
+
+    return records
+
+
+def _count_nonblank(
+    mm: mmap.mmap,
+    buf: np.ndarray,
+    offset: int,
+    nl: np.ndarray,
+    prev_nl: int,
+    blank_bytes: np.ndarray,
+    delimiter: bytes,
+) -> int:
+    """
+    Records ending at each newline in `nl`, minus blank lines (nothing but whitespace,
+    no delimiter), the same lines parse_rows() / record_span() skip.
+    `buf` is the chunk starting at byte `offset`; `nl` holds absolute positions.
+    """
+    if len(nl) == 0:
+        return 0
+    starts = np.concatenate(([prev_nl + 1], nl[:-1] + 1))
+    # prefix sums of non-blank bytes: content per line = two lookups
+    content = np.concatenate(([0], np.cumsum(~np.isin(buf, blank_bytes), dtype=np.int64)))
+    local = starts - offset
+    count = int((content[nl[1:] - offset] - content[local[1:]] > 0).sum())
+    # the first line may have started in the previous chunk
+    if local[0] >= 0:
+        count += int(content[nl[0] - offset] - content[local[0]] > 0)
+    elif not _is_blank(mm[int(starts[0]) : int(nl[0])], delimiter):
+        count += 1
+    return count
+
+
+_WHITESPACE = b" \t\n\r\x0b\x0c"  # what bytes.strip() removes
+
+
+def _is_blank(line: bytes, delimiter: bytes) -> bool:
+    return delimiter not in line and not line.strip()
@@ -0,0 +1,93 @@
+# src/io/parquet_parts.py
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+DEFAULT_BATCH_ROWS = 10_000
+
+
+class PartWriter:
+    """
+    Rows appended one dict at a time and written as parquet part files of
+    `batch_rows` rows: <parts_dir>/part-00000.parquet, part-00001.parquet, ...
+
+    Each part is written to a temp name and renamed, so the directory is a
+    readable (partial) dataset at any moment: pd.read_parquet(parts_dir).
+    Only the current batch is held in memory.
+    """
+
+    def __init__(self, parts_dir: Path, schema: pa.Schema, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.parts_dir = Path(parts_dir)
+        self.schema = schema
+        self.batch_rows = max(1, int(batch_rows))
+        self.parts: List[Path] = []
+        self.rows = 0
+        self._pending: List[Dict[str, Any]] = []
+        if self.parts_dir.exists():
+            shutil.rmtree(self.parts_dir)  # leftovers of an interrupted run
+        self.parts_dir.mkdir(parents=True)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        table = pa.Table.from_pylist(self._pending, schema=self.schema)
+        p = self.parts_dir / f"part-{len(self.parts):05d}.parquet"
+        tmp = p.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        tmp.replace(p)
+        self.parts.append(p)
+        self.rows += len(self._pending)
+        self._pending = []
+
+    def close(self) -> List[Path]:
+        self.flush()
+        return self.parts
+
+
+def assemble_parts(
+    parts: List[Path],
+    out_path: Path,
+    schema: pa.Schema,
+    *,
+    transform: Optional[Callable[[pa.RecordBatch], pa.RecordBatch]] = None,
+) -> int:
+    """
+    Concatenate part files into out_path (one row group per part batch), optionally
+    rewriting each batch on the way. Written to a temp file and moved into place.
+    Returns the number of rows written.
+    """
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for p in parts:
+                for batch in pq.ParquetFile(p).iter_batches():
+                    if transform is not None:
+                        batch = transform(batch)
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+            if rows == 0:
+                writer.write_table(schema.empty_table())
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(out_path)
+    return rows
+
+
+def read_parts_columns(parts: List[Path], columns: List[str]) -> pa.Table:
+    """Only the given columns of all parts (compact Arrow arrays, not Python rows)."""
+    if not parts:
+        raise ValueError("No parquet parts to read")
+    return pa.concat_tables([pq.read_table(p, columns=columns) for p in parts])
@@ -5,40 +5,54 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, List, Optional
 
+import numpy as np
 import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
 
+from src.io.csv_dialect import CsvDialect, sniff_csv_head
+from src.io.xlsx_stream import read_xlsx_head
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class TabularPreview:
     path: Path
     sheet_name: str
-    rows: List[List[Any]]  # matrix INCLUDING header row
+    rows: np.ndarray  # 2-D object matrix INCLUDING header row (row 0 = header)
     max_rows: int
     status: str  # ok | unreadable
     error_message: Optional[str] = None
+    csv_dialect: Optional[CsvDialect] = None  # CSV only: sniffed encoding/delimiter/quotechar
+
+
+_EMPTY_MATRIX = np.empty((0, 0), dtype=object)
 
 
 def read_excel_preview(path: str | Path, max_rows: int) -> TabularPreview:
     """
     Read only the first `max_rows` rows from the first Excel sheet.
     Avoids broken UsedRange metadata.
+
+    XLSX files are streamed (see src/io/xlsx_stream.py) and parsing stops after
+    `max_rows` data rows; anything the streaming reader cannot handle falls back
+    to pandas.read_excel with the same row semantics.
     """
     p = Path(path).expanduser().resolve()
 
     try:
-        df = pd.read_excel(
-            p,
-            sheet_name=0,
-            nrows=max_rows,
-            dtype=object,
-        )
-
-        header = list(df.columns)
-        rows = [header]
-        for _, r in df.iterrows():
-            rows.append(list(r.values))
-
-        sheet_name = df.columns.name if df.columns.name else "Sheet1"
+        try:
+            sheet_name, data = read_xlsx_head(p, max_rows + 1)  # +1: header row
+            df = _sheet_data_to_frame(data, max_rows)
+        except Exception:
+            df = pd.read_excel(
+                p,
+                sheet_name=0,
+                nrows=max_rows,
+                dtype=object,
+            )
+            sheet_name = df.columns.name if df.columns.name else "Sheet1"
+
+        rows = _frame_to_matrix(df)
 
         return TabularPreview(
             path=p,
@@ -52,7 +66,7 @@ def read_excel_preview(path: str | Path, max_rows: int) -> TabularPreview:
         return TabularPreview(
             path=p,
             sheet_name="",
-            rows=[],
+            rows=_EMPTY_MATRIX,
             max_rows=max_rows,
             status="unreadable",
             error_message=f"{type(e).__name__}: {e}",
@@ -63,24 +77,21 @@ def read_csv_preview(path: str | Path, max_rows: int) -> TabularPreview:
     """
     Read only the first `max_rows` rows from a CSV file.
     Handles BOM, delimiter detection, and messy exports.
+
+    Only the head of the file is read; encoding/delimiter/quotechar are sniffed
+    once on that sample (src/io/csv_dialect.py) and returned in `csv_dialect`.
+    Rows are raw (the first line is a plain row, not column names), so
+    preamble lines don't affect sniffing and the detector sees the real header.
     """
     p = Path(path).expanduser().resolve()
 
     try:
-        df = pd.read_csv(
-            p,
-            nrows=max_rows,
-            dtype=object,
-            encoding="utf-8-sig",   # handles BOM
-            sep=None,               # auto-detect delimiter
-            engine="python",
-            keep_default_na=False,
-        )
+        dialect, raw_rows = sniff_csv_head(p, max_rows + 1)  # same row budget as XLSX: header + max_rows
 
-        header = list(df.columns)
-        rows = [header]
-        for _, r in df.iterrows():
-            rows.append(list(r.values))
+        width = max((len(r) for r in raw_rows), default=0)
+        rows = np.empty((len(raw_rows), width), dtype=object)  # short rows padded with None (empty)
+        for i, r in enumerate(raw_rows):
+            rows[i, : len(r)] = r
 
         return TabularPreview(
             path=p,
@@ -88,14 +99,47 @@ def read_csv_preview(path: str | Path, max_rows: int) -> TabularPreview:
             rows=rows,
             max_rows=max_rows,
             status="ok",
+            csv_dialect=dialect,
         )
 
     except Exception as e:
         return TabularPreview(
             path=p,
             sheet_name="",
-            rows=[],
+            rows=_EMPTY_MATRIX,
             max_rows=max_rows,
             status="unreadable",
             error_message=f"{type(e).__name__}: {e}",
         )
+
+
+def _frame_to_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Header + data as one 2-D object array (no per-row Series / list objects).
+    Cell values are the same Python objects df.iterrows() would yield.
+    """
+    out = np.empty((len(df) + 1, df.shape[1]), dtype=object)
+    out[0, :] = list(df.columns)
+    if len(df):
+        out[1:, :] = df.to_numpy(dtype=object)
+    return out
+
+
+def _sheet_data_to_frame(data: List[List[Any]], max_rows: int) -> pd.DataFrame:
+    """
+    Same header/NA handling pandas.read_excel applies to raw sheet data
+    (first row = columns, "Unnamed: n" for blanks, duplicate mangling).
+    """
+    if not data:
+        return pd.DataFrame()
+    try:
+        parser = TextParser(
+            data,
+            header=0,
+            dtype=object,
+            nrows=max_rows,
+            skip_blank_lines=False,
+        )
+        return parser.read(nrows=max_rows)
+    except EmptyDataError:
+        return pd.DataFrame()
@@ -1,9 +1,12 @@
 # src/io/scanner.py
 from __future__ import annotations
 
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import List, Sequence
+from typing import Iterator, List, Sequence, Set, Tuple
 
 
 @dataclass(frozen=True)
@@ -23,36 +26,109 @@ def _norm_exts(exts: Sequence[str]) -> set[str]:
     return out
 
 
-def scan_files(input_root: str | Path, extensions: Sequence[str]) -> List[DiscoveredFile]:
+def scan_files(
+    input_root: str | Path,
+    extensions: Sequence[str],
+    *,
+    exclude: Sequence[str] = (),
+    workers: int = 1,
+) -> List[DiscoveredFile]:
     """
     Recursively scan input_root for files matching extensions.
-    Returns a stable, sorted list (by path).
+    Returns a stable, sorted list (by path). See iter_files for exclude / workers.
+    """
+    results = list(iter_files(input_root, extensions, exclude=exclude, workers=workers))
+    results.sort(key=lambda x: str(x.path).lower())
+    return results
+
+
+def iter_files(
+    input_root: str | Path,
+    extensions: Sequence[str],
+    *,
+    exclude: Sequence[str] = (),
+    workers: int = 1,
+) -> Iterator[DiscoveredFile]:
+    """
+    Stream matching files as directories are read (walk order, not sorted).
+
+    - os.scandir: file/dir type comes from the directory listing; only files whose
+      extension matches are stat-ed (one syscall per candidate, none for junk)
+    - exclude: glob patterns (fnmatch, case-sensitive) matched against the entry name
+      and its path relative to input_root (posix separators), e.g. ".git", "~$*",
+      "archive/*", "*/tmp". Excluded directories are not descended into.
+    - workers > 1: subdirectories are listed concurrently by a thread pool
+      (directory reads release the GIL; useful on network shares)
+
+    Like Path.rglob: symlinked directories are not followed, symlinked files are;
+    unreadable directories and files that vanish mid-scan are skipped.
     """
     root = Path(input_root).expanduser().resolve()
     if not root.exists() or not root.is_dir():
         raise FileNotFoundError(f"input_root not found or not a directory: {root}")
 
-    exts = _norm_exts(extensions)
-    results: List[DiscoveredFile] = []
+    # validated here, not on first next(): iter_files is not itself a generator
+    return _walk(_Walker(str(root), _norm_exts(extensions), tuple(exclude)), workers)
 
-    for p in root.rglob("*"):
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in exts:
-            continue
 
-        try:
-            st = p.stat()
-        except OSError:
-            continue
+def _walk(walker: _Walker, workers: int) -> Iterator[DiscoveredFile]:
+    if workers <= 1:
+        pending = [walker.root]
+        while pending:
+            files, subdirs = walker.list_dir(pending.pop())
+            yield from files
+            pending.extend(reversed(subdirs))  # depth-first, listing order
+        return
 
-        results.append(
-            DiscoveredFile(
-                path=p,
-                size_bytes=int(st.st_size),
-                modified_ts=float(st.st_mtime),
-            )
-        )
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as ex:
+        running: Set[Future] = {ex.submit(walker.list_dir, walker.root)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                files, subdirs = fut.result()
+                running.update(ex.submit(walker.list_dir, d) for d in subdirs)
+                yield from files
 
-    results.sort(key=lambda x: str(x.path).lower())
-    return results
+
+class _Walker:
+    def __init__(self, root: str, exts: set[str], exclude: Tuple[str, ...]):
+        self.root = root
+        self.exts = exts
+        self.exclude = exclude
+        self._prefix = len(root.rstrip(os.sep)) + 1
+
+    def _excluded(self, entry: os.DirEntry) -> bool:
+        if not self.exclude:
+            return False
+        rel = entry.path[self._prefix:].replace(os.sep, "/")
+        return any(fnmatchcase(entry.name, pat) or fnmatchcase(rel, pat) for pat in self.exclude)
+
+    def list_dir(self, path: str) -> Tuple[List[DiscoveredFile], List[str]]:
+        files: List[DiscoveredFile] = []
+        subdirs: List[str] = []
+        try:
+            it = os.scandir(path)
+        except OSError:
+            return files, subdirs  # unreadable directory
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self._excluded(entry):
+                            subdirs.append(entry.path)
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in self.exts:
+                        continue  # no stat for non-spreadsheet files
+                    if not entry.is_file() or self._excluded(entry):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append(
+                    DiscoveredFile(
+                        path=Path(entry.path),
+                        size_bytes=int(st.st_size),
+                        modified_ts=float(st.st_mtime),
+                    )
+                )
+        return files, subdirs
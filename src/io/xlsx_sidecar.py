@@ -0,0 +1,80 @@
+# src/io/xlsx_sidecar.py
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Collection, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+
+# Bump when the XLSX reader changes what a parsed workbook looks like (or the sidecar format).
+SIDECAR_VERSION = 2
+
+
+def sidecar_path(cache_dir: Path, content_hash: str, header_row_index: Optional[int]) -> Path:
+    return cache_dir / f"{content_hash}__h{header_row_index or 0}__v{SIDECAR_VERSION}.arrow"
+
+
+def read_with_sidecar(
+    cache_dir: Path,
+    content_hash: str,
+    header_row_index: Optional[int],
+    parse: Callable[[], pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Parsed workbook from its zstd-compressed Arrow IPC sidecar, or parse() it and
+    store the sidecar. Sidecars are keyed by file content + header row, so renamed /
+    re-copied workbooks hit the cache and changed ones never do.
+
+    Fresh parses are returned through the same Arrow round-trip, so a cached and an
+    uncached read give identical frames. Frames Arrow can't hold (mixed-type object
+    columns) are returned as parsed and not cached.
+    """
+    p = sidecar_path(cache_dir, content_hash, header_row_index)
+    if p.exists():
+        try:
+            with pa.memory_map(str(p), "r") as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            pass  # unreadable sidecar: parse again and overwrite it
+
+    df = parse()
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".arrow.tmp")
+    try:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        tmp.replace(p)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+    return table.to_pandas()
+
+
+def evict_sidecars(cache_dir: Path, keep_hashes: Collection[str]) -> int:
+    """
+    Delete sidecars whose content hash is not in `keep_hashes`, sidecars of older
+    SIDECAR_VERSIONs and leftover temp files. Returns the number of files removed.
+    """
+    if not cache_dir.is_dir():
+        return 0
+    removed = 0
+    for p in cache_dir.iterdir():
+        if not p.is_file():
+            continue
+        content_hash, _, rest = p.name.partition("__")
+        current = p.suffix == ".arrow" and rest.endswith(f"__v{SIDECAR_VERSION}.arrow")
+        if current and content_hash in keep_hashes:
+            continue
+        try:
+            p.unlink()
+            removed += 1
+        except OSError:
+            pass  # in use / already gone: try again next run
+    return removed
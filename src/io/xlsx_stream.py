@@ -0,0 +1,346 @@
+# src/io/xlsx_stream.py
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import fromstring, iterparse
+
+import numpy as np
+from openpyxl.cell.text import Text
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH, from_excel, from_ISO8601
+
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_ROW = f"{{{_MAIN_NS}}}row"
+_CELL = f"{{{_MAIN_NS}}}c"
+_VALUE = f"{{{_MAIN_NS}}}v"
+_INLINE = f"{{{_MAIN_NS}}}is"
+_SI = f"{{{_MAIN_NS}}}si"
+
+
+def read_xlsx_head(
+    path: str | Path,
+    n_rows: int,
+    sheet_index: int = 0,
+) -> Tuple[str, List[List[Any]]]:
+    """
+    Stream the first `n_rows` rows of a worksheet straight from the XLSX XML.
+
+    Parsing stops as soon as `n_rows` rows were produced, and shared strings are
+    only decoded up to the highest index those rows reference, so cost does not
+    grow with sheet size.
+
+    Rows/cells are converted exactly like pandas' openpyxl reader
+    (`get_sheet_data`): empty cells -> "", integral numbers -> int, errors -> NaN,
+    date-formatted numbers -> datetime, trailing empty cells/rows trimmed and
+    rows padded to a common width.
+    """
+    with zipfile.ZipFile(Path(path)) as zf:
+        sheet_name, sheet_path, strings_path, styles_path, epoch = _locate_parts(zf, sheet_index)
+        date_formats, timedelta_formats = _load_date_styles(zf, styles_path)
+
+        with _LazySharedStrings(zf, strings_path) as shared, zf.open(sheet_path) as src:
+            raw_rows = _iter_rows(
+                src,
+                shared_strings=shared,
+                date_formats=date_formats,
+                timedelta_formats=timedelta_formats,
+                epoch=epoch,
+            )
+            data: List[List[Any]] = []
+            last_row_with_data = -1
+            for row in raw_rows:
+                if len(data) >= n_rows:
+                    break
+                while row and row[-1] == "":
+                    row.pop()
+                if row:
+                    last_row_with_data = len(data)
+                data.append(row)
+
+    data = data[: last_row_with_data + 1]
+    if data:
+        width = max(len(r) for r in data)
+        data = [r + [""] * (width - len(r)) for r in data]
+    return sheet_name, data
+
+
+def _locate_parts(zf: zipfile.ZipFile, sheet_index: int) -> Tuple[str, str, Optional[str], Optional[str], Any]:
+    """
+    Resolve (sheet_name, worksheet part, sharedStrings part, styles part, epoch)
+    from xl/workbook.xml and its relationships.
+    """
+    wb_path = _office_document_path(zf)
+    wb = fromstring(zf.read(wb_path))
+
+    pr = wb.find(f"{{{_MAIN_NS}}}workbookPr")
+    date1904 = pr is not None and pr.get("date1904", "").lower() in ("1", "true")
+    epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+    sheets = wb.findall(f"{{{_MAIN_NS}}}sheets/{{{_MAIN_NS}}}sheet")
+    if not sheets:
+        raise ValueError("Workbook has no sheets")
+    sheet = sheets[sheet_index]
+
+    base = posixpath.dirname(wb_path)
+    rels_path = posixpath.join(base, "_rels", posixpath.basename(wb_path) + ".rels")
+    rels = fromstring(zf.read(rels_path))
+
+    targets: Dict[str, str] = {}
+    by_type: Dict[str, str] = {}
+    for rel in rels.findall(f"{{{_PKG_REL_NS}}}Relationship"):
+        target = _resolve(base, rel.get("Target", ""))
+        targets[rel.get("Id", "")] = target
+        by_type[rel.get("Type", "").rsplit("/", 1)[-1]] = target
+
+    sheet_path = targets[sheet.get(f"{{{_REL_NS}}}id", "")]
+    return (
+        str(sheet.get("name", "")),
+        sheet_path,
+        by_type.get("sharedStrings"),
+        by_type.get("styles"),
+        epoch,
+    )
+
+
+def _office_document_path(zf: zipfile.ZipFile) -> str:
+    root_rels = fromstring(zf.read("_rels/.rels"))
+    for rel in root_rels.findall(f"{{{_PKG_REL_NS}}}Relationship"):
+        if rel.get("Type", "").endswith("/officeDocument"):
+            return _resolve("", rel.get("Target", ""))
+    return "xl/workbook.xml"
+
+
+def _resolve(base: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base, target))
+
+
+def _load_date_styles(zf: zipfile.ZipFile, styles_path: Optional[str]) -> Tuple[set, set]:
+    """Indices of cell styles (cellXfs) that format numbers as dates / durations."""
+    if not styles_path or styles_path not in zf.namelist():
+        return set(), set()
+    ss = Stylesheet.from_tree(fromstring(zf.read(styles_path)))
+    return set(ss.date_formats), set(ss.timedelta_formats)
+
+
+class _LazySharedStrings:
+    """
+    Shared string table decoded on demand: index i only parses <si> entries up to i.
+    """
+
+    def __init__(self, zf: zipfile.ZipFile, strings_path: Optional[str]) -> None:
+        self._strings: List[str] = []
+        self._src: Optional[IO[bytes]] = None
+        self._it: Optional[Iterator[Tuple[str, Any]]] = None
+        if strings_path and strings_path in zf.namelist():
+            self._src = zf.open(strings_path)
+            self._it = iterparse(self._src, events=("end",))
+
+    def __getitem__(self, idx: int) -> str:
+        while idx >= len(self._strings) and self._it is not None:
+            try:
+                _, node = next(self._it)
+            except StopIteration:
+                self._it = None
+                break
+            if node.tag == _SI:
+                self._strings.append(Text.from_tree(node).content.replace("x005F_", ""))
+                node.clear()
+        return self._strings[idx]
+
+    def __enter__(self) -> "_LazySharedStrings":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._src is not None:
+            self._src.close()
+
+
+def _iter_rows(
+    src: IO[bytes],
+    *,
+    shared_strings: _LazySharedStrings,
+    date_formats: set,
+    timedelta_formats: set,
+    epoch: Any,
+) -> Iterator[List[Any]]:
+    """
+    Yield worksheet rows (0-based, gaps filled with empty rows) as lists of
+    converted cell values, with "" for empty cells.
+    """
+    next_row = 1
+    for _, elem in iterparse(src, events=("end",)):
+        if elem.tag != _ROW:
+            continue
+
+        r = elem.get("r")
+        row_num = int(r) if r else next_row
+        while next_row < row_num:
+            next_row += 1
+            yield []
+        next_row = row_num + 1
+
+        cells: List[Any] = []
+        col = 0
+        for c in elem.iter(_CELL):
+            coord = c.get("r")
+            col = coordinate_to_tuple(coord)[1] if coord else col + 1
+            if col > len(cells) + 1:
+                cells.extend([""] * (col - 1 - len(cells)))
+            value = _convert_cell(c, shared_strings, date_formats, timedelta_formats, epoch)
+            if col <= len(cells):
+                cells[col - 1] = value
+            else:
+                cells.append(value)
+
+        elem.clear()
+        yield cells
+
+
+def _convert_cell(
+    c: Any,
+    shared_strings: _LazySharedStrings,
+    date_formats: set,
+    timedelta_formats: set,
+    epoch: Any,
+) -> Any:
+    """Mirror openpyxl's WorkSheetParser.parse_cell + pandas' _convert_cell (data_only)."""
+    data_type = c.get("t", "n")
+    style_id = int(c.get("s", 0) or 0)
+
+    if data_type == "inlineStr":
+        child = c.find(_INLINE)
+        if child is None:
+            return ""
+        value = Text.from_tree(child).content
+        return "" if value is None else value
+
+    value = c.findtext(_VALUE) or None
+    if value is None:
+        return ""
+
+    if data_type == "n":
+        num = float(value) if ("." in value or "E" in value or "e" in value) else int(value)
+        if style_id in date_formats:
+            try:
+                return from_excel(num, epoch, timedelta=style_id in timedelta_formats)
+            except (OverflowError, ValueError):
+                return np.nan
+        as_int = int(num)
+        return as_int if as_int == num else float(num)
+    if data_type == "s":
+        return shared_strings[int(value)]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "e":
+        return np.nan
+    if data_type == "d":
+        return from_ISO8601(value)
+    return value  # "str" (formula result) and anything else: plain text
+
+
+_ROW_START = re.compile(rb"<(?:\w+:)?row\b([^>]*)>")
+_ROW_NUM = re.compile(rb'\br="(\d+)"')
+_HAS_VALUE = re.compile(rb"<(?:\w+:)?(?:v|t)(?:\s[^>]*)?>[^<]")
+_SCAN_CHUNK = 1 << 20
+
+
+class _NoRowNumber(Exception):
+    """A row without r="..." was hit: rows have to be counted front to back."""
+
+
+def count_xlsx_rows(path: str | Path, sheet_index: int = 0) -> int:
+    """
+    Number of sheet rows up to the last row holding a value (blank rows in
+    between included, like pandas). Scans the decompressed worksheet bytes for
+    <row> tags and <v>/<t> values; cells are never parsed and the (often wrong)
+    <dimension> metadata is not trusted.
+    """
+    with zipfile.ZipFile(Path(path)) as zf:
+        _, sheet_path, _, _, _ = _locate_parts(zf, sheet_index)
+        try:
+            with zf.open(sheet_path) as src:
+                return _count_rows_backward(src)
+        except _NoRowNumber:
+            with zf.open(sheet_path) as src:
+                return _count_rows_forward(src)
+
+
+def _count_rows_backward(src: IO[bytes]) -> int:
+    """
+    Fast path: rows carry r="n", so per chunk only the last row with a value
+    matters, found by searching backwards from the chunk end.
+    """
+    last_with_data = 0
+    tag: Optional[bytes] = None  # b"<row" or a prefixed variant like b"<x:row"
+    carry = b""
+    while True:
+        chunk = src.read(_SCAN_CHUNK)
+        buf = carry + chunk
+
+        if tag is None:
+            m = _ROW_START.search(buf)
+            if m is None:
+                if not chunk:
+                    return last_with_data
+                carry = buf[-64:]
+                continue
+            tag = buf[m.start() : m.start() + buf[m.start() :].index(b"row") + 3]
+
+        # the last row may continue in the next chunk: keep it for later
+        limit = len(buf) if not chunk else _rfind_row(buf, tag, len(buf))
+        end = limit
+        start = _rfind_row(buf, tag, end)
+        while start >= 0:
+            tag_end = buf.index(b">", start) + 1
+            if _HAS_VALUE.search(buf, tag_end, end):
+                rn = _ROW_NUM.search(buf, start, tag_end)
+                if rn is None:
+                    raise _NoRowNumber
+                last_with_data = int(rn.group(1))
+                break
+            end = start
+            start = _rfind_row(buf, tag, end)
+
+        if not chunk:
+            return last_with_data
+        carry = buf[limit:] if limit >= 0 else buf[-64:]
+
+
+def _rfind_row(buf: bytes, tag: bytes, end: int) -> int:
+    """Start of the last <row ...> tag before `end` (skips e.g. <rowBreaks>), -1 if none."""
+    pos = buf.rfind(tag, 0, end)
+    while pos >= 0 and buf[pos + len(tag) : pos + len(tag) + 1] not in (b" ", b">", b"/", b"\t", b"\n", b"\r"):
+        pos = buf.rfind(tag, 0, pos)
+    return pos
+
+
+def _count_rows_forward(src: IO[bytes]) -> int:
+    """Slow path for sheets with rows lacking r="n": number every row in order."""
+    last_with_data = 0
+    row_num = 0
+    carry = b""
+    while True:
+        chunk = src.read(_SCAN_CHUNK)
+        buf = carry + chunk
+        starts = list(_ROW_START.finditer(buf))
+        complete = starts if not chunk else starts[:-1]
+        for i, m in enumerate(complete):
+            rn = _ROW_NUM.search(m.group(1))
+            row_num = int(rn.group(1)) if rn else row_num + 1
+            end = starts[i + 1].start() if i + 1 < len(starts) else len(buf)
+            if _HAS_VALUE.search(buf, m.end(), end):
+                last_with_data = row_num
+        if not chunk:
+            return last_with_data
+        carry = buf[starts[-1].start():] if starts else buf[-64:]
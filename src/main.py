@@ -9,22 +9,36 @@ warnings.filterwarnings(
 )
 
 import argparse
-import hashlib
 import json
+import time
 from collections import Counter, defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
 from src.config_loader import load_config
-from src.classify.file_copier import copy_file, prepare_snapshot_folders
-from src.fingerprint.header_detector import detect_header_row
-from src.fingerprint.header_normalizer import load_header_aliases, normalize_headers
-from src.io.preview_reader import read_excel_preview, read_csv_preview
-from src.io.scanner import scan_files
+from src.classify.file_copier import (
+    apply_snapshot_sync,
+    copy_files,
+    plan_snapshot_sync,
+    prepare_snapshot_folders,
+)
+from src.fingerprint.detection_cache import (
+    cache_key,
+    config_fingerprint,
+    load_detection_cache,
+    save_detection_cache,
+)
+from src.fingerprint.file_detection import apply_header_template, detect_files, scored_header_rows
+from src.fingerprint.header_normalizer import load_header_aliases
+from src.fingerprint.header_templates import build_header_templates
+from src.io.scanner import DiscoveredFile, iter_files, scan_files
 from src.labeling.schema_labels import load_schema_labels
+from src.run_metrics import SUMMARY_HEADERS, RunMetrics, maybe_profile
+from src.staging_history import append_run
+from src.streaming import catalog_row, run_streaming
 
 def _ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
@@ -38,6 +52,10 @@ def _parse_args() -> argparse.Namespace:
     p.add_argument("--min-confidence", type=float, default=None, help="Override header_detection.min_header_confidence")
     p.add_argument("--overwrite", action="store_true", help="Allow overwriting destination files")
     p.add_argument("--dry-run", action="store_true", help="Do not copy files, only write parquet artifacts")
+    p.add_argument("--no-cache", action="store_true", help="Ignore the detection cache and re-read every file")
+    p.add_argument("--workers", type=int, default=None, help="Override header_detection.workers (process pool size)")
+    p.add_argument("--profile", action="store_true", help="cProfile the detection loop (staging/profile_classify_<run_ts>.prof)")
+    p.add_argument("--streaming", action="store_true", help="Bounded-memory run: catalog written in parquet parts as files are detected")
     return p.parse_args()
 
 def _build_overrides(args: argparse.Namespace) -> Dict[str, Any]:
@@ -62,6 +80,10 @@ def _build_overrides(args: argparse.Namespace) -> Dict[str, Any]:
         o.setdefault("header_detection", {})
         o["header_detection"]["min_header_confidence"] = args.min_confidence
 
+    if args.workers is not None:
+        o.setdefault("header_detection", {})
+        o["header_detection"]["workers"] = args.workers
+
     if args.overwrite:
         o.setdefault("copy", {})
         o["copy"]["overwrite"] = True
@@ -70,16 +92,36 @@ def _build_overrides(args: argparse.Namespace) -> Dict[str, Any]:
         o.setdefault("copy", {})
         o["copy"]["dry_run"] = True
 
-    return o
+    if args.no_cache:
+        o.setdefault("cache", {})
+        o["cache"]["enabled"] = False
+
+    if args.streaming:
+        o.setdefault("streaming", {})
+        o["streaming"]["enabled"] = True
 
-def count_excel_rows(path: Path) -> int:
-    # Lee solo la primera columna para contar filas
-    df = pd.read_excel(path, usecols=[0])
-    return max(len(df), 0)
+    return o
 
-def count_csv_rows(path: Path) -> int:
-    with open(path, "rb") as f:
-        return sum(1 for _ in f) - 1  # menos header
+def _mark_content_duplicates(rows: List[Dict[str, Any]]) -> int:
+    """
+    Set duplicate_of on every row whose content_hash was already seen on a newer file
+    (ties: path order). Returns how many rows were marked.
+    """
+    by_hash: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for r in rows:
+        if r.get("content_hash"):
+            by_hash[r["content_hash"]].append(r)
+
+    marked = 0
+    for group in by_hash.values():
+        if len(group) < 2:
+            continue
+        group.sort(key=lambda r: (-float(r["modified_ts"]), r["path"]))
+        keep = group[0]["path"]
+        for r in group[1:]:
+            r["duplicate_of"] = keep
+            marked += 1
+    return marked
 
 def main() -> None:
     args = _parse_args()
@@ -92,6 +134,16 @@ def main() -> None:
     extensions = cfg.get("extensions", [".xlsx", ".csv"])  # CSV added
     overwrite = bool(cfg["copy"]["overwrite"])
     dry_run = bool(cfg["copy"]["dry_run"])
+    copy_workers = max(1, int(cfg["copy"]["workers"]))
+    snapshot_mode = str(cfg["copy"]["snapshot_mode"])  # wipe | sync
+    copy_max_inflight_bytes = int(float(cfg["copy"]["max_inflight_mb"]) * 1024 * 1024)
+    use_cache = bool(cfg["cache"]["enabled"])
+    workers = max(1, int(cfg["header_detection"].get("workers", 1)))
+    use_templates = bool(cfg["header_detection"].get("use_templates", True))
+    count_rows = bool(cfg["row_count"]["enabled"])
+    dedup = bool(cfg["dedup"]["enabled"])
+    metrics_enabled = bool(cfg["metrics"]["enabled"])
+    keep_history = bool(cfg["history"]["enabled"])
 
     # NEW: how many recent files to copy per schema_hash
     KEEP_LAST_N = int(cfg.get("copy", {}).get("keep_last_n_per_schema", 6))
@@ -105,86 +157,156 @@ def main() -> None:
     _ensure_dir(quarantine_dir)
 
     # Aliases + schema labels
-    aliases = load_header_aliases("./config/header_aliases.yaml")
-    schema_labels = load_schema_labels("./config/schema_labels.yaml")  # {schema_hash: label}
+    aliases_path = Path("./config/header_aliases.yaml")
+    aliases = load_header_aliases(aliases_path)
+    schema_labels_path = Path("./config/schema_labels.yaml")
+    schema_labels = load_schema_labels(schema_labels_path)  # {schema_hash: label}
+
+    run_ts = datetime.now().isoformat(timespec="seconds")
+    metrics = RunMetrics(run_ts=run_ts, pipeline="classify", slowest_n=int(cfg["metrics"]["slowest_n"]))
+
+    catalog_path = staging_dir / "file_catalog.parquet"
+
+    # Detection cache: unchanged files (same path/size/mtime + same settings) skip preview/detection
+    cache_path = staging_dir / "detection_cache.parquet"
+    fingerprint = config_fingerprint(cfg, aliases_path=aliases_path)
+
+    profile_path = staging_dir / f"profile_classify_{run_ts.replace(':', '')}.prof"
+    if args.profile and workers > 1:
+        print("Note: --profile only sees the parent process; use --workers 1 to profile detection itself.")
+
+    if cfg["streaming"]["enabled"]:
+        res = run_streaming(
+            iter_files(
+                input_root,
+                extensions,
+                exclude=list(cfg["scan"]["exclude"] or []),
+                workers=max(1, int(cfg["scan"]["workers"])),
+            ),
+            run_ts=run_ts,
+            staging_dir=staging_dir,
+            classified_dir=classified_dir,
+            quarantine_dir=quarantine_dir,
+            schema_labels=schema_labels,
+            fingerprint=fingerprint,
+            use_cache=use_cache,
+            detect_kwargs=dict(
+                header_search_rows=header_search_rows,
+                min_header_confidence=min_header_confidence,
+                aliases=aliases,
+                count_rows=count_rows,
+                hash_content=dedup,
+            ),
+            use_templates=use_templates,
+            workers=workers,
+            dedup=dedup,
+            count_rows=count_rows,
+            keep_last_n=KEEP_LAST_N,
+            copy_kwargs=dict(workers=copy_workers, max_inflight_bytes=copy_max_inflight_bytes),
+            snapshot_mode=snapshot_mode,
+            overwrite=overwrite,
+            dry_run=dry_run,
+            batch_rows=int(cfg["streaming"]["batch_rows"]),
+            metrics=metrics,
+            profile_path=profile_path if args.profile else None,
+        )
+        if keep_history:
+            append_run(staging_dir, run_ts)
+        _print_template_overrides(res.template_overrides)
+        _print_unknown_schemas(res.unknown_hashes)
+        _print_run_summary(
+            total_files=res.total_files,
+            schema_count=res.schema_count,
+            status_counts=res.status_counts,
+            cache_hits=res.cache_hits,
+            duplicate_count=res.duplicate_count if dedup else None,
+            copy_counts=res.copy_counts,
+            copy_bytes=res.copy_bytes,
+            copy_seconds=0.0 if dry_run else res.copy_seconds,
+            written=[res.catalog_path, res.registry_path, res.manifest_path],
+            metrics=metrics if metrics_enabled else None,
+            staging_dir=staging_dir,
+        )
+        _print_schema_summary(res.registry_path, pd.read_parquet(res.catalog_path, columns=["schema_id", "label"]))
+        return
 
     # Scan
-    files = scan_files(input_root, extensions)
+    metrics.begin("scan")
+    files = scan_files(
+        input_root,
+        extensions,
+        exclude=list(cfg["scan"]["exclude"] or []),
+        workers=max(1, int(cfg["scan"]["workers"])),
+    )
+    metrics.end("scan", files=len(files), nbytes=sum(f.size_bytes for f in files))
 
     status_counts = Counter()
     schema_to_files = defaultdict(list)  # schema_key -> list[path]
     schema_to_headers = {}               # schema_key -> canonical headers
     schema_to_hash = {}                  # schema_key -> schema_hash
+    schema_to_rows = defaultdict(int)    # schema_key -> summed data_row_count
+    template_overrides = []              # paths whose header row came from a template
     catalog_rows = []
-    run_ts = datetime.now().isoformat(timespec="seconds")
-
-    # --- Build catalog rows + schema grouping ---
-    for f in files:
-        if f.path.suffix.lower() == ".csv":
-            prev = read_csv_preview(f.path, header_search_rows)
-        else:
-            prev = read_excel_preview(f.path, header_search_rows)
-
-        row = {
-            "run_ts": run_ts,
-            "path": str(f.path),
-            "size_bytes": f.size_bytes,
-            "modified_ts": f.modified_ts,
-            "sheet_name": prev.sheet_name,
-            "status": None,
-            "error_message": prev.error_message,
-            "header_row_index": None,
-            "header_confidence": None,
-            "raw_headers_json": None,
-            "normalized_headers_json": None,
-            "schema_key": None,
-            "schema_hash": None,
-            "schema_id": None,
-            "label": None,
-        }
-
-        if prev.status != "ok":
-            row["status"] = "unreadable"
-            status_counts["unreadable"] += 1
-            catalog_rows.append(row)
-            continue
 
-        det = detect_header_row(prev.rows, min_header_confidence)
-        row["header_row_index"] = det.header_row_index
-        row["header_confidence"] = float(det.confidence)
+    metrics.begin("detect")
+    cache = load_detection_cache(cache_path, fingerprint) if use_cache else {}
+
+    keys = [cache_key(f.path, f.size_bytes, f.modified_ts) for f in files]
+    misses = [i for i, k in enumerate(keys) if k not in cache]
+    cache_hits = len(files) - len(misses)
+
+    # Per-file work (preview + detect + normalize + hash) for new/modified files only
+    detect_timings: List[Dict[str, float]] = []
+    with maybe_profile(args.profile, profile_path):
+        fresh = detect_files(
+            [files[i].path for i in misses],
+            header_search_rows=header_search_rows,
+            min_header_confidence=min_header_confidence,
+            aliases=aliases,
+            count_rows=count_rows,
+            hash_content=dedup,
+            workers=workers,
+            timings=detect_timings,
+        )
+    detections = dict(zip(misses, fresh))
+    for i, t in zip(misses, detect_timings):
+        total = t.pop("total")
+        metrics.record_file("detect", files[i].path, total, files[i].size_bytes, phases=t)
+    dets = [detections[i] if i in detections else cache[k] for i, k in enumerate(keys)]
+    cache_entries = list(zip(keys, dets))  # cached as scored, before templates
+    if use_templates:
+        dets = _apply_header_templates(files, dets, schema_labels, aliases=aliases, count_rows=count_rows)
+    metrics.end("detect", files=len(misses), nbytes=sum(files[i].size_bytes for i in misses))
+    metrics.begin("catalog")
+
+    # --- Build catalog rows + schema grouping (scan_files order) ---
+    for f, det in zip(files, dets):
+        row = catalog_row(run_ts, f, det)
+        status_counts[row["status"]] += 1
+        catalog_rows.append(row)
+        if row["header_detection_mode"] == "template":
+            template_overrides.append(row["path"])
 
-        if det.header_row_index is None:
-            row["status"] = "low_confidence"
-            status_counts["low_confidence"] += 1
-            catalog_rows.append(row)
+        if row["status"] != "ok":
             continue
 
-        # Normalize + aliases
-        norm = normalize_headers(det.raw_headers, aliases=aliases)
-        raw_headers = list(det.raw_headers)
-        normalized_headers = list(norm.normalized_headers)
-
-        row["raw_headers_json"] = json.dumps(raw_headers, ensure_ascii=False)
-        row["normalized_headers_json"] = json.dumps(normalized_headers, ensure_ascii=False)
-
-        # Schema = exact set of normalized headers (order ignored)
-        canonical = tuple(sorted(set(normalized_headers)))
-        schema_key = "|".join(canonical)  # stable string key for audit
-        schema_hash = hashlib.sha1(schema_key.encode("utf-8")).hexdigest()[:12]
-
-        row["schema_key"] = schema_key
-        row["schema_hash"] = schema_hash
+        schema_key = row["schema_key"]
+        schema_hash = row["schema_hash"]
 
         # label by hash (stable identity)
         row["label"] = schema_labels.get(schema_hash, "unknown_schema")
 
         schema_to_files[schema_key].append(str(f.path))
-        schema_to_headers[schema_key] = list(canonical)
+        schema_to_headers[schema_key] = schema_key.split("|") if schema_key else []
         schema_to_hash[schema_key] = schema_hash
+        if row["data_row_count"] is not None:
+            schema_to_rows[schema_key] += int(row["data_row_count"])
 
-        row["status"] = "ok"
-        status_counts["ok"] += 1
-        catalog_rows.append(row)
+    if use_cache:
+        save_detection_cache(cache_path, fingerprint, cache_entries)
+
+    # --- Identical files (same bytes under different names): newest one is canonical ---
+    duplicate_count = _mark_content_duplicates(catalog_rows) if dedup else 0
 
     # --- Assign schema_ids deterministically (by schema_key) ---
     schema_keys_sorted = sorted(schema_to_files.keys())
@@ -211,31 +333,35 @@ def main() -> None:
                 "schema_hash": schema_to_hash[k],
                 "canonical_headers_json": json.dumps(schema_to_headers[k], ensure_ascii=False),
                 "file_count": len(files_list),
+                "data_row_count": schema_to_rows[k] if count_rows else None,
                 "example_files_json": json.dumps(files_list[:5], ensure_ascii=False),
             }
         )
 
+    metrics.end("catalog", files=len(catalog_rows))
+
     # --- Write staging parquet outputs ---
+    metrics.begin("write_staging")
     catalog_df = pd.DataFrame(catalog_rows)
     registry_df = pd.DataFrame(registry_rows)
 
-    catalog_path = staging_dir / "file_catalog.parquet"
     registry_path = staging_dir / "schema_registry.parquet"
 
     catalog_df.to_parquet(catalog_path, index=False)
     registry_df.to_parquet(registry_path, index=False)
+    metrics.end(
+        "write_staging",
+        files=2,
+        nbytes=catalog_path.stat().st_size + registry_path.stat().st_size,
+    )
 
-    # --- Unknown schemas report (after catalog is built) ---
-    unknown_ok = [r for r in catalog_rows if r.get("status") == "ok" and r.get("label") == "unknown_schema"]
-    if unknown_ok:
-        seen = set()
-        print("\nUNKNOWN schemas detected (add these to config/schema_labels.yaml):")
-        for r in unknown_ok:
-            h = r["schema_hash"]
-            if h in seen:
-                continue
-            seen.add(h)
-            print(f"- {h}")
+    # --- Unknown schemas / template overrides report (after catalog is built) ---
+    _print_template_overrides(template_overrides)
+    _print_unknown_schemas(
+        list(dict.fromkeys(
+            r["schema_hash"] for r in catalog_rows if r.get("status") == "ok" and r.get("label") == "unknown_schema"
+        ))
+    )
 
     # ============================================================
     # NEW: Filter to classify only the most recent N files per schema_hash
@@ -246,11 +372,18 @@ def main() -> None:
     if "modified_ts" in catalog_df.columns:
         catalog_df["modified_ts"] = pd.to_datetime(catalog_df["modified_ts"], errors="coerce")
 
-    ok_df = catalog_df[catalog_df["status"].eq("ok")].copy()
-    non_ok_df = catalog_df[~catalog_df["status"].eq("ok")].copy()
-
-    # Sort newest first within each schema_hash, then keep head(N)
-    ok_df = ok_df.sort_values(["schema_hash", "modified_ts"], ascending=[True, False])
+    # duplicates collapse first, so they don't take slots from distinct files
+    is_dup = catalog_df["duplicate_of"].notna()
+    dup_rows = catalog_df[is_dup].to_dict(orient="records")
+    ok_df = catalog_df[catalog_df["status"].eq("ok") & ~is_dup].copy()
+    non_ok_df = catalog_df[~catalog_df["status"].eq("ok") & ~is_dup].copy()
+
+    # Sort newest first within each schema_hash (mtime ties: lowercase path, as in
+    # streaming mode), then keep head(N)
+    ok_df["_path_key"] = ok_df["path"].astype(str).str.lower()
+    ok_df = ok_df.sort_values(
+        ["schema_hash", "modified_ts", "_path_key"], ascending=[True, False, True], kind="stable"
+    ).drop(columns="_path_key")
     ok_keep_df = (
         ok_df.groupby("schema_hash", group_keys=False)
              .head(KEEP_LAST_N)
@@ -265,21 +398,24 @@ def main() -> None:
     # ============================================================
 
     # --- Classification (copy files) + manifest ---
+    metrics.begin("copy")
     manifest_rows = []
     copy_counts = Counter()
+    copy_bytes = 0
+    copy_seconds = 0.0
 
     if not dry_run:
-        # SNAPSHOT MODE: wipe gold folders for labels that appear in THIS run (latest snapshot)
         labels_in_run = sorted(
             {r["label"] for r in catalog_rows_to_copy if r.get("status") == "ok" and r.get("label")}
         )
-        prepare_snapshot_folders(classified_dir, labels_in_run)
 
+        copy_t0 = time.perf_counter()
+
+        jobs = []
         for r in catalog_rows_to_copy:
             src_path = Path(r["path"])
-            src_status = r["status"]
 
-            if src_status == "ok":
+            if r["status"] == "ok":
                 label = r["label"] or "unknown_schema"
                 schema_hash = r["schema_hash"] or "nohash"
                 dest_dir = classified_dir / label  # FLAT: no schema subfolder
@@ -288,23 +424,92 @@ def main() -> None:
             else:
                 dest_path = quarantine_dir / src_path.name
 
-            res = copy_file(src_path, dest_path, overwrite=overwrite)
+            jobs.append((src_path, dest_path))
+
+        gold_idx = [i for i, r in enumerate(catalog_rows_to_copy) if r["status"] == "ok"]
+        quarantine_idx = [i for i, r in enumerate(catalog_rows_to_copy) if r["status"] != "ok"]
+        results = [None] * len(jobs)
+        sync_actions = [None] * len(jobs)
+        removed = []
+
+        if snapshot_mode == "sync":
+            # SNAPSHOT MODE (sync): only copy new/changed gold files, delete stale ones
+            gold_jobs = [jobs[i] for i in gold_idx]
+            plan = plan_snapshot_sync(classified_dir, gold_jobs, labels_in_run, overwrite=overwrite)
+            gold_results, removed = apply_snapshot_sync(
+                gold_jobs,
+                plan,
+                workers=copy_workers,
+                max_inflight_bytes=copy_max_inflight_bytes,
+            )
+            for i, res, action in zip(gold_idx, gold_results, plan.actions):
+                results[i] = res
+                sync_actions[i] = action
+            copy_idx = quarantine_idx
+        else:
+            # SNAPSHOT MODE (wipe): wipe gold folders for labels that appear in THIS run (latest snapshot)
+            prepare_snapshot_folders(classified_dir, labels_in_run)
+            copy_idx = gold_idx + quarantine_idx
+
+        copied = copy_files(
+            [jobs[i] for i in copy_idx],
+            overwrite=overwrite,
+            workers=copy_workers,
+            max_inflight_bytes=copy_max_inflight_bytes,
+        )
+        for i, res in zip(copy_idx, copied):
+            results[i] = res
 
+        for r, res, action in zip(catalog_rows_to_copy, results, sync_actions):
             manifest_rows.append(
                 {
                     "run_ts": run_ts,
-                    "src_path": str(src_path),
+                    "src_path": str(res.src),
                     "dst_path": str(res.dst),
-                    "src_status": src_status,
+                    "src_status": r["status"],
                     "copy_status": res.status,
                     "error_message": res.error_message,
                     "schema_id": r.get("schema_id"),
                     "schema_key": r.get("schema_key"),
                     "schema_hash": r.get("schema_hash"),
                     "label": r.get("label"),
+                    "copy_bytes": res.bytes_copied,
+                    "copy_seconds": res.elapsed_s,
+                    "copy_bytes_per_s": (
+                        res.bytes_copied / res.elapsed_s if res.status == "copied" and res.elapsed_s > 0 else None
+                    ),
+                    "sync_action": action,
+                }
+            )
+            copy_counts[res.status] += 1
+
+        # stale gold files removed by sync (no source row)
+        for res in removed:
+            manifest_rows.append(
+                {
+                    "run_ts": run_ts,
+                    "src_path": None,
+                    "dst_path": str(res.dst),
+                    "src_status": None,
+                    "copy_status": res.status,
+                    "error_message": res.error_message,
+                    "schema_id": None,
+                    "schema_key": None,
+                    "schema_hash": None,
+                    "label": res.dst.parent.name,
+                    "copy_bytes": 0,
+                    "copy_seconds": None,
+                    "copy_bytes_per_s": None,
+                    "sync_action": "removed",
                 }
             )
             copy_counts[res.status] += 1
+
+        copy_seconds = time.perf_counter() - copy_t0
+        copy_bytes = sum(res.bytes_copied for res in results)
+        for res in results:
+            if res.status == "copied":
+                metrics.record_file("copy", res.src, res.elapsed_s, res.bytes_copied)
     else:
         for r in catalog_rows_to_copy:
             manifest_rows.append(
@@ -319,24 +524,131 @@ def main() -> None:
                     "schema_key": r.get("schema_key"),
                     "schema_hash": r.get("schema_hash"),
                     "label": r.get("label"),
+                    "copy_bytes": 0,
+                    "copy_seconds": None,
+                    "copy_bytes_per_s": None,
+                    "sync_action": None,
                 }
             )
         copy_counts["skipped_dry_run"] = len(catalog_rows_to_copy)
 
+    for r in dup_rows:
+        manifest_rows.append(
+            {
+                "run_ts": run_ts,
+                "src_path": r["path"],
+                "dst_path": None,
+                "src_status": r["status"],
+                "copy_status": "skipped_duplicate",
+                "error_message": f"same content as {r['duplicate_of']}",
+                "schema_id": r.get("schema_id"),
+                "schema_key": r.get("schema_key"),
+                "schema_hash": r.get("schema_hash"),
+                "label": r.get("label"),
+                "copy_bytes": 0,
+                "copy_seconds": None,
+                "copy_bytes_per_s": None,
+                "sync_action": None,
+            }
+        )
+    if dup_rows:
+        copy_counts["skipped_duplicate"] = len(dup_rows)
+
     manifest_df = pd.DataFrame(manifest_rows)
     manifest_path = staging_dir / "classification_manifest.parquet"
     manifest_df.to_parquet(manifest_path, index=False)
+    metrics.end("copy", files=sum(1 for m in manifest_rows if m["copy_status"] == "copied"), nbytes=copy_bytes)
+
+    # --- This run's snapshots -> staging/history/<artifact>/run_date=<date>/ ---
+    if keep_history:
+        append_run(staging_dir, run_ts)
+
+    _print_run_summary(
+        total_files=len(files),
+        schema_count=len(schema_id_map),
+        status_counts=status_counts,
+        cache_hits=cache_hits,
+        duplicate_count=duplicate_count if dedup else None,
+        copy_counts=copy_counts,
+        copy_bytes=copy_bytes,
+        copy_seconds=copy_seconds,
+        written=[catalog_path, registry_path, manifest_path],
+        metrics=metrics if metrics_enabled else None,
+        staging_dir=staging_dir,
+    )
+    _print_schema_summary(registry_path, catalog_df[["schema_id", "label"]])
+
+
+def _apply_header_templates(
+    files: List[DiscoveredFile],
+    dets: List[Dict[str, Any]],
+    schema_labels: Dict[str, str],
+    *,
+    aliases: Dict[str, str],
+    count_rows: bool,
+) -> List[Dict[str, Any]]:
+    """Header templates learned from this run's scored detections, applied to files with candidate rows."""
+    templates = build_header_templates(scored_header_rows(dets), schema_labels)
+    if templates is None:
+        return dets
+    out = []
+    for f, det in zip(files, dets):
+        hit = apply_header_template(f.path, det, templates, aliases=aliases, count_rows=count_rows)
+        out.append(det if hit is None else hit)
+    return out
+
+
+def _print_template_overrides(paths: List[str]) -> None:
+    if paths:
+        print("\nHeader rows taken from templates instead of scored detection (header_detection_mode=template):")
+        for p in paths:
+            print(f"- {p}")
+
+
+def _print_unknown_schemas(hashes: List[str]) -> None:
+    if hashes:
+        print("\nUNKNOWN schemas detected (add these to config/schema_labels.yaml):")
+        for h in hashes:
+            print(f"- {h}")
 
-    # --- Console summary ---
-    print(f"Total files: {len(files)}")
-    print(f"Total schemas (distinct normalized header sets): {len(schema_id_map)}")
+
+def _print_run_summary(
+    *,
+    total_files: int,
+    schema_count: int,
+    status_counts: Counter,
+    cache_hits: int,
+    duplicate_count: Optional[int],
+    copy_counts: Counter,
+    copy_bytes: int,
+    copy_seconds: float,
+    written: List[Path],
+    metrics: Optional[RunMetrics],
+    staging_dir: Path,
+) -> None:
+    print(f"Total files: {total_files}")
+    print(f"Total schemas (distinct normalized header sets): {schema_count}")
     print(f"Status counts: {dict(status_counts)}")
+    print(f"Detection cache hits: {cache_hits}/{total_files}")
+    if duplicate_count is not None:
+        print(f"Duplicate files (same content): {duplicate_count}")
     print(f"Copy results: {dict(copy_counts)}")
-    print(f"Wrote: {catalog_path}")
-    print(f"Wrote: {registry_path}")
-    print(f"Wrote: {manifest_path}")
-
-    # --- Schema summary (from registry parquet) ---
+    if copy_seconds > 0:
+        print(f"Copy throughput: {copy_bytes / 1e6:,.1f} MB in {copy_seconds:,.1f}s ({copy_bytes / 1e6 / copy_seconds:,.1f} MB/s)")
+    for p in written:
+        print(f"Wrote: {p}")
+
+    if metrics is not None:
+        print("\nRun metrics:")
+        print(tabulate(metrics.summary_rows(), headers=SUMMARY_HEADERS, tablefmt="psql"))
+        slow = [f for f in metrics.slowest_files() if f.stage == "detect"][:5]
+        if slow:
+            print("Slowest detections: " + ", ".join(f"{Path(f.name).name} ({f.wall_s:,.2f}s)" for f in slow))
+        print(f"Wrote: {metrics.write(staging_dir)}")
+
+
+def _print_schema_summary(registry_path: Path, cat_labels: pd.DataFrame) -> None:
+    """Schema summary (from registry parquet); labels come from the catalog's (schema_id, label)."""
     reg = pd.read_parquet(registry_path).copy()
 
     # headers count
@@ -344,24 +656,8 @@ def main() -> None:
         lambda s: len(json.loads(s)) if isinstance(s, str) else 0
     )
 
-    # rows_count (CHEAP): number of files per schema (not data rows)
-    rows_per_schema = (
-        catalog_df.groupby("schema_id")
-        .size()
-        .rename("rows_count")
-        .reset_index()
-    )
-    reg = reg.merge(rows_per_schema, on="schema_id", how="left")
-
     # attach label from catalog
-    cat_labels = (
-        catalog_df[["schema_id", "label"]]
-        .dropna()
-        .drop_duplicates()
-    )
-    reg = reg.merge(cat_labels, on="schema_id", how="left")
-
-    from tabulate import tabulate
+    reg = reg.merge(cat_labels.dropna().drop_duplicates(), on="schema_id", how="left")
 
     reg_show = reg.sort_values(
         ["file_count", "headers_count", "label"],
@@ -369,12 +665,12 @@ def main() -> None:
     )
 
     view = (
-        reg_show[["label", "file_count", "headers_count", "rows_count"]]
+        reg_show[["label", "file_count", "headers_count", "data_row_count"]]
         .rename(columns={
             "label": "schema",
             "file_count": "files",
             "headers_count": "headers",
-            "rows_count": "rows",
+            "data_row_count": "rows",
         })
         .reset_index(drop=True)
     )
@@ -1,22 +1,27 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Tuple
+
 import pandas as pd
-import re
-import unicodedata
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from src.fingerprint.header_normalizer import to_snake
+from src.io.content_hash import MTIME_TOLERANCE_S, content_hash
+from src.io.csv_dialect import CsvDialect, parse_rows, record_span
+from src.io.xlsx_sidecar import read_with_sidecar
+
 
+CSV_BLOCK_SIZE = 16 * 1024 * 1024  # Arrow parses blocks in parallel
 
-def to_snake(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.lower()
-    s = re.sub(r"[^\w]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s
+# pd.read_csv's default NA strings, so the Arrow reader and the pandas fallback agree
+CSV_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
 
 
 @dataclass
@@ -26,30 +31,72 @@ class ReadResult:
     matched_catalog: bool
 
 
-def _match_header_row_index(
-    catalog_df: pd.DataFrame,
-    *,
-    schema_hash: str,
-    original_filename: str,
-) -> int | None:
+@dataclass(frozen=True)
+class CatalogEntry:
+    header_row_index: int | None
+    raw_headers: tuple[str, ...]        # detected header cells (canonical columns of the file)
+    csv_dialect: CsvDialect | None      # CSV only, as sniffed during preview
+    content_hash: str | None = None     # of the source file (dedup), when hashed during detection
+    size_bytes: int | None = None       # source identity: a classified copy with the same
+    modified_ts: float | None = None    # size + mtime (copy2) has the same content_hash
+
+
+# (schema_hash, original filename) -> newest catalog row for that file
+CatalogIndex = Dict[Tuple[str, str], CatalogEntry]
+
+
+def build_catalog_index(catalog_df: pd.DataFrame) -> CatalogIndex:
     """
-    We match classified file back to catalog using:
+    Build once per run: classified files are matched back to the catalog using
     - schema_hash
     - original filename (the part after '<hash>__')
-    If multiple matches exist, take the newest by modified_ts.
+    If multiple catalog rows match, the newest by modified_ts wins.
     """
-    c = catalog_df.copy()
-    if "modified_ts" in c.columns:
-        c["modified_ts"] = pd.to_datetime(c["modified_ts"], errors="coerce")
+    cols = ["path", "schema_hash", "modified_ts", "header_row_index", "raw_headers_json",
+            "csv_encoding", "csv_delimiter", "csv_quotechar", "content_hash", "size_bytes"]
+    c = catalog_df.reindex(columns=cols).dropna(subset=["schema_hash"])
+    c = c.assign(
+        _mtime=c["modified_ts"],
+        modified_ts=pd.to_datetime(c["modified_ts"], errors="coerce"),
+        _orig_name=[Path(str(p)).name for p in c["path"]],
+    )
+    c = c.sort_values("modified_ts", ascending=False, kind="stable")
+    c = c.drop_duplicates(["schema_hash", "_orig_name"], keep="first")
+
+    index: CatalogIndex = {}
+    for r in c.to_dict(orient="records"):
+        index[(str(r["schema_hash"]), r["_orig_name"])] = CatalogEntry(
+            header_row_index=_int_or_none(r["header_row_index"]),
+            raw_headers=tuple(json.loads(r["raw_headers_json"])) if isinstance(r["raw_headers_json"], str) else (),
+            csv_dialect=(
+                CsvDialect(encoding=r["csv_encoding"], delimiter=r["csv_delimiter"], quotechar=r["csv_quotechar"])
+                if all(isinstance(r[k], str) for k in ("csv_encoding", "csv_delimiter", "csv_quotechar"))
+                else None
+            ),
+            content_hash=r["content_hash"] if isinstance(r["content_hash"], str) else None,
+            size_bytes=_int_or_none(r["size_bytes"]),
+            modified_ts=float(r["_mtime"]) if pd.notna(r["_mtime"]) else None,
+        )
+    return index
 
-    c["_orig_name"] = c["path"].apply(lambda p: Path(str(p)).name)
 
-    hits = c[(c["schema_hash"] == schema_hash) & (c["_orig_name"] == original_filename)]
-    if hits.empty:
+def catalog_digest(p: Path, entry: CatalogEntry | None) -> str | None:
+    """
+    content_hash recorded in the catalog for the source of classified file `p`,
+    if `p` is still that exact copy (same size and mtime). None => hash the file.
+    """
+    if entry is None or entry.content_hash is None or entry.size_bytes is None or entry.modified_ts is None:
+        return None
+    try:
+        st = p.stat()
+    except OSError:
         return None
+    if st.st_size != entry.size_bytes or abs(st.st_mtime - entry.modified_ts) > MTIME_TOLERANCE_S:
+        return None
+    return entry.content_hash
+
 
-    hits = hits.sort_values("modified_ts", ascending=False)
-    val = hits.iloc[0].get("header_row_index")
+def _int_or_none(val) -> int | None:
     try:
         return int(val) if pd.notna(val) else None
     except Exception:
@@ -60,37 +107,113 @@ def read_wellsky_xlsx_full(
     xlsx_path: Path,
     *,
     header_row_index: int | None,
+    sidecar_dir: Path | None = None,
+    digest: str | None = None,
 ) -> ReadResult:
     """
     Read XLSX using pandas. If we have header_row_index, use it as header row.
+    With `sidecar_dir`, the parsed sheet is cached as an Arrow sidecar keyed by
+    the file's content hash (`digest`, hashed here when not given).
     """
     matched = header_row_index is not None
-    if header_row_index is None:
-        # Fallback: read with first row as header. We'll still normalize columns later.
-        df = pd.read_excel(xlsx_path)
-        return ReadResult(df=df, used_header_row_index=None, matched_catalog=False)
 
-    df = pd.read_excel(xlsx_path, header=header_row_index)
+    def parse() -> pd.DataFrame:
+        if header_row_index is None:
+            # Fallback: read with first row as header. We'll still normalize columns later.
+            return pd.read_excel(xlsx_path)
+        return pd.read_excel(xlsx_path, header=header_row_index)
+
+    if sidecar_dir is None:
+        df = parse()
+    else:
+        df = read_with_sidecar(sidecar_dir, digest or content_hash(xlsx_path), header_row_index, parse)
     return ReadResult(df=df, used_header_row_index=header_row_index, matched_catalog=matched)
 
 
-def consolidate_schema_from_classified(
+def read_csv_full(
+    csv_path: Path,
     *,
-    classified_dir: Path,
-    catalog_df: pd.DataFrame,
-    label: str,
-    schema_hash: str,
+    header_row_index: int,
+    dialect: CsvDialect,
+    columns: tuple[str, ...] = (),
 ) -> pd.DataFrame:
     """
-    Consolidate all files for (label, schema_hash) from:
-      data/classified/<label>/<schema_hash>__*.xlsx
-      data/classified/<label>/<schema_hash>__*.csv
+    Read a CSV from its detected header row with the sniffed dialect, through the
+    multithreaded Arrow CSV reader. `columns` (the detected header cells) projects
+    the read to the schema's columns; blank/extra columns are never parsed.
+    Falls back to pandas for UTF-16 files or rows Arrow rejects (e.g. ragged lines).
+    """
+    names = None
+    if not dialect.encoding.startswith("utf-16"):
+        start, data_start = record_span(csv_path, dialect, header_row_index)
+        with csv_path.open("rb") as f:
+            f.seek(start)
+            header_text = f.read(data_start - start).decode(dialect.encoding, errors="replace").lstrip("\ufeff")
+        header = parse_rows(header_text, dialect, 1)[0]
+        names = _dedupe_names([h.strip() or f"Unnamed: {i}" for i, h in enumerate(header)])
 
-    Adds metadata cols:
-      - label
-      - schema_hash
-      - source_file
-    Normalizes columns to snake_case.
+        wanted = set(_dedupe_names(list(columns)))
+        include = [n for n in names if n in wanted] if wanted else []
+        try:
+            with csv_path.open("rb") as f:
+                f.seek(data_start)
+                table = pacsv.read_csv(
+                    f,
+                    read_options=pacsv.ReadOptions(
+                        column_names=names,
+                        encoding=dialect.encoding,
+                        block_size=CSV_BLOCK_SIZE,
+                        use_threads=True,
+                    ),
+                    parse_options=pacsv.ParseOptions(
+                        delimiter=dialect.delimiter,
+                        quote_char=dialect.quotechar,
+                        newlines_in_values=True,
+                    ),
+                    convert_options=pacsv.ConvertOptions(
+                        include_columns=include or None,
+                        null_values=CSV_NA_VALUES,
+                        strings_can_be_null=True,  # empty/NA text cells -> NaN, like pandas
+                    ),
+                )
+            return table.to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+
+    # pandas: same header row + dialect, all columns
+    df = pd.read_csv(
+        csv_path,
+        sep=dialect.delimiter,
+        quotechar=dialect.quotechar,
+        encoding=dialect.encoding,
+        header=header_row_index,
+        skip_blank_lines=True,
+        dtype=object,
+    )
+    if names is not None and len(names) == len(df.columns):
+        df.columns = names
+    if columns:
+        wanted = set(_dedupe_names(list(columns)))
+        keep = [c for c in df.columns if str(c).strip() in wanted]
+        df = df[keep] if keep else df
+    return df
+
+
+def _dedupe_names(names: list[str]) -> list[str]:
+    # pandas-style mangling (x, x.1, x.2) so Arrow column projection is unambiguous
+    seen: Dict[str, int] = {}
+    out = []
+    for n in names:
+        k = seen.get(n, 0)
+        seen[n] = k + 1
+        out.append(n if k == 0 else f"{n}.{k}")
+    return out
+
+
+def list_classified_files(classified_dir: Path, label: str, schema_hash: str) -> list[Path]:
+    """
+    data/classified/<label>/<schema_hash>__*.xlsx|csv, sorted.
+    Raises FileNotFoundError when there are none.
     """
     label_dir = classified_dir / label
     patterns = [f"{schema_hash}__*.xlsx", f"{schema_hash}__*.csv"]
@@ -104,38 +227,107 @@ def consolidate_schema_from_classified(
         raise FileNotFoundError(
             f"No files found for {label=} {schema_hash=} in {label_dir} (patterns={patterns})"
         )
+    return files
 
-    frames: list[pd.DataFrame] = []
 
-    for p in files:
-        name = p.name
-        original_name = name.split("__", 1)[1] if "__" in name else name
-
-        if p.suffix.lower() == ".xlsx":
-            header_idx = _match_header_row_index(
-                catalog_df,
-                schema_hash=schema_hash,
-                original_filename=original_name,
-            )
-            rr = read_wellsky_xlsx_full(p, header_row_index=header_idx)
-            df = rr.df.copy()
+def original_filename(p: Path) -> str:
+    """Source file name of a classified file (the part after '<hash>__')."""
+    name = p.name
+    return name.split("__", 1)[1] if "__" in name else name
 
-        elif p.suffix.lower() == ".csv":
-            # CSV already has a header row typically; treat as standard
-            df = pd.read_csv(p).copy()
 
+def read_classified_file(
+    p: Path,
+    *,
+    catalog_index: CatalogIndex,
+    label: str,
+    schema_hash: str,
+    sidecar_dir: Path | None = None,
+    digest: str | None = None,
+) -> pd.DataFrame | None:
+    """
+    Read one classified file with snake_case columns and metadata cols
+    (label, schema_hash, source_file). None for unsupported suffixes.
+    `sidecar_dir` / `digest`: XLSX sidecar cache (see read_wellsky_xlsx_full).
+    """
+    original_name = original_filename(p)
+    entry = catalog_index.get((schema_hash, original_name))
+
+    if p.suffix.lower() == ".xlsx":
+        header_idx = entry.header_row_index if entry else None
+        rr = read_wellsky_xlsx_full(p, header_row_index=header_idx, sidecar_dir=sidecar_dir, digest=digest)
+        df = rr.df.copy()
+
+    elif p.suffix.lower() == ".csv":
+        if entry and entry.csv_dialect is not None and entry.header_row_index is not None:
+            df = read_csv_full(
+                p,
+                header_row_index=entry.header_row_index,
+                dialect=entry.csv_dialect,
+                columns=entry.raw_headers,
+            )
         else:
-            # should not happen given glob patterns, but keep safe
-            continue
+            # not in catalog: CSV already has a header row typically; treat as standard
+            df = pd.read_csv(p).copy()
 
-        df.columns = [to_snake(c) for c in df.columns]
+    else:
+        # should not happen given glob patterns, but keep safe
+        return None
 
-        # Metadata
-        df["label"] = label
-        df["schema_hash"] = schema_hash
-        df["source_file"] = original_name
+    df.columns = [to_snake(c) for c in df.columns]
 
-        frames.append(df)
+    # Metadata
+    df["label"] = label
+    df["schema_hash"] = schema_hash
+    df["source_file"] = original_name
+    return df
 
+
+def consolidate_schema_from_classified(
+    *,
+    classified_dir: Path,
+    catalog_index: CatalogIndex,
+    label: str,
+    schema_hash: str,
+    sidecar_dir: Path | None = None,
+) -> pd.DataFrame | None:
+    """
+    Consolidate all files for (label, schema_hash) from:
+      data/classified/<label>/<schema_hash>__*.xlsx
+      data/classified/<label>/<schema_hash>__*.csv
+
+    Adds metadata cols:
+      - label
+      - schema_hash
+      - source_file
+    Normalizes columns to snake_case.
+    Files with identical content (same export copied under several names) are read once;
+    content hashes come from the catalog, only files it doesn't know are hashed.
+    None when no file could be read (nothing to concatenate).
+    """
+    files = list_classified_files(classified_dir, label, schema_hash)
+
+    frames: list[pd.DataFrame] = []
+    seen_content: set[str] = set()
+
+    for p in files:
+        digest = catalog_digest(p, catalog_index.get((schema_hash, original_filename(p)))) or content_hash(p)
+        if digest in seen_content:
+            continue
+        seen_content.add(digest)
+
+        df = read_classified_file(
+            p,
+            catalog_index=catalog_index,
+            label=label,
+            schema_hash=schema_hash,
+            sidecar_dir=sidecar_dir,
+            digest=digest,
+        )
+        if df is not None:
+            frames.append(df)
+
+    if not frames:
+        return None
     out = pd.concat(frames, ignore_index=True)
     return out
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.io.content_hash import content_hash
+from src.pipelines.consolidate_schema import CatalogEntry, catalog_digest
+
+
+# Bump when readers or source transforms change what a fragment contains.
+TRANSFORM_VERSION = 8
+
+INPUTS_FILE = "_inputs.json"
+
+
+@dataclass(frozen=True)
+class SourceFragment:
+    path: Path          # classified file
+    key: str            # fragment id: file identity + how it is read + transform version
+    content_hash: str
+
+
+class FragmentStore:
+    """
+    Per-source-file parquet fragments of one processed output, under
+    data/processed/_fragments/<label>__<schema_hash>/<key>.parquet
+
+    _inputs.json records which fragments (and which output file) the last
+    successful write was assembled from, so unchanged outputs can be skipped.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._inputs = self._load_inputs()
+
+    def _load_inputs(self) -> Dict:
+        p = self.root / INPUTS_FILE
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if data.get("transform_version") == TRANSFORM_VERSION else {}
+
+    def plan(
+        self,
+        files: List[Path],
+        *,
+        label: str,
+        schema_hash: str,
+        entries: Dict[Path, Optional[CatalogEntry]],
+    ) -> List[SourceFragment]:
+        """
+        Fragment per classified file, in file order. Files with identical content
+        are kept once. Content hashes of files seen in the previous run are reused
+        (same key => same size/mtime) and the catalog's are used for new ones, so only
+        files neither knows are hashed.
+        `entries`: catalog entry per file (what it is read with).
+        """
+        known = self._inputs.get("content_hashes", {})
+        out: List[SourceFragment] = []
+        seen_content: set[str] = set()
+        for p in files:
+            key = fragment_key(p, label=label, schema_hash=schema_hash, entry=entries.get(p))
+            digest = known.get(key) or catalog_digest(p, entries.get(p)) or content_hash(p)
+            if digest in seen_content:
+                continue
+            seen_content.add(digest)
+            out.append(SourceFragment(path=p, key=key, content_hash=digest))
+        return out
+
+    def is_current(self, sources: List[SourceFragment], out_path: Path) -> bool:
+        """True when out_path was written from exactly these fragments and is untouched since."""
+        if not self._inputs or not out_path.exists():
+            return False
+        if self._inputs.get("fragments") != [s.key for s in sources]:
+            return False
+        return self._inputs.get("output_mtime_ns") == out_path.stat().st_mtime_ns
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def has(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        p = self.path(key)
+        if not p.exists():
+            return None
+        try:
+            return pd.read_parquet(p)
+        except Exception:
+            return None
+
+    def save(self, key: str, df: pd.DataFrame, *, required: bool = False) -> bool:
+        """
+        Write a fragment. Frames parquet can't hold (e.g. mixed-type object columns)
+        are simply not cached: the file is re-read next run.
+        With `required` (streaming writes read fragments back) the error is raised instead.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        p = self.path(key)
+        tmp = p.with_suffix(".parquet.tmp")
+        try:
+            df.to_parquet(tmp, index=False)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            if required:
+                raise
+            return False
+        tmp.replace(p)
+        return True
+
+    def commit(self, sources: List[SourceFragment], out_path: Path) -> None:
+        """Record the inputs of a successful write and drop fragments no longer used."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        keep = {s.key for s in sources}
+        self._inputs = {
+            "transform_version": TRANSFORM_VERSION,
+            "output_mtime_ns": out_path.stat().st_mtime_ns,
+            "fragments": [s.key for s in sources],
+            "content_hashes": {s.key: s.content_hash for s in sources},
+        }
+        p = self.root / INPUTS_FILE
+        tmp = p.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._inputs, indent=2), encoding="utf-8")
+        tmp.replace(p)
+
+        for frag in self.root.glob("*.parquet"):
+            if frag.stem not in keep:
+                frag.unlink(missing_ok=True)
+
+
+def fragment_key(
+    p: Path,
+    *,
+    label: str,
+    schema_hash: str,
+    entry: Optional[CatalogEntry],
+) -> str:
+    """
+    Everything read_classified_file depends on: the file itself and the catalog entry
+    it is read with (header row, header cells, CSV dialect). How that entry was detected
+    (aliases, labels, templates) doesn't matter: a re-detection that changes it changes the key.
+    """
+    st = p.stat()
+    dialect = entry.csv_dialect if entry else None
+    payload = json.dumps(
+        {
+            "transform_version": TRANSFORM_VERSION,
+            "label": label,
+            "schema_hash": schema_hash,
+            "name": p.name,
+            "size_bytes": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "header_row_index": entry.header_row_index if entry else None,
+            "raw_headers": list(entry.raw_headers) if entry else None,
+            "csv_dialect": [dialect.encoding, dialect.delimiter, dialect.quotechar] if dialect else None,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.pipelines.sanitize import SanitizeDecision, sanitize_series
+
+
+DEFAULT_ROW_GROUP_ROWS = 128_000
+
+
+def final_columns(
+    paths: Sequence[Path],
+    *,
+    compact_dtypes: bool = False,
+    decisions: Optional[List[SanitizeDecision]] = None,
+) -> Tuple[Dict[str, Any], pa.Schema]:
+    """
+    Final pandas dtype per column (in order of first appearance) and the matching
+    Arrow schema for the concatenation of parquet files, decided once over all of them:
+    each column is concatenated like pd.concat of the whole frames (missing => NA)
+    and passed through sanitize_series, so the result is what a regular run writes.
+    Only one column of all files is in memory at a time.
+    """
+    files = [pq.ParquetFile(p) for p in paths]
+    names: Dict[str, None] = {}
+    for f in files:
+        names.update(dict.fromkeys(f.schema_arrow.names))
+
+    dtypes: Dict[str, Any] = {}
+    samples: Dict[str, pd.Series] = {}  # typed empty column (objects: one value, for the Arrow type)
+    for name in names:
+        parts = [
+            pd.read_parquet(p, columns=[name]) if name in f.schema_arrow.names
+            else pd.DataFrame(index=pd.RangeIndex(f.metadata.num_rows))
+            for p, f in zip(paths, files)
+        ]
+        col = pd.concat(parts, ignore_index=True)[name]
+        del parts
+        col = sanitize_series(col, name=name, decisions=decisions, compact_dtypes=compact_dtypes)
+        dtypes[name] = col.dtype
+        samples[name] = col.dropna().iloc[:1] if col.dtype == object else col.iloc[:0]
+    return dtypes, _pandas_schema(samples)
+
+
+def _pandas_schema(samples: Dict[str, pd.Series]) -> pa.Schema:
+    """Arrow schema (with pandas metadata) of a frame holding these columns."""
+    fields: List[pa.Field] = []
+    meta: Dict[str, Any] = {}
+    for name, sample in samples.items():
+        schema = pa.Schema.from_pandas(sample.reset_index(drop=True).to_frame(name), preserve_index=False)
+        fields.append(schema.field(name))
+        col_meta = json.loads(schema.metadata[b"pandas"])
+        if not meta:
+            meta = {**col_meta, "columns": []}
+        meta["columns"].extend(col_meta["columns"])
+    return pa.schema(fields, metadata={b"pandas": json.dumps(meta).encode("utf-8")})
+
+
+def write_parquet_streaming(
+    paths: Sequence[Path],
+    out_path: Path,
+    *,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    compact_dtypes: bool = False,
+    decisions: Optional[List[SanitizeDecision]] = None,
+) -> int:
+    """
+    Concatenate parquet files into out_path batch by batch. Small files are buffered
+    into full row groups, so at most ~2x `row_group_rows` rows are in memory at a time.
+    Missing columns are filled with nulls. Column dtypes come from final_columns
+    (`compact_dtypes` / `decisions` as in sanitize_for_parquet), so the output has the
+    same schema as writing the sanitized concatenation in one go.
+    Written to a temp file and moved into place, so readers never see a partial output.
+    Returns the number of rows written.
+    """
+    if not paths:
+        raise ValueError("No parquet files to concatenate")
+    dtypes, schema = final_columns(paths, compact_dtypes=compact_dtypes, decisions=decisions)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp, schema) as writer:
+            pending: List[pa.Table] = []
+            pending_rows = 0
+            for p in paths:
+                for batch in pq.ParquetFile(p).iter_batches(batch_size=row_group_rows):
+                    pending.append(_conform(batch, dtypes, schema))
+                    pending_rows += batch.num_rows
+                    if pending_rows >= row_group_rows:
+                        # write whole row groups, carry the remainder over (slices are zero-copy)
+                        table = pa.concat_tables(pending)
+                        full = (pending_rows // row_group_rows) * row_group_rows
+                        writer.write_table(table.slice(0, full), row_group_size=row_group_rows)
+                        rows += full
+                        pending, pending_rows = [table.slice(full)], pending_rows - full
+            if pending:
+                writer.write_table(pa.concat_tables(pending), row_group_size=row_group_rows)
+                rows += pending_rows
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(out_path)
+    return rows
+
+
+def _conform(batch: pa.RecordBatch, dtypes: Dict[str, Any], schema: pa.Schema) -> pa.Table:
+    df = batch.to_pandas()
+    columns = {}
+    for name, dtype in dtypes.items():
+        s = df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        columns[name] = s if s.dtype == dtype else s.astype(dtype)
+    table = pa.Table.from_pandas(pd.DataFrame(columns, index=df.index), schema=schema, preserve_index=False)
+    return table.replace_schema_metadata(schema.metadata)
@@ -1,11 +1,32 @@
 from __future__ import annotations
 
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from datetime import datetime
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
 import pandas as pd
+from tabulate import tabulate
 
-from src.pipelines.consolidate_schema import consolidate_schema_from_classified
+from src.config_loader import load_config
+from src.io.xlsx_sidecar import evict_sidecars
+from src.pipelines.consolidate_schema import (
+    CatalogIndex,
+    build_catalog_index,
+    consolidate_schema_from_classified,
+    list_classified_files,
+    original_filename,
+    read_classified_file,
+)
+from src.pipelines.fragment_cache import FragmentStore
+from src.pipelines.parquet_stream import DEFAULT_ROW_GROUP_ROWS, write_parquet_streaming
 from src.pipelines.transforms.wellsky import add_franchise_columns
-from src.pipelines.sanitize import sanitize_for_parquet
+from src.pipelines.sanitize import SanitizeDecision, sanitize_for_parquet
+from src.run_metrics import SUMMARY_HEADERS, RunMetrics, maybe_profile
 
 import warnings
 warnings.filterwarnings(
@@ -16,7 +37,296 @@ warnings.filterwarnings(
 )
 
 
-def run_processed() -> None:
+FRAGMENTS_DIR = "_fragments"
+
+# Set in each pool worker by _init_worker (sent once per worker, not once per item)
+_WORKER_CATALOG_INDEX: Optional[CatalogIndex] = None
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="run_processed")
+    p.add_argument("--config", default="config/settings.yaml", help="Path to YAML config")
+    p.add_argument("--workers", type=int, default=1, help="Process pool size (1 = serial)")
+    p.add_argument(
+        "--max-worker-memory-mb",
+        type=int,
+        default=0,
+        help="Address-space cap per pool worker in MB (0 = no cap); items over it fail with MemoryError",
+    )
+    p.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore data/processed/_fragments and re-read every classified file",
+    )
+    p.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Append outputs file by file in row groups (bounded memory) instead of concatenating in memory",
+    )
+    p.add_argument(
+        "--row-group-rows",
+        type=int,
+        default=DEFAULT_ROW_GROUP_ROWS,
+        help="Rows per parquet row group in --streaming mode",
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help="cProfile the work loop (data/staging/profile_processed_<run_ts>.prof); use with --workers 1",
+    )
+    return p.parse_args()
+
+
+def _source_transform(label: str, df: pd.DataFrame) -> pd.DataFrame:
+    # Source-specific transforms (row-wise, so they can run per source file)
+    if label.startswith("wellsky"):
+        return add_franchise_columns(df)
+    return df
+
+
+def process_item(
+    *,
+    classified_dir: Path,
+    processed_dir: Path,
+    catalog_index: CatalogIndex,
+    label: str,
+    schema_hash: str,
+    use_fragments: bool = True,
+    streaming: bool = False,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    compact_dtypes: bool = True,
+    xlsx_cache_dir: Optional[Path] = None,
+) -> Tuple[str, str]:
+    """
+    Consolidate + transform + sanitize + write one (label, schema_hash).
+    Returns (outcome, log line) with outcome in wrote | unchanged | skipped | failed.
+
+    With `use_fragments`, each source file is read + transformed + made parquet-safe once
+    and cached as a fragment; the output is skipped when none of its inputs changed.
+    With `streaming`, the output is appended fragment by fragment in row groups
+    instead of being concatenated in memory (fragments go to a temp dir without `use_fragments`).
+    `compact_dtypes`: sanitize's Int/category conversions, decided on all source files
+    together (never per fragment), so streaming and regular outputs get the same dtypes.
+    `xlsx_cache_dir`: parsed workbooks are cached there as Arrow sidecars (None = off).
+    """
+    out_path = processed_dir / f"{label}__{schema_hash}.parquet"
+
+    try:
+        files = list_classified_files(classified_dir, label, schema_hash)
+    except FileNotFoundError as e:
+        return "skipped", f"SKIP (no classified files): {label} {schema_hash} -> {e}"
+
+    if not use_fragments and not streaming:
+        return _process_in_memory(
+            classified_dir=classified_dir,
+            out_path=out_path,
+            catalog_index=catalog_index,
+            label=label,
+            schema_hash=schema_hash,
+            compact_dtypes=compact_dtypes,
+            xlsx_cache_dir=xlsx_cache_dir,
+        )
+
+    with ExitStack() as stack:
+        if use_fragments:
+            root = processed_dir / FRAGMENTS_DIR / f"{label}__{schema_hash}"
+        else:
+            root = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="fragments_", dir=processed_dir)))
+
+        # planning stats and may hash every input: a vanished/unreadable file fails this item only
+        try:
+            store = FragmentStore(root)
+            entries = {p: catalog_index.get((schema_hash, original_filename(p))) for p in files}
+            sources = store.plan(files, label=label, schema_hash=schema_hash, entries=entries)
+            current = use_fragments and store.is_current(sources, out_path)
+        except Exception as e:
+            return "failed", f"FAIL (plan): {label} {schema_hash} -> {type(e).__name__}: {e}"
+        if current:
+            return "unchanged", f"SKIP (unchanged): {out_path}"
+
+        frames = []
+        decisions: List[SanitizeDecision] = []  # final dtypes, decided once over all source files
+        parsed = 0
+        stage = "consolidate"  # stages interleave per source file
+        try:
+            for src in sources:
+                if streaming and store.has(src.key):
+                    continue
+                df = None if streaming else store.load(src.key)
+                if df is None:
+                    stage = "consolidate"
+                    df = read_classified_file(
+                        src.path,
+                        catalog_index=catalog_index,
+                        label=label,
+                        schema_hash=schema_hash,
+                        sidecar_dir=xlsx_cache_dir,
+                        digest=src.content_hash,
+                    )
+                    if df is None:
+                        continue
+                    stage = "transform"
+                    df = _source_transform(label, df)
+                    stage = "sanitize"
+                    df = sanitize_for_parquet(df, compact_dtypes=False)
+                    stage = "write"
+                    store.save(src.key, df, required=streaming)
+                    parsed += 1
+                if not streaming:
+                    frames.append(df)
+                del df
+
+            fragment_paths = [store.path(s.key) for s in sources if store.has(s.key)] if streaming else []
+            if not (fragment_paths if streaming else frames):
+                return "skipped", f"SKIP (no readable files): {label} {schema_hash}"
+            if streaming:
+                # same final dtypes as below, decided column by column over the fragments
+                stage = "write"
+                rows = write_parquet_streaming(
+                    fragment_paths,
+                    out_path,
+                    row_group_rows=row_group_rows,
+                    compact_dtypes=compact_dtypes,
+                    decisions=decisions,
+                )
+            else:
+                stage = "consolidate"
+                df = pd.concat(frames, ignore_index=True)
+                # fragments hold per-file parquet-safe types; dtypes are decided once, on the whole frame
+                stage = "sanitize"
+                df = sanitize_for_parquet(df, decisions=decisions, compact_dtypes=compact_dtypes)
+                stage = "write"
+                df.to_parquet(out_path, index=False)
+                rows = len(df)
+        except Exception as e:
+            return "failed", f"FAIL ({stage}): {label} {schema_hash} -> {type(e).__name__}: {e}"
+
+        if use_fragments:
+            store.commit(sources, out_path)
+        return "wrote", f"Wrote: {out_path} (rows={rows:,}, parsed {parsed}/{len(sources)} files)" + _format_decisions(decisions)
+
+
+def _process_in_memory(
+    *,
+    classified_dir: Path,
+    out_path: Path,
+    catalog_index: CatalogIndex,
+    label: str,
+    schema_hash: str,
+    compact_dtypes: bool,
+    xlsx_cache_dir: Optional[Path],
+) -> Tuple[str, str]:
+    decisions: List[SanitizeDecision] = []
+    try:
+        df = consolidate_schema_from_classified(
+            classified_dir=classified_dir,
+            catalog_index=catalog_index,
+            label=label,
+            schema_hash=schema_hash,
+            sidecar_dir=xlsx_cache_dir,
+        )
+    except Exception as e:
+        return "failed", f"FAIL (consolidate): {label} {schema_hash} -> {type(e).__name__}: {e}"
+    if df is None:
+        return "skipped", f"SKIP (no readable files): {label} {schema_hash}"
+
+    try:
+        df = _source_transform(label, df)
+    except Exception as e:
+        return "failed", f"FAIL (transform): {label} {schema_hash} -> {type(e).__name__}: {e}"
+
+    try:
+        df = sanitize_for_parquet(df, decisions=decisions, compact_dtypes=compact_dtypes)
+    except Exception as e:
+        return "failed", f"FAIL (sanitize): {label} {schema_hash} -> {type(e).__name__}: {e}"
+
+    # Write output
+    try:
+        df.to_parquet(out_path, index=False)
+        return "wrote", f"Wrote: {out_path} (rows={len(df):,})" + _format_decisions(decisions)
+    except Exception as e:
+        return "failed", f"FAIL (write): {label} {schema_hash} -> {type(e).__name__}: {e}"
+
+
+def _evict_xlsx_sidecars(cache_dir: Path, catalog_df: pd.DataFrame) -> None:
+    """Drop sidecars of workbooks no longer in the catalog (needs content_hash, i.e. dedup.enabled)."""
+    hashes = set(catalog_df["content_hash"].dropna())
+    if not hashes:
+        print(f"XLSX cache: eviction skipped ({cache_dir}; the catalog has no content_hash)")
+        return
+    removed = evict_sidecars(cache_dir, hashes)
+    if removed:
+        print(f"XLSX cache: removed {removed} stale sidecar(s) from {cache_dir}")
+
+
+def _format_decisions(decisions: List[SanitizeDecision]) -> str:
+    """Per-column sanitize decisions, indented under the item's log line (each distinct one once)."""
+    lines = []
+    seen = set()
+    for d in decisions:
+        if d in seen:
+            continue
+        seen.add(d)
+        lines.append(f"\n    {d.column}: {d.from_dtype} -> {d.to_dtype} ({d.reason})")
+    return "".join(lines)
+
+
+def _init_worker(catalog_index: CatalogIndex, max_memory_bytes: int) -> None:
+    global _WORKER_CATALOG_INDEX
+    _WORKER_CATALOG_INDEX = catalog_index
+
+    if max_memory_bytes > 0:
+        try:
+            import resource  # POSIX only
+
+            resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, max_memory_bytes))
+        except (ImportError, ValueError, OSError):
+            pass  # no cap on this platform
+
+
+def _process_item_in_worker(
+    classified_dir: Path,
+    processed_dir: Path,
+    label: str,
+    schema_hash: str,
+    use_fragments: bool,
+    streaming: bool,
+    row_group_rows: int,
+    compact_dtypes: bool,
+    xlsx_cache_dir: Optional[Path],
+) -> Tuple[str, str, float]:
+    t0 = time.perf_counter()
+    try:
+        outcome, line = process_item(
+            classified_dir=classified_dir,
+            processed_dir=processed_dir,
+            catalog_index=_WORKER_CATALOG_INDEX,
+            label=label,
+            schema_hash=schema_hash,
+            use_fragments=use_fragments,
+            streaming=streaming,
+            row_group_rows=row_group_rows,
+            compact_dtypes=compact_dtypes,
+            xlsx_cache_dir=xlsx_cache_dir,
+        )
+    except MemoryError:
+        # raised outside the per-step handlers (e.g. while building the log line)
+        outcome, line = "failed", f"FAIL (memory): {label} {schema_hash} -> MemoryError"
+    return outcome, line, time.perf_counter() - t0
+
+
+def run_processed(
+    *,
+    workers: int = 1,
+    max_worker_memory_mb: int = 0,
+    use_fragments: bool = True,
+    streaming: bool = False,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    profile: bool = False,
+    config_path: str = "config/settings.yaml",
+) -> None:
+    run_ts = datetime.now().isoformat(timespec="seconds")
+    metrics = RunMetrics(run_ts=run_ts, pipeline="processed")
     staging_dir = Path("data/staging")
     classified_dir = Path("data/classified")
     processed_dir = Path("data/processed")
@@ -26,76 +336,154 @@ def run_processed() -> None:
     if not catalog_path.exists():
         raise FileNotFoundError(f"Missing: {catalog_path}")
 
-    catalog_df = pd.read_parquet(catalog_path).copy()
+    try:
+        with metrics.stage("load_catalog") as st:
+            catalog_df = pd.read_parquet(catalog_path).copy()
+            st.files, st.bytes = len(catalog_df), catalog_path.stat().st_size
 
-    # Only OK + labeled schemas. Skip unknown_schema
-    ok = catalog_df[catalog_df["status"].eq("ok")].copy()
-    ok = ok[ok["label"].notna()]
-    ok = ok[ok["label"].ne("unknown_schema")]
+            # Only OK + labeled schemas. Skip unknown_schema
+            ok = catalog_df[catalog_df["status"].eq("ok")].copy()
+            ok = ok[ok["label"].notna()]
+            ok = ok[ok["label"].ne("unknown_schema")]
 
-    if ok.empty:
-        print("No OK labeled schemas found (nothing to process).")
-        return
+            if ok.empty:
+                print("No OK labeled schemas found (nothing to process).")
+                return
 
-    # Work list: unique (label, schema_hash)
-    work = (
-        ok[["label", "schema_hash"]]
-        .drop_duplicates()
-        .sort_values(["label", "schema_hash"])
-        .to_dict(orient="records")
-    )
+            # Work list: unique (label, schema_hash), largest input first so the
+            # biggest schemas don't start last and stretch the tail of the run
+            work = (
+                ok.groupby(["label", "schema_hash"], as_index=False)["size_bytes"]
+                .sum()
+                .sort_values(["size_bytes", "label", "schema_hash"], ascending=[False, True, True])
+                .to_dict(orient="records")
+            )
 
-    wrote = 0
-    skipped = 0
-    failed = 0
+            # catalog lookup for header rows / CSV dialects, built once (not per classified file)
+            catalog_index = build_catalog_index(catalog_df)
+            cfg = load_config(config_path)
+            compact_dtypes = bool(cfg["processed"]["compact_dtypes"])
+            xlsx_cache_dir = Path(cfg["paths"]["xlsx_cache_dir"]) if cfg["xlsx_cache"]["enabled"] else None
 
-    for item in work:
-        label = str(item["label"])
-        schema_hash = str(item["schema_hash"])
+        outcomes = {"wrote": 0, "unchanged": 0, "skipped": 0, "failed": 0}
 
-        try:
-            df = consolidate_schema_from_classified(
+        def record(item: Dict, seconds: float) -> None:
+            metrics.record_file("process", f"{item['label']} {item['schema_hash']}", seconds, int(item["size_bytes"]))
+
+        profile_path = staging_dir / f"profile_processed_{run_ts.replace(':', '')}.prof"
+        with metrics.stage("process") as st, maybe_profile(profile, profile_path):
+            st.files, st.bytes = len(work), sum(int(item["size_bytes"]) for item in work)
+            _run_work(
+                work,
+                record=record,
+                outcomes=outcomes,
                 classified_dir=classified_dir,
-                catalog_df=catalog_df,
-                label=label,
-                schema_hash=schema_hash,
+                processed_dir=processed_dir,
+                catalog_index=catalog_index,
+                workers=workers,
+                max_worker_memory_mb=max_worker_memory_mb,
+                use_fragments=use_fragments,
+                streaming=streaming,
+                row_group_rows=row_group_rows,
+                compact_dtypes=compact_dtypes,
+                xlsx_cache_dir=xlsx_cache_dir,
             )
-        except FileNotFoundError as e:
-            print(f"SKIP (no classified files): {label} {schema_hash} -> {e}")
-            skipped += 1
-            continue
-        except Exception as e:
-            print(f"FAIL (consolidate): {label} {schema_hash} -> {type(e).__name__}: {e}")
-            failed += 1
-            continue
 
-        # Source-specific transforms
-        try:
-            if label.startswith("wellsky"):
-                df = add_franchise_columns(df)
-        except Exception as e:
-            print(f"FAIL (transform): {label} {schema_hash} -> {type(e).__name__}: {e}")
-            failed += 1
-            continue
+        if xlsx_cache_dir is not None:
+            _evict_xlsx_sidecars(xlsx_cache_dir, catalog_df)
 
-        df = sanitize_for_parquet(df)
+        print("\nProcessed run summary:")
+        print(f"- wrote:     {outcomes['wrote']}")
+        print(f"- unchanged: {outcomes['unchanged']}")
+        print(f"- skipped:   {outcomes['skipped']}")
+        print(f"- failed:    {outcomes['failed']}")
+    finally:
+        # also on the early return / errors: every run leaves its run_metrics rows
+        print("\nRun metrics:")
+        print(tabulate(metrics.summary_rows(), headers=SUMMARY_HEADERS, tablefmt="psql"))
+        slow = metrics.slowest_files()[:5]
+        if slow:
+            print("Slowest items: " + ", ".join(f"{f.name} ({f.wall_s:,.2f}s)" for f in slow))
+        print(f"Wrote: {metrics.write(staging_dir)}")
 
-        # Write output
-        try:
-            out_path = processed_dir / f"{label}__{schema_hash}.parquet"
-            df.to_parquet(out_path, index=False)
-            wrote += 1
-            print(f"Wrote: {out_path} (rows={len(df):,})")
-        except Exception as e:
-            print(f"FAIL (write): {label} {schema_hash} -> {type(e).__name__}: {e}")
-            failed += 1
-            continue
 
-    print("\nProcessed run summary:")
-    print(f"- wrote:   {wrote}")
-    print(f"- skipped: {skipped}")
-    print(f"- failed:  {failed}")
+def _run_work(
+    work: List[Dict],
+    *,
+    record: Callable[[Dict, float], None],
+    outcomes: Dict[str, int],
+    classified_dir: Path,
+    processed_dir: Path,
+    catalog_index: CatalogIndex,
+    workers: int,
+    max_worker_memory_mb: int,
+    use_fragments: bool,
+    streaming: bool,
+    row_group_rows: int,
+    compact_dtypes: bool,
+    xlsx_cache_dir: Optional[Path],
+) -> None:
+    if workers <= 1 or len(work) <= 1:
+        for item in work:
+            t0 = time.perf_counter()
+            outcome, line = process_item(
+                classified_dir=classified_dir,
+                processed_dir=processed_dir,
+                catalog_index=catalog_index,
+                label=str(item["label"]),
+                schema_hash=str(item["schema_hash"]),
+                use_fragments=use_fragments,
+                streaming=streaming,
+                row_group_rows=row_group_rows,
+                compact_dtypes=compact_dtypes,
+                xlsx_cache_dir=xlsx_cache_dir,
+            )
+            record(item, time.perf_counter() - t0)
+            outcomes[outcome] += 1
+            print(line)
+    else:
+        max_memory_bytes = int(max_worker_memory_mb) * 1024 * 1024
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(work)),
+            initializer=_init_worker,
+            initargs=(catalog_index, max_memory_bytes),
+        ) as ex:
+            futures = {
+                ex.submit(
+                    _process_item_in_worker,
+                    classified_dir,
+                    processed_dir,
+                    str(item["label"]),
+                    str(item["schema_hash"]),
+                    use_fragments,
+                    streaming,
+                    row_group_rows,
+                    compact_dtypes,
+                    xlsx_cache_dir,
+                ): item
+                for item in work
+            }
+            for fut in as_completed(futures):
+                item = futures[fut]
+                try:
+                    outcome, line, seconds = fut.result()
+                    record(item, seconds)
+                except Exception as e:
+                    # worker died (e.g. killed by the OS); the pool is broken for the rest too
+                    outcome = "failed"
+                    line = f"FAIL (worker): {item['label']} {item['schema_hash']} -> {type(e).__name__}: {e}"
+                outcomes[outcome] += 1
+                print(line, flush=True)
 
 
 if __name__ == "__main__":
-    run_processed()
+    args = _parse_args()
+    run_processed(
+        workers=args.workers,
+        max_worker_memory_mb=args.max_worker_memory_mb,
+        use_fragments=not args.full_rebuild,
+        streaming=args.streaming,
+        row_group_rows=args.row_group_rows,
+        profile=args.profile,
+        config_path=args.config,
+    )
@@ -1,7 +1,17 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
 import pandas as pd
 import numpy as np
-from pandas.api.types import is_object_dtype
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_object_dtype,
+    is_string_dtype,
+)
 
 
 TEXT_ALWAYS = {
@@ -9,24 +19,148 @@ TEXT_ALWAYS = {
     "client_location",
 }
 
-def sanitize_for_parquet(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # 1) Force certain columns to text (string dtype)
-    for c in TEXT_ALWAYS:
-        if c in df.columns:
-            # keep NA as <NA>, make everything else string
-            df[c] = df[c].astype("string")
-
-    # 2) Convert timedelta columns to numeric days (float)
-    # Detect timedelta-like values even if column is object
-    for c in df.columns:
-        s = df[c]
-        if is_object_dtype(s):
-            # quick sample check to avoid scanning huge columns
-            sample = s.dropna().head(50)
-            if not sample.empty and sample.map(lambda x: isinstance(x, pd.Timedelta)).any():
-                td = pd.to_timedelta(s, errors="coerce")
-                df[c] = td.dt.total_seconds() / 86400.0  # days as float
+# Added by read_classified_file; downstream readers join/filter on them as plain text
+METADATA_COLUMNS = {
+    "label",
+    "schema_hash",
+    "source_file",
+}
+
+# Text columns with few distinct values are stored dictionary-encoded (category)
+CATEGORY_MIN_ROWS = 100
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class SanitizeDecision:
+    column: str
+    from_dtype: str
+    to_dtype: str
+    reason: str
+
 
+def sanitize_for_parquet(
+    df: pd.DataFrame,
+    *,
+    decisions: Optional[List[SanitizeDecision]] = None,
+    compact_dtypes: bool = True,
+) -> pd.DataFrame:
+    """
+    Make every column parquet-friendly and compact, in place (returns df):
+    - TEXT_ALWAYS columns -> string
+    - object columns typed by vectorized inference (numeric, bool, datetime, timedelta -> days)
+    - mixed-type object columns -> string (pyarrow can't store them)
+    - integers downcast; floats -> float32 only when lossless
+    - with `compact_dtypes` (changes the output schema, so it can be turned off):
+      integral floats -> nullable Int, repetitive text -> category (never METADATA_COLUMNS)
+    Every column that changed is appended to `decisions`.
+    """
+    for i, name in enumerate(df.columns):  # positional: duplicate names are possible
+        s = df.iloc[:, i]
+        new = sanitize_series(s, name=str(name), decisions=decisions, compact_dtypes=compact_dtypes)
+        if new is not s:
+            df.isetitem(i, new)
     return df
+
+
+def sanitize_series(
+    s: pd.Series,
+    *,
+    name: str,
+    decisions: Optional[List[SanitizeDecision]] = None,
+    compact_dtypes: bool = True,
+) -> pd.Series:
+    """
+    sanitize_for_parquet() for one column (each column is decided on its own values only).
+    Returns `s` itself when nothing changes.
+    """
+    new, reason = _sanitize_column(name, s, compact_dtypes)
+    if new is not s and decisions is not None:
+        decisions.append(SanitizeDecision(name, str(s.dtype), str(new.dtype), reason))
+    return new
+
+
+def _sanitize_column(name: str, s: pd.Series, compact_dtypes: bool) -> Tuple[pd.Series, str]:
+    # 1) Force certain columns to text (string dtype); keep NA as <NA>
+    if name in TEXT_ALWAYS:
+        return (s, "") if str(s.dtype) == "string" else (s.astype("string"), "text_always")
+
+    if is_bool_dtype(s) or isinstance(s.dtype, pd.CategoricalDtype):
+        return s, ""
+    if is_integer_dtype(s) or is_float_dtype(s):
+        return _compact_numeric(s, compact_dtypes)
+    if not (is_object_dtype(s) or is_string_dtype(s)):
+        return s, ""  # datetime64, timedelta64, category, ...
+
+    inferred = infer_dtype(s, skipna=True)
+    if inferred == "empty":
+        return s, ""
+    if inferred == "string":
+        return _maybe_category(s) if compact_dtypes and name not in METADATA_COLUMNS else (s, "")
+    if inferred in ("integer", "floating", "mixed-integer-float"):
+        return _object_to_numeric(s, compact_dtypes)
+    if inferred == "boolean":
+        return s.astype("boolean"), "boolean"
+    if inferred in ("datetime", "datetime64"):
+        try:
+            return pd.to_datetime(s), "datetime"
+        except (ValueError, TypeError):
+            return s.astype("string"), "mixed_datetimes_as_text"
+    if inferred in ("timedelta", "timedelta64") or _has_timedelta(s):
+        # 2) timedelta-like values -> numeric days (float)
+        td = pd.to_timedelta(s, errors="coerce")
+        return td.dt.total_seconds() / 86400.0, "timedelta_days"
+    if inferred in ("date", "time", "decimal", "bytes"):
+        return s, ""  # pyarrow stores these natively
+    # mixed / mixed-integer / unknown objects: text is the only lossless parquet type
+    return s.astype("string"), "mixed_types_as_text"
+
+
+def _has_timedelta(s: pd.Series) -> bool:
+    # mixed columns: same rule as before (timedeltas among the first 50 values)
+    sample = s.dropna().head(50)
+    return bool(sample.map(lambda x: isinstance(x, pd.Timedelta)).any())
+
+
+def _compact_numeric(s: pd.Series, compact_dtypes: bool) -> Tuple[pd.Series, str]:
+    """
+    Integers are downcast; with `compact_dtypes`, floats holding only whole numbers
+    (typically integer columns with gaps) become nullable integers; other floats go
+    to float32 only if that is exact. Returns (s, "") when nothing changes.
+    """
+    if is_integer_dtype(s):
+        new = pd.to_numeric(s, downcast="integer")
+        return (s, "") if new.dtype == s.dtype else (new, "downcast_integer")
+
+    values = s.to_numpy(dtype="float64", na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if compact_dtypes and present.size and np.isfinite(present).all() and (present == np.trunc(present)).all() \
+            and np.abs(present).max() < 2**53:
+        return pd.to_numeric(s.astype("Int64"), downcast="integer"), "integral_float_to_int"
+
+    if s.dtype != np.float32:
+        f32 = values.astype("float32")
+        with np.errstate(invalid="ignore", over="ignore"):
+            if np.array_equal(f32.astype("float64"), values, equal_nan=True):
+                return pd.Series(f32, index=s.index, name=s.name), "float32_lossless"
+    return s, ""
+
+
+def _object_to_numeric(s: pd.Series, compact_dtypes: bool) -> Tuple[pd.Series, str]:
+    try:
+        num = pd.to_numeric(s)
+    except (ValueError, TypeError, OverflowError):
+        return s.astype("string"), "mixed_types_as_text"
+    if not (is_integer_dtype(num) or is_float_dtype(num)):
+        return s.astype("string"), "mixed_types_as_text"  # e.g. ints beyond 64 bits
+    new, reason = _compact_numeric(num, compact_dtypes)
+    return new, f"numeric+{reason}" if reason else "numeric"
+
+
+def _maybe_category(s: pd.Series) -> Tuple[pd.Series, str]:
+    n = len(s)
+    if n < CATEGORY_MIN_ROWS:
+        return s, ""
+    if s.nunique(dropna=True) > n * CATEGORY_MAX_UNIQUE_RATIO:
+        return s, ""
+    return s.astype("category"), "category"
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+def map_distinct(s: pd.Series, fn: Callable[[pd.Series], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Row-wise lookups evaluated once per distinct value.
+
+    `fn` gets the distinct non-null values of `s` (a Series, positional index) and
+    returns a DataFrame with one row per value. The result is broadcast back to
+    every row of `s` through the value codes (categorical codes when `s` already is
+    categorical, else pd.factorize); null rows get nulls. Output dtypes are fn's.
+
+    A column with millions of rows but a handful of distinct values (locations,
+    office codes, ...) costs a handful of evaluations plus one gather per column.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        uniques = pd.Series(s.cat.categories)
+    else:
+        codes, uniq = pd.factorize(s, use_na_sentinel=True)
+        uniques = pd.Series(uniq)
+
+    derived = fn(uniques.reset_index(drop=True))
+    if len(derived) != len(uniques):
+        raise ValueError(f"map_distinct: fn returned {len(derived)} rows for {len(uniques)} values")
+
+    codes = np.asarray(codes, dtype=np.intp)
+    return pd.DataFrame(
+        {c: derived[c].array.take(codes, allow_fill=True) for c in derived.columns},
+        index=s.index,
+    )
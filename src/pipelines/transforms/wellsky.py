@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import re
-import unicodedata
 import pandas as pd
 
+from src.fingerprint.header_normalizer import to_snake
+from src.pipelines.transforms.distinct import map_distinct
+
 NAME_MAP = {
     149: "Green Bay", 203: "Appleton", 238: "Sheboygan", 363: "Madison", 391: "Cedarburg",
     427: "Racine", 850: "Burlington", 858: "Stevens Point", 237: "Nashville", 434: "Bowling Green",
@@ -16,18 +17,6 @@ ACRO_MAP = {
 }
 
 
-def to_snake(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.lower()
-    s = re.sub(r"[^\w]+", "_", s)  # spaces/punct -> _
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s
-
-
 def add_franchise_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     WellSky contract:
@@ -36,8 +25,10 @@ def add_franchise_columns(df: pd.DataFrame) -> pd.DataFrame:
     - Always return columns:
         franchise (Int64), franchise_name (string-ish), franchise_acro (string-ish)
     - Force location-like columns to text to avoid Parquet type issues
+
+    Works in place (returns df). Location-derived fields are evaluated once per
+    distinct location and broadcast to the rows (see map_distinct).
     """
-    df = df.copy()
     df.columns = [to_snake(c) for c in df.columns]
 
     # Location-like column (after snake_case)
@@ -45,7 +36,7 @@ def add_franchise_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     # Always create required columns (even if we can't derive)
     if "franchise" not in df.columns:
-        df["franchise"] = pd.Series([pd.NA] * len(df), dtype="Int64")
+        df["franchise"] = pd.Series([pd.NA] * len(df), dtype="Int64", index=df.index)
     else:
         # ensure stable dtype
         df["franchise"] = pd.to_numeric(df["franchise"], errors="coerce").astype("Int64")
@@ -59,15 +50,26 @@ def add_franchise_columns(df: pd.DataFrame) -> pd.DataFrame:
     if not loc_col:
         return df
 
+    derived = map_distinct(df[loc_col], _location_fields)
+    for c in derived.columns:
+        df[c if c != "location_text" else loc_col] = derived[c]
+    return df
+
+
+def _location_fields(loc: pd.Series) -> pd.DataFrame:
+    """Per distinct location value: text form + franchise id/name/acro."""
     # Critical: force to text so mixed int/str doesn't break parquet
-    df[loc_col] = df[loc_col].astype("string")
+    text = loc.astype("string")
 
     # Extract 3-digit franchise id from the location-like string
-    f = df[loc_col].str.extract(r"(\d{3})", expand=False)
+    f = text.str.extract(r"(\d{3})", expand=False)
     f = pd.to_numeric(f, errors="coerce").astype("Int64")
 
-    df["franchise"] = f
-    df["franchise_name"] = f.map(NAME_MAP)
-    df["franchise_acro"] = f.map(ACRO_MAP)
-
-    return df
+    return pd.DataFrame(
+        {
+            "location_text": text,
+            "franchise": f,
+            "franchise_name": f.map(NAME_MAP),
+            "franchise_acro": f.map(ACRO_MAP),
+        }
+    )
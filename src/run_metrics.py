@@ -0,0 +1,245 @@
+# src/run_metrics.py
+from __future__ import annotations
+
+import cProfile
+import heapq
+import io
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+METRICS_FILE = "run_metrics.parquet"
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0          # this process + finished worker processes
+    peak_rss_mb: float = 0.0    # high-water mark of the process (or its workers) at stage end
+    files: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class FileMetrics:
+    stage: str
+    name: str                   # file path (or work item for run_processed)
+    wall_s: float
+    bytes: int = 0
+
+
+@dataclass
+class RunMetrics:
+    """
+    Per-stage wall/CPU time, peak memory and files/bytes of one run, per-file
+    sub-step (phase) totals, and per-file timings of which only the slowest N per stage are kept.
+    Appended to <staging_dir>/run_metrics.parquet (one row per stage / slow file, keyed by run_ts).
+    """
+    run_ts: str
+    pipeline: str               # classify | processed
+    slowest_n: int = 20
+    stages: List[StageMetrics] = field(default_factory=list)
+    # stage -> min-heap of (wall_s, seq, file): only the slowest_n per stage are kept
+    files: Dict[str, List[Tuple[float, int, FileMetrics]]] = field(default_factory=dict)
+    # (stage, phase) -> [summed seconds, files]; per-file sub-steps, e.g. detect/preview
+    phases: Dict[Tuple[str, str], List[float]] = field(default_factory=dict)
+    _open: Dict[str, Tuple[float, float]] = field(default_factory=dict, repr=False)
+    _seq: int = field(default=0, repr=False)
+
+    def begin(self, name: str) -> None:
+        self._open[name] = (time.perf_counter(), _cpu_seconds())
+
+    def end(self, name: str, *, files: int = 0, nbytes: int = 0) -> StageMetrics:
+        wall0, cpu0 = self._open.pop(name)
+        st = StageMetrics(
+            stage=name,
+            wall_s=time.perf_counter() - wall0,
+            cpu_s=_cpu_seconds() - cpu0,
+            peak_rss_mb=_peak_rss_mb(),
+            files=int(files),
+            bytes=int(nbytes),
+        )
+        self.stages.append(st)
+        return st
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time a block; set .files / .bytes on the yielded record."""
+        st = StageMetrics(stage=name)
+        self.begin(name)
+        try:
+            yield st
+        finally:
+            done = self.end(name, files=st.files, nbytes=st.bytes)
+            st.wall_s, st.cpu_s, st.peak_rss_mb = done.wall_s, done.cpu_s, done.peak_rss_mb
+
+    def record_file(
+        self,
+        stage: str,
+        name: str,
+        wall_s: float,
+        nbytes: int = 0,
+        phases: Optional[Dict[str, float]] = None,
+    ) -> None:
+        heap = self.files.setdefault(stage, [])
+        self._seq += 1
+        if len(heap) >= self.slowest_n and wall_s <= heap[0][0]:
+            pass  # not among the slowest: nothing kept per file (memory stays flat)
+        else:
+            fm = FileMetrics(stage=stage, name=str(name), wall_s=float(wall_s), bytes=int(nbytes or 0))
+            push = heapq.heappush if len(heap) < self.slowest_n else heapq.heapreplace
+            push(heap, (float(wall_s), self._seq, fm))
+        for phase, seconds in (phases or {}).items():
+            acc = self.phases.setdefault((stage, phase), [0.0, 0])
+            acc[0] += seconds
+            acc[1] += 1
+
+    def slowest_files(self) -> List[FileMetrics]:
+        out: List[FileMetrics] = []
+        for heap in self.files.values():
+            out.extend(fm for _, _, fm in sorted(heap, key=lambda e: (-e[0], e[1])))
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        rows: List[Dict[str, Any]] = []
+        for st in self.stages:
+            rows.append(
+                {
+                    "run_ts": self.run_ts,
+                    "pipeline": self.pipeline,
+                    "kind": "stage",
+                    "stage": st.stage,
+                    "name": None,
+                    "rank": None,
+                    "wall_s": st.wall_s,
+                    "cpu_s": st.cpu_s,
+                    "peak_rss_mb": st.peak_rss_mb,
+                    "files": st.files,
+                    "bytes": st.bytes,
+                    "files_per_s": st.files / st.wall_s if st.wall_s > 0 else None,
+                    "mb_per_s": st.bytes / 1e6 / st.wall_s if st.wall_s > 0 else None,
+                }
+            )
+        for (stage, phase), (seconds, n) in self.phases.items():
+            rows.append(
+                {
+                    "run_ts": self.run_ts,
+                    "pipeline": self.pipeline,
+                    "kind": "phase",
+                    "stage": stage,
+                    "name": phase,
+                    "rank": None,
+                    "wall_s": seconds,  # summed over files (across workers)
+                    "cpu_s": None,
+                    "peak_rss_mb": None,
+                    "files": int(n),
+                    "bytes": None,
+                    "files_per_s": n / seconds if seconds > 0 else None,
+                    "mb_per_s": None,
+                }
+            )
+        rank: Dict[str, int] = {}
+        for f in self.slowest_files():
+            rank[f.stage] = rank.get(f.stage, 0) + 1
+            rows.append(
+                {
+                    "run_ts": self.run_ts,
+                    "pipeline": self.pipeline,
+                    "kind": "slow_file",
+                    "stage": f.stage,
+                    "name": f.name,
+                    "rank": rank[f.stage],
+                    "wall_s": f.wall_s,
+                    "cpu_s": None,
+                    "peak_rss_mb": None,
+                    "files": 1,
+                    "bytes": f.bytes,
+                    "files_per_s": None,
+                    "mb_per_s": f.bytes / 1e6 / f.wall_s if f.wall_s > 0 else None,
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def write(self, staging_dir: Path) -> Path:
+        """Append this run's rows to run_metrics.parquet (same run_ts + pipeline rows are replaced)."""
+        p = Path(staging_dir) / METRICS_FILE
+        new = self.to_frame()
+        if p.exists():
+            try:
+                old = pd.read_parquet(p)
+                old = old[~(old["run_ts"].eq(self.run_ts) & old["pipeline"].eq(self.pipeline))]
+                new = pd.concat([old, new], ignore_index=True)
+            except Exception:
+                pass  # unreadable history: start over rather than fail the run
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        new.to_parquet(tmp, index=False)
+        tmp.replace(p)
+        return p
+
+    def summary_rows(self) -> List[List[Any]]:
+        rows = [
+            [
+                st.stage,
+                f"{st.wall_s:,.2f}",
+                f"{st.cpu_s:,.2f}",
+                f"{st.peak_rss_mb:,.0f}",
+                st.files,
+                f"{st.bytes / 1e6:,.1f}",
+                f"{st.files / st.wall_s:,.1f}" if st.wall_s > 0 else "",
+                f"{st.bytes / 1e6 / st.wall_s:,.1f}" if st.wall_s > 0 else "",
+            ]
+            for st in self.stages
+        ]
+        for (stage, phase), (seconds, n) in self.phases.items():
+            rows.append([f"  {stage}.{phase}", f"{seconds:,.2f}", "", "", int(n), "", "", ""])
+        return rows
+
+
+SUMMARY_HEADERS = ["stage", "wall s", "cpu s", "peak MB", "files", "MB", "files/s", "MB/s"]
+
+
+@contextmanager
+def maybe_profile(enabled: bool, out_path: Path, top: int = 25) -> Iterator[None]:
+    """cProfile the block when enabled: dump stats to out_path and print the top entries."""
+    if not enabled:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(str(out_path))
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+        print(buf.getvalue())
+        print(f"Wrote: {out_path} (cProfile; open with python -m pstats or snakeviz)")
+
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return 0.0
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KiB on Linux
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak * scale / (1024 * 1024)
@@ -0,0 +1,256 @@
+# src/staging_history.py
+from __future__ import annotations
+
+import argparse
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from tabulate import tabulate
+
+from src.config_loader import load_config
+from src.io.artifact_schemas import CATALOG_SCHEMA, MANIFEST_SCHEMA, REGISTRY_SCHEMA
+
+
+# staging/history/<artifact>/run_date=YYYY-MM-DD/run-<run_ts>.parquet (hive-partitioned)
+HISTORY_DIR = "history"
+PARTITION_KEY = "run_date"
+
+ARTIFACTS: Dict[str, pa.Schema] = {
+    "file_catalog": CATALOG_SCHEMA,
+    "schema_registry": REGISTRY_SCHEMA,
+    "classification_manifest": MANIFEST_SCHEMA,
+}
+
+
+def run_date(run_ts: str) -> str:
+    """Partition value of a run: the date part of its ISO run_ts."""
+    return run_ts[:10]
+
+
+def history_path(staging_dir: Path, artifact: str) -> Path:
+    return Path(staging_dir) / HISTORY_DIR / artifact
+
+
+def append_run(staging_dir: Path, run_ts: str) -> List[Path]:
+    """
+    Add this run's staging snapshots (<artifact>.parquet, the "latest" view that
+    consumers read) to the history dataset, one file per run and artifact.
+    Columns are cast to the fixed artifact schema so runs stay concatenable.
+    """
+    written = []
+    for artifact, schema in ARTIFACTS.items():
+        src = Path(staging_dir) / f"{artifact}.parquet"
+        if not src.exists():
+            continue
+        part_dir = history_path(staging_dir, artifact) / f"{PARTITION_KEY}={run_date(run_ts)}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        dst = part_dir / f"run-{run_ts.replace(':', '')}.parquet"
+        _write_files([src], dst, schema)
+        written.append(dst)
+    return written
+
+
+def history_dataset(staging_dir: Path, artifact: str) -> ds.Dataset:
+    schema = ARTIFACTS[artifact]
+    return ds.dataset(
+        history_path(staging_dir, artifact),
+        schema=schema.append(pa.field(PARTITION_KEY, pa.string())),
+        format="parquet",
+        partitioning="hive",
+    )
+
+
+def read_history(
+    staging_dir: Path,
+    artifact: str,
+    *,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    where: Optional[ds.Expression] = None,
+) -> pd.DataFrame:
+    """
+    Rows of all runs with since <= run_date <= until (YYYY-MM-DD, inclusive).
+    Only the matching run_date partitions are opened; `where` adds a row filter.
+    """
+    expr = where
+    for cond in (
+        ds.field(PARTITION_KEY) >= since if since else None,
+        ds.field(PARTITION_KEY) <= until if until else None,
+    ):
+        if cond is not None:
+            expr = cond if expr is None else expr & cond
+    table = history_dataset(staging_dir, artifact).to_table(
+        columns=list(columns) if columns else None, filter=expr
+    )
+    return table.to_pandas()
+
+
+def read_latest(staging_dir: Path, artifact: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    The most recent run's rows, from the history dataset: only the newest
+    run_date partition is scanned (run_ts column first, then the one run).
+    """
+    dates = partition_dates(staging_dir, artifact)
+    if not dates:
+        empty = ARTIFACTS[artifact].empty_table()
+        return (empty.select(list(columns)) if columns else empty).to_pandas()
+    dataset = history_dataset(staging_dir, artifact)
+    in_day = ds.field(PARTITION_KEY) == dates[-1]
+    latest_ts = pc.max(dataset.to_table(columns=["run_ts"], filter=in_day)["run_ts"]).as_py()
+    table = dataset.to_table(
+        columns=list(columns) if columns else list(ARTIFACTS[artifact].names),
+        filter=in_day & (ds.field("run_ts") == latest_ts),
+    )
+    return table.to_pandas()
+
+
+def partition_dates(staging_dir: Path, artifact: str) -> List[str]:
+    root = history_path(staging_dir, artifact)
+    if not root.exists():
+        return []
+    prefix = f"{PARTITION_KEY}="
+    return sorted(p.name[len(prefix):] for p in root.iterdir() if p.is_dir() and p.name.startswith(prefix))
+
+
+def compact(
+    staging_dir: Path,
+    *,
+    before: Optional[str] = None,
+    retention_days: int = 0,
+    artifacts: Sequence[str] = tuple(ARTIFACTS),
+) -> List[List]:
+    """
+    Merge each run_date partition older than `before` (default: today) into one
+    file, keeping each run's row groups (run_ts min/max stats still prune single runs).
+    retention_days > 0 first drops partitions older than that many days.
+    Returns [artifact, run_date, action, files, rows] per touched partition.
+
+    Inputs are deleted after the merged file is in place. compacted-<last run>
+    files name the newest run they contain, so run files left behind by an
+    interrupted compact are recognised and removed instead of merged twice.
+    """
+    before = before or date.today().isoformat()
+    cutoff = (date.today() - timedelta(days=retention_days)).isoformat() if retention_days > 0 else None
+    report: List[List] = []
+    for artifact in artifacts:
+        root = history_path(staging_dir, artifact)
+        for d in partition_dates(staging_dir, artifact):
+            part_dir = root / f"{PARTITION_KEY}={d}"
+            if cutoff is not None and d < cutoff:
+                shutil.rmtree(part_dir)
+                report.append([artifact, d, "dropped", None, None])
+                continue
+            files = _drop_compacted_leftovers(sorted(part_dir.glob("*.parquet")))
+            if d >= before or len(files) < 2:
+                continue
+            dst = part_dir / f"compacted-{files[-1].stem}.parquet"
+            rows = _write_files(files, dst, ARTIFACTS[artifact])
+            for f in files:
+                if f != dst:
+                    f.unlink()
+            report.append([artifact, d, "compacted", len(files), rows])
+    return report
+
+
+def _drop_compacted_leftovers(files: List[Path]) -> List[Path]:
+    """Unlink run-* files already contained in a compacted-run-* file of the same partition."""
+    done = max((f.stem[len("compacted-"):] for f in files if f.stem.startswith("compacted-")), default=None)
+    if done is None:
+        return files
+    keep = []
+    for f in files:
+        if f.stem.startswith("run-") and f.stem <= done:
+            f.unlink()
+        else:
+            keep.append(f)
+    return keep
+
+
+def _write_files(files: List[Path], dst: Path, schema: pa.Schema) -> int:
+    """Concatenate parquet files into dst (conformed to schema), batch by batch, via a hidden temp file."""
+    tmp = dst.with_name(f".{dst.name}.tmp")  # dot prefix: ignored by dataset readers
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for f in files:
+                pf = pq.ParquetFile(f)
+                for i in range(pf.num_row_groups):
+                    table = _conform(pf.read_row_group(i), schema)
+                    writer.write_table(table)
+                    rows += table.num_rows
+            if rows == 0:
+                writer.write_table(schema.empty_table())
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(dst)
+    return rows
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Column order/types of `schema`; columns pandas dropped or typed as null become typed nulls."""
+    arrays = [
+        table.column(f.name).cast(f.type) if f.name in table.column_names else pa.nulls(table.num_rows, f.type)
+        for f in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="staging_history")
+    p.add_argument("--config", default="config/settings.yaml", help="Path to YAML config")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("compact", help="Merge past run_date partitions into one file each")
+    c.add_argument("--before", default=None, help="Only partitions before this date (YYYY-MM-DD, default: today)")
+    c.add_argument(
+        "--retention-days",
+        type=int,
+        default=None,
+        help="Drop partitions older than N days (overrides history.retention_days; 0 = keep all)",
+    )
+
+    sub.add_parser("info", help="Files and rows per artifact and run_date partition")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    cfg = load_config(args.config)
+    staging_dir = Path(cfg["paths"]["staging_dir"])
+
+    if args.command == "compact":
+        retention = cfg["history"]["retention_days"] if args.retention_days is None else args.retention_days
+        report = compact(staging_dir, before=args.before, retention_days=int(retention))
+        if not report:
+            print("Nothing to compact.")
+            return
+        print(tabulate(report, headers=["artifact", PARTITION_KEY, "action", "files", "rows"], tablefmt="psql"))
+        return
+
+    rows = []
+    for artifact in ARTIFACTS:
+        root = history_path(staging_dir, artifact)
+        for d in partition_dates(staging_dir, artifact):
+            files = sorted((root / f"{PARTITION_KEY}={d}").glob("*.parquet"))
+            rows.append([
+                artifact,
+                d,
+                len(files),
+                sum(pq.ParquetFile(f).metadata.num_rows for f in files),
+                f"{sum(f.stat().st_size for f in files) / 1e6:,.2f}",
+            ])
+    print(f"History: {staging_dir / HISTORY_DIR}")
+    print(tabulate(rows, headers=["artifact", PARTITION_KEY, "files", "rows", "MB"], tablefmt="psql"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+# src/streaming.py
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.classify.file_copier import (
+    CopyResult,
+    apply_snapshot_sync,
+    copy_files,
+    plan_snapshot_sync,
+    prepare_snapshot_folders,
+)
+from src.fingerprint.detection_cache import CACHE_SCHEMA, DetectionCacheIndex, cache_key, cache_row
+from src.fingerprint.file_detection import apply_header_template, iter_detect_files, scored_header_rows
+from src.fingerprint.header_templates import build_header_templates
+from src.io.artifact_schemas import CATALOG_SCHEMA, MANIFEST_SCHEMA, REGISTRY_SCHEMA
+from src.io.parquet_parts import PartWriter, assemble_parts, read_parts_columns
+from src.io.scanner import DiscoveredFile
+from src.run_metrics import RunMetrics, maybe_profile
+
+
+# staging/_partial/<artifact>/part-*.parquet while a streaming run is in progress
+PARTIAL_DIR = "_partial"
+
+# catalog rows waiting for this run's header templates
+DEFERRED_SCHEMA = CATALOG_SCHEMA.append(pa.field("template_candidates_json", pa.string()))
+
+
+def catalog_row(run_ts: str, f: DiscoveredFile, det: Dict[str, Any]) -> Dict[str, Any]:
+    """One file_catalog row (schema_id / label / duplicate_of are filled in later)."""
+    return {
+        "run_ts": run_ts,
+        "path": str(f.path),
+        "size_bytes": f.size_bytes,
+        "modified_ts": f.modified_ts,
+        "sheet_name": det["sheet_name"],
+        "status": det["status"],
+        "error_message": det["error_message"],
+        "header_row_index": det["header_row_index"],
+        "header_confidence": det["header_confidence"],
+        "header_detection_mode": det["header_detection_mode"],
+        "raw_headers_json": det["raw_headers_json"],
+        "normalized_headers_json": det["normalized_headers_json"],
+        "schema_key": det["schema_key"],
+        "schema_hash": det["schema_hash"],
+        "csv_encoding": det["csv_encoding"],
+        "csv_delimiter": det["csv_delimiter"],
+        "csv_quotechar": det["csv_quotechar"],
+        "data_row_count": det["data_row_count"],
+        "content_hash": det["content_hash"],
+        "duplicate_of": None,
+        "schema_id": None,
+        "label": None,
+    }
+
+
+@dataclass
+class _SchemaStats:
+    schema_hash: str
+    file_count: int = 0
+    data_row_count: int = 0
+    examples: List[str] = field(default_factory=list)  # registry example_files_json
+
+
+@dataclass
+class StreamingResult:
+    total_files: int
+    schema_count: int
+    status_counts: Counter
+    cache_hits: int
+    unknown_hashes: List[str]  # schema_hash of OK files without a label, first-seen order
+    template_overrides: List[str]  # paths whose header row came from a template
+    duplicate_count: int
+    copy_counts: Counter
+    copy_bytes: int
+    copy_seconds: float
+    catalog_path: Path
+    registry_path: Path
+    manifest_path: Path
+
+
+def run_streaming(
+    files: Iterable[DiscoveredFile],
+    *,
+    run_ts: str,
+    staging_dir: Path,
+    classified_dir: Path,
+    quarantine_dir: Path,
+    schema_labels: Dict[str, str],
+    fingerprint: str,
+    use_cache: bool,
+    detect_kwargs: Dict[str, Any],
+    use_templates: bool,
+    workers: int,
+    dedup: bool,
+    count_rows: bool,
+    keep_last_n: int,
+    copy_kwargs: Dict[str, Any],
+    snapshot_mode: str,
+    overwrite: bool,
+    dry_run: bool,
+    batch_rows: int,
+    metrics: RunMetrics,
+    profile_path: Optional[Path] = None,
+) -> StreamingResult:
+    """
+    main() with bounded memory: files flow scan -> cache lookup / preview + detect +
+    normalize + hash -> catalog row one at a time, and rows go to parquet part files
+    in batches of `batch_rows` (staging/_partial/file_catalog/, readable mid-run).
+
+    Per-file state kept for the whole run is compact and columnar only (cache key
+    hashes, and path/mtime/content_hash columns for dedup and the newest-N selection);
+    the final catalog, cache and manifest are assembled from the parts batch by batch.
+    Output files and their columns are the same as a regular run; catalog rows are
+    in walk order instead of sorted by path. With `use_templates`, files a header
+    template may still place wait in staging/_partial/deferred_catalog/ until this
+    run's templates are known, and their rows come last.
+    """
+    catalog_path = staging_dir / "file_catalog.parquet"
+    registry_path = staging_dir / "schema_registry.parquet"
+    manifest_path = staging_dir / "classification_manifest.parquet"
+    cache_path = staging_dir / "detection_cache.parquet"
+    partial = staging_dir / PARTIAL_DIR
+
+    # --- Scan + detect + catalog rows (one pass, streamed) ---
+    metrics.begin("scan_detect")
+    cache = DetectionCacheIndex(cache_path, fingerprint) if use_cache else None
+    catalog_parts = PartWriter(partial / "file_catalog", CATALOG_SCHEMA, batch_rows)
+    cache_parts = PartWriter(partial / "detection_cache", CACHE_SCHEMA, batch_rows) if use_cache else None
+    deferred_parts = PartWriter(partial / "deferred_catalog", DEFERRED_SCHEMA, batch_rows) if use_templates else None
+
+    status_counts: Counter = Counter()
+    schemas: Dict[str, _SchemaStats] = {}  # schema_key -> stats
+    unknown: Dict[str, None] = {}  # ordered set of unlabeled schema_hash
+    template_overrides: List[str] = []
+    header_rows: Counter = Counter()  # templates are learned from these (scored_header_rows)
+    pending: Deque[Tuple[DiscoveredFile, Any]] = deque()  # files handed to detection, in order
+    cache_hits = 0
+    total_bytes = 0
+
+    def add_row(row: Dict[str, Any]) -> None:
+        status_counts[row["status"]] += 1
+        if row["header_detection_mode"] == "template":
+            template_overrides.append(row["path"])
+        if row["status"] == "ok":
+            row["label"] = schema_labels.get(row["schema_hash"], "unknown_schema")
+            if row["label"] == "unknown_schema":
+                unknown[row["schema_hash"]] = None
+            st = schemas.setdefault(row["schema_key"], _SchemaStats(row["schema_hash"]))
+            st.file_count += 1
+            if row["data_row_count"] is not None:
+                st.data_row_count += int(row["data_row_count"])
+            if len(st.examples) < 5 or row["path"].lower() < st.examples[-1].lower():
+                # first 5 in scan_files (sorted) order, like a regular run
+                st.examples = sorted(st.examples + [row["path"]], key=str.lower)[:5]
+        catalog_parts.append(row)
+
+    def lookups() -> Iterator[Tuple[Path, Optional[Dict[str, Any]]]]:
+        for batch in _batched(files, batch_rows):
+            keys = [cache_key(f.path, f.size_bytes, f.modified_ts) for f in batch]
+            known = cache.lookup(keys) if cache is not None else [None] * len(batch)
+            for f, key, rec in zip(batch, keys, known):
+                pending.append((f, key))
+                yield f.path, rec
+
+    with maybe_profile(profile_path is not None, profile_path or Path()):
+        for det, timings in iter_detect_files(lookups(), workers=workers, **detect_kwargs):
+            f, key = pending.popleft()
+            total_bytes += f.size_bytes
+            if timings is None:
+                cache_hits += 1
+            else:
+                total = timings.pop("total")
+                metrics.record_file("detect", f.path, total, f.size_bytes, phases=timings)
+            if cache_parts is not None:
+                cache_parts.append(cache_row(fingerprint, key, det))
+
+            header_rows.update(scored_header_rows([det]))
+            row = catalog_row(run_ts, f, det)
+            if deferred_parts is not None and det["template_candidates_json"]:
+                deferred_parts.append({**row, "template_candidates_json": det["template_candidates_json"]})
+            else:
+                add_row(row)
+
+    if deferred_parts is not None:
+        templates = build_header_templates(header_rows, schema_labels)
+        for part in deferred_parts.close():
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_rows):
+                for row in batch.to_pylist():
+                    hit = None
+                    if templates is not None:
+                        hit = apply_header_template(
+                            row["path"], row, templates, aliases=detect_kwargs.get("aliases"), count_rows=count_rows,
+                        )
+                    row = hit or row
+                    row.pop("template_candidates_json")
+                    add_row(row)
+
+    parts = catalog_parts.close()
+    total_files = catalog_parts.rows
+    metrics.end("scan_detect", files=total_files, nbytes=total_bytes)
+
+    # --- Cache, dedup, schema ids, registry, final catalog ---
+    metrics.begin("write_staging")
+    if cache_parts is not None:
+        assemble_parts(cache_parts.close(), cache_path, CACHE_SCHEMA)
+
+    duplicate_of = _content_duplicates(parts) if dedup and parts else {}
+
+    schema_keys_sorted = sorted(schemas)
+    schema_id_map = {k: f"schema_{i:03d}__{schemas[k].schema_hash}" for i, k in enumerate(schema_keys_sorted, start=1)}
+
+    def fill_ids(batch: pa.RecordBatch) -> pa.RecordBatch:
+        keys = batch.column("schema_key").to_pylist()
+        paths = batch.column("path").to_pylist()
+        arrays = list(batch.columns)
+        arrays[batch.schema.get_field_index("schema_id")] = pa.array([schema_id_map.get(k) for k in keys], pa.string())
+        arrays[batch.schema.get_field_index("duplicate_of")] = pa.array([duplicate_of.get(p) for p in paths], pa.string())
+        return pa.RecordBatch.from_arrays(arrays, schema=batch.schema)
+
+    assemble_parts(parts, catalog_path, CATALOG_SCHEMA, transform=fill_ids)
+
+    registry_df = pd.DataFrame(
+        [
+            {
+                "run_ts": run_ts,
+                "schema_id": schema_id_map[k],
+                "schema_key": k,
+                "schema_hash": schemas[k].schema_hash,
+                "canonical_headers_json": json.dumps(k.split("|") if k else [], ensure_ascii=False),
+                "file_count": schemas[k].file_count,
+                "data_row_count": schemas[k].data_row_count if count_rows else None,
+                "example_files_json": json.dumps(schemas[k].examples, ensure_ascii=False),
+            }
+            for k in schema_keys_sorted
+        ],
+        columns=REGISTRY_SCHEMA.names,
+    )
+    registry_df.to_parquet(registry_path, index=False)
+    metrics.end("write_staging", files=total_files, nbytes=catalog_path.stat().st_size)
+
+    # --- Copy (newest N per schema_hash; quarantine streamed) + manifest ---
+    metrics.begin("copy")
+    copy = _StreamingCopy(
+        run_ts=run_ts,
+        classified_dir=classified_dir,
+        quarantine_dir=quarantine_dir,
+        manifest=PartWriter(partial / "classification_manifest", MANIFEST_SCHEMA, batch_rows),
+        copy_kwargs=copy_kwargs,
+        overwrite=overwrite,
+        dry_run=dry_run,
+        metrics=metrics,
+    )
+    keep = _newest_per_schema(catalog_path, keep_last_n)
+    gold: List[Dict[str, Any]] = []  # at most keep_last_n per schema_hash
+    for batch in pq.ParquetFile(catalog_path).iter_batches(batch_size=batch_rows):
+        quarantine = []
+        for r in batch.to_pylist():
+            if r["duplicate_of"] is not None:
+                copy.skipped_duplicate(r)
+            elif r["status"] == "ok":
+                if r["path"] in keep:
+                    gold.append(r)
+            else:
+                quarantine.append(r)
+        copy.copy_rows(quarantine, [quarantine_dir / Path(r["path"]).name for r in quarantine])
+    copy.copy_gold(gold, snapshot_mode)
+    assemble_parts(copy.manifest.close(), manifest_path, MANIFEST_SCHEMA)
+    metrics.end("copy", files=copy.counts.get("copied", 0), nbytes=copy.bytes)
+
+    shutil.rmtree(partial, ignore_errors=True)
+
+    return StreamingResult(
+        total_files=total_files,
+        schema_count=len(schema_id_map),
+        status_counts=status_counts,
+        cache_hits=cache_hits,
+        unknown_hashes=list(unknown),
+        template_overrides=template_overrides,
+        duplicate_count=len(duplicate_of),
+        copy_counts=copy.counts,
+        copy_bytes=copy.bytes,
+        copy_seconds=copy.seconds,
+        catalog_path=catalog_path,
+        registry_path=registry_path,
+        manifest_path=manifest_path,
+    )
+
+
+class _StreamingCopy:
+    """Copies catalog rows batch by batch and appends their manifest rows."""
+
+    def __init__(
+        self,
+        *,
+        run_ts: str,
+        classified_dir: Path,
+        quarantine_dir: Path,
+        manifest: PartWriter,
+        copy_kwargs: Dict[str, Any],
+        overwrite: bool,
+        dry_run: bool,
+        metrics: RunMetrics,
+    ):
+        self.run_ts = run_ts
+        self.classified_dir = classified_dir
+        self.quarantine_dir = quarantine_dir
+        self.manifest = manifest
+        self.copy_kwargs = copy_kwargs
+        self.overwrite = overwrite
+        self.dry_run = dry_run
+        self.metrics = metrics
+        self.counts: Counter = Counter()
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def _append(self, r: Optional[Dict[str, Any]], res: Optional[CopyResult], *, status: str,
+                action: Optional[str] = None, error: Optional[str] = None) -> None:
+        r = r or {}
+        copied = res is not None and res.status == "copied" and res.elapsed_s > 0
+        self.manifest.append(
+            {
+                "run_ts": self.run_ts,
+                "src_path": str(res.src) if res is not None and r else r.get("path"),
+                "dst_path": str(res.dst) if res is not None else None,
+                "src_status": r.get("status"),
+                "copy_status": status,
+                "error_message": error,
+                "schema_id": r.get("schema_id"),
+                "schema_key": r.get("schema_key"),
+                "schema_hash": r.get("schema_hash"),
+                "label": r.get("label") if r else (res.dst.parent.name if res is not None else None),
+                "copy_bytes": res.bytes_copied if res is not None else 0,
+                "copy_seconds": res.elapsed_s if res is not None and r else None,
+                "copy_bytes_per_s": res.bytes_copied / res.elapsed_s if copied else None,
+                "sync_action": action,
+            }
+        )
+        self.counts[status] += 1
+
+    def skipped_duplicate(self, r: Dict[str, Any]) -> None:
+        self._append(r, None, status="skipped_duplicate", error=f"same content as {r['duplicate_of']}")
+
+    def _record(self, results: List[CopyResult], t0: float) -> None:
+        self.seconds += time.perf_counter() - t0
+        for res in results:
+            self.bytes += res.bytes_copied
+            if res.status == "copied":
+                self.metrics.record_file("copy", res.src, res.elapsed_s, res.bytes_copied)
+
+    def copy_rows(self, rows: List[Dict[str, Any]], dests: List[Path], actions: Optional[List[str]] = None) -> None:
+        if not rows:
+            return
+        if self.dry_run:
+            for r in rows:
+                self._append(r, None, status="skipped_dry_run")
+            return
+        t0 = time.perf_counter()
+        results = copy_files(
+            [(Path(r["path"]), d) for r, d in zip(rows, dests)],
+            overwrite=self.overwrite,
+            **self.copy_kwargs,
+        )
+        self._record(results, t0)
+        for r, res in zip(rows, results):
+            self._append(r, res, status=res.status, error=res.error_message)
+
+    def copy_gold(self, rows: List[Dict[str, Any]], snapshot_mode: str) -> None:
+        dests = [
+            self.classified_dir / (r["label"] or "unknown_schema") / f"{r['schema_hash'] or 'nohash'}__{Path(r['path']).name}"
+            for r in rows
+        ]
+        labels_in_run = sorted({r["label"] for r in rows if r.get("label")})
+        if self.dry_run or snapshot_mode != "sync":
+            if not self.dry_run:
+                prepare_snapshot_folders(self.classified_dir, labels_in_run)
+            self.copy_rows(rows, dests)
+            return
+
+        jobs = [(Path(r["path"]), d) for r, d in zip(rows, dests)]
+        t0 = time.perf_counter()
+        plan = plan_snapshot_sync(self.classified_dir, jobs, labels_in_run, overwrite=self.overwrite)
+        results, removed = apply_snapshot_sync(jobs, plan, **self.copy_kwargs)
+        self._record(results + removed, t0)
+        for r, res, action in zip(rows, results, plan.actions):
+            self._append(r, res, status=res.status, action=action, error=res.error_message)
+        for res in removed:  # stale gold files (no source row)
+            self._append(None, res, status=res.status, action="removed", error=res.error_message)
+
+
+def _batched(items: Iterable[Any], n: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _content_duplicates(parts: List[Path]) -> Dict[str, str]:
+    """
+    {path: canonical path} for files whose bytes equal a newer file's (ties: path order),
+    same rule as main._mark_content_duplicates, on three columns instead of full rows.
+    """
+    df = read_parts_columns(parts, ["path", "modified_ts", "content_hash"]).to_pandas()
+    df = df[df["content_hash"].notna()]
+    if df.empty:
+        return {}
+    df = df.sort_values(["content_hash", "modified_ts", "path"], ascending=[True, False, True], kind="stable")
+    canonical = df.groupby("content_hash", sort=False)["path"].transform("first")
+    dup = df["path"].ne(canonical)
+    return dict(zip(df.loc[dup, "path"], canonical[dup]))
+
+
+def _newest_per_schema(catalog_path: Path, keep_last_n: int) -> set:
+    """
+    Paths of the newest `keep_last_n` distinct (non-duplicate) OK files per schema_hash.
+    mtime ties go to the lowercase path, as in regular mode, not to walk order.
+    """
+    df = pq.read_table(
+        catalog_path, columns=["path", "status", "schema_hash", "modified_ts", "duplicate_of"]
+    ).to_pandas()
+    df = df[df["status"].eq("ok") & df["duplicate_of"].isna()].copy()
+    df["_path_key"] = df["path"].str.lower()
+    df = df.sort_values(
+        ["schema_hash", "modified_ts", "_path_key"], ascending=[True, False, True], kind="stable"
+    )
+    return set(df.groupby("schema_hash", sort=False).head(keep_last_n)["path"])
@@ -0,0 +1,54 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import yaml
+
+REPO = Path(__file__).resolve().parents[1]
+
+
+def make_project(
+    root: Path,
+    *,
+    settings: Optional[Dict[str, Dict[str, Any]]] = None,
+    labels: Optional[Dict[str, str]] = None,
+) -> Path:
+    """Project dir with the repo's config; `settings` overrides settings.yaml sections key by key."""
+    shutil.copytree(REPO / "config", root / "config")
+    path = root / "config" / "settings.yaml"
+    cfg = yaml.safe_load(path.read_text(encoding="utf-8"))
+    for section, values in (settings or {}).items():
+        cfg.setdefault(section, {}).update(values)
+    path.write_text(yaml.safe_dump(cfg), encoding="utf-8")
+    if labels is not None:
+        write_labels(root, labels)
+    return root
+
+
+def write_labels(project: Path, labels: Dict[str, str]) -> None:
+    (project / "config" / "schema_labels.yaml").write_text(yaml.safe_dump(labels, sort_keys=True), encoding="utf-8")
+
+
+def run_module(project: Path, module: str, *args: str) -> str:
+    """python -m <module> in the project dir; returns stdout."""
+    proc = subprocess.run(
+        [sys.executable, "-m", module, *args],
+        cwd=project,
+        env={**os.environ, "PYTHONPATH": str(REPO)},
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    return proc.stdout
+
+
+def run_main(project: Path, lake: Path, *args: str) -> str:
+    return run_module(project, "src.main", "--input-root", str(lake), *args)
+
+
+def read_staging(project: Path, artifact: str) -> pd.DataFrame:
+    return pd.read_parquet(project / "data" / "staging" / f"{artifact}.parquet")
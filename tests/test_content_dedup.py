@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from helpers import make_project, read_staging, run_main
+
+
+@pytest.mark.parametrize("mode", [(), ("--streaming",)])
+def test_identical_files_keep_the_newest_copy(tmp_path, mode):
+    lake = tmp_path / "lake"
+    lake.mkdir()
+    t = 1_700_000_000_000_000_000
+    for name, age_s in [("old_export.csv", 20), ("newest_export.csv", 0), ("mid_export.csv", 10)]:
+        p = lake / name
+        p.write_text("client_id,client_name\n1,same bytes\n", encoding="utf-8")
+        os.utime(p, ns=(t - age_s * 10**9, t - age_s * 10**9))
+    (lake / "other.csv").write_text("client_id,client_name\n2,different\n", encoding="utf-8")
+    project = make_project(tmp_path / "project")
+
+    run_main(project, lake, *mode)
+
+    catalog = read_staging(project, "file_catalog").set_index("path")
+    newest = str(lake / "newest_export.csv")
+    assert catalog["duplicate_of"].fillna("").to_dict() == {
+        str(lake / "old_export.csv"): newest,
+        str(lake / "mid_export.csv"): newest,
+        newest: "",
+        str(lake / "other.csv"): "",
+    }
+    manifest = read_staging(project, "classification_manifest").set_index("src_path")
+    assert manifest.loc[str(lake / "old_export.csv"), "copy_status"] == "skipped_duplicate"
+    assert manifest.loc[newest, "copy_status"] == "copied"
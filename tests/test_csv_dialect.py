@@ -0,0 +1,27 @@
+from src.io.csv_dialect import count_csv_records, sniff_csv_head
+
+
+def _write(tmp_path, data: bytes):
+    p = tmp_path / "export.csv"
+    p.write_bytes(data)
+    return p
+
+
+def test_whitespace_only_lines_are_not_records(tmp_path):
+    p = _write(tmp_path, b"a,b\n1,2\n   \n3,4\n\n")
+    dialect, rows = sniff_csv_head(p, 100)
+    assert len(rows) == 3
+    assert count_csv_records(p, dialect) == 3
+
+
+def test_cr_only_and_indented_blank_lines(tmp_path):
+    p = _write(tmp_path, b"a,b\r\n1,2\r\n\r\n \t \r\n\r\n3,4\r\n\r")
+    dialect, rows = sniff_csv_head(p, 100)
+    assert count_csv_records(p, dialect) == len(rows) == 3
+
+
+def test_delimiter_only_line_is_a_record(tmp_path):
+    p = _write(tmp_path, b"a\tb\n1\t2\n\t\n   \n3\t4")
+    dialect, rows = sniff_csv_head(p, 100)
+    assert dialect.delimiter == "\t"
+    assert count_csv_records(p, dialect) == len(rows) == 4
@@ -0,0 +1,37 @@
+import os
+import re
+from pathlib import Path
+
+from helpers import make_project, run_main, write_labels
+from src.fingerprint.schema_identity import schema_identity
+
+
+def _lake(root: Path) -> Path:
+    lake = root / "lake"
+    lake.mkdir()
+    for i in range(4):
+        (lake / f"clients_{i}.csv").write_text(f"client_id,client_name\n{i},name {i}\n", encoding="utf-8")
+    return lake
+
+
+def _hits(stdout: str) -> str:
+    return re.search(r"Detection cache hits: (\d+/\d+)", stdout).group(1)
+
+
+def test_cache_hits_survive_label_edits_but_not_alias_edits(tmp_path):
+    lake = _lake(tmp_path)
+    project = make_project(tmp_path / "project")
+
+    assert _hits(run_main(project, lake)) == "0/4"
+    assert _hits(run_main(project, lake)) == "4/4"
+
+    _, schema_hash = schema_identity(["client_id", "client_name"])
+    write_labels(project, {schema_hash: "clients"})
+    assert _hits(run_main(project, lake)) == "4/4"
+
+    p = lake / "clients_0.csv"
+    os.utime(p, ns=(p.stat().st_atime_ns, p.stat().st_mtime_ns + 10**9))
+    assert _hits(run_main(project, lake)) == "3/4"
+
+    (project / "config" / "header_aliases.yaml").write_text("client_name: name\n", encoding="utf-8")
+    assert _hits(run_main(project, lake)) == "0/4"
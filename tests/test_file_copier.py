@@ -0,0 +1,41 @@
+import os
+import shutil
+
+from src.classify.file_copier import apply_snapshot_sync, plan_snapshot_sync
+
+
+def _touch(p, text, mtime_ns):
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    os.utime(p, ns=(mtime_ns, mtime_ns))
+    return p
+
+
+def test_sync_copies_only_new_and_changed_files_and_removes_stale_ones(tmp_path):
+    t = 1_700_000_000_000_000_000
+    src, gold = tmp_path / "lake", tmp_path / "classified"
+    jobs = []
+    for name in ["same", "close", "late", "resized", "new"]:
+        jobs.append((_touch(src / f"{name}.csv", "a,b\n1,2\n", t), gold / "clients" / f"h__{name}.csv"))
+    jobs.append((src / "same.csv", gold / "clients" / "h__same.csv"))  # second job for one destination
+
+    (gold / "clients").mkdir(parents=True)
+    for s, d in jobs[:4]:
+        shutil.copy2(s, d)
+    os.utime(gold / "clients" / "h__close.csv", ns=(t, t + 500_000))    # 0.5 ms off: within tolerance
+    os.utime(gold / "clients" / "h__late.csv", ns=(t, t + 5_000_000))   # 5 ms off
+    _touch(gold / "clients" / "h__resized.csv", "a,b\n1,2\n3,4\n", t)
+    stale = _touch(gold / "clients" / "h__dropped.csv", "a,b\n", t)
+
+    plan = plan_snapshot_sync(gold, jobs, ["clients"])
+    assert plan.actions == ["unchanged", "unchanged", "updated", "updated", "added", "duplicate"]
+    assert plan.stale == [stale]
+
+    results, removed = apply_snapshot_sync(jobs, plan)
+    assert [r.status for r in results] == [
+        "skipped_unchanged", "skipped_unchanged", "copied", "copied", "copied", "skipped_exists",
+    ]
+    assert [r.status for r in removed] == ["removed"] and not stale.exists()
+    assert sorted(p.name for p in (gold / "clients").iterdir()) == [
+        "h__close.csv", "h__late.csv", "h__new.csv", "h__resized.csv", "h__same.csv",
+    ]
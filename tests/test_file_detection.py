@@ -0,0 +1,59 @@
+import pandas as pd
+
+from benchmark.datalake import generate_datalake, lake_labels
+from helpers import make_project, read_staging, run_main
+from src.fingerprint.file_detection import apply_header_template, detect_file
+from src.fingerprint.header_normalizer import load_header_aliases, normalize_headers
+from src.fingerprint.header_templates import HeaderTemplates
+from src.fingerprint.schema_identity import schema_identity
+
+DETECT = dict(header_search_rows=60, min_header_confidence=0.6)
+
+
+def _catalog(project):
+    return read_staging(project, "file_catalog").drop(columns=["run_ts"]).sort_values("path").reset_index(drop=True)
+
+
+def test_reruns_over_the_same_lake_give_the_same_catalog(tmp_path):
+    lake = tmp_path / "lake"
+    generate_datalake(lake, "tiny")
+    project = make_project(tmp_path / "project")
+    aliases = load_header_aliases(project / "config" / "header_aliases.yaml")
+    project = make_project(tmp_path / "labeled", labels=lake_labels(aliases))
+
+    run_main(project, lake)
+    first = _catalog(project)
+    run_main(project, lake)  # cache hits
+    pd.testing.assert_frame_equal(first, _catalog(project))
+    run_main(project, lake, "--no-cache")
+    pd.testing.assert_frame_equal(first, _catalog(project))
+    run_main(project, lake, "--streaming")
+    pd.testing.assert_frame_equal(first, _catalog(project))
+
+
+def _templates(raw_headers, row):
+    _, schema_hash = schema_identity(normalize_headers(raw_headers).normalized_headers)
+    return HeaderTemplates(by_row={row: frozenset([schema_hash])}, rows_in_order=(row,))
+
+
+def test_template_does_not_beat_a_better_scored_row(tmp_path):
+    p = tmp_path / "export.csv"
+    # row 0 holds a labeled header set, but the real header (row 1) scores higher
+    p.write_text("id,name\nid,name,city,state,zip\n" + "1,a,b,c,2\n" * 10, encoding="utf-8")
+    rec = detect_file(p, **DETECT)
+    assert (rec["header_detection_mode"], rec["header_row_index"]) == ("scored", 1)
+    assert apply_header_template(p, rec, _templates(["id", "name"], 0)) is None
+
+
+def test_template_places_a_header_scoring_cannot(tmp_path):
+    p = tmp_path / "notes.csv"
+    # sparse rows of long repeated text: no row looks like a header
+    rows = [[f"a very long free text note that is not a header {i}"] * 2 for i in range(4)]
+    p.write_text("".join(",".join(r) + ",,,,,,,,\n" for r in rows), encoding="utf-8")
+    rec = detect_file(p, **DETECT)
+    assert rec["status"] == "low_confidence"
+
+    hit = apply_header_template(p, rec, _templates(rows[1], 1), count_rows=True)
+    assert (hit["status"], hit["header_row_index"], hit["header_detection_mode"]) == ("ok", 1, "template")
+    assert hit["header_confidence"] < DETECT["min_header_confidence"]
+    assert hit["data_row_count"] == 2
@@ -0,0 +1,67 @@
+import os
+from dataclasses import replace
+
+from src.io.csv_dialect import CsvDialect
+from src.pipelines.consolidate_schema import CatalogEntry
+from src.pipelines.run_processed import process_item
+
+LABEL = "clients"
+SCHEMA_HASH = "abc123"
+DIALECT = CsvDialect(encoding="utf-8", delimiter=",", quotechar='"')
+
+
+def _setup(tmp_path):
+    classified = tmp_path / "classified" / LABEL
+    classified.mkdir(parents=True)
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    index = {}
+    for i, name in enumerate(["jan.csv", "feb.csv"]):
+        (classified / f"{SCHEMA_HASH}__{name}").write_text(f"client_id,client_name\n{i},name {i}\n", encoding="utf-8")
+        index[(SCHEMA_HASH, name)] = CatalogEntry(
+            header_row_index=0, raw_headers=("client_id", "client_name"), csv_dialect=DIALECT
+        )
+    return classified, processed, index
+
+
+def _run(tmp_path, processed, index):
+    return process_item(
+        classified_dir=tmp_path / "classified",
+        processed_dir=processed,
+        catalog_index=index,
+        label=LABEL,
+        schema_hash=SCHEMA_HASH,
+    )
+
+
+def test_unchanged_inputs_reuse_the_output(tmp_path):
+    _, processed, index = _setup(tmp_path)
+    outcome, line = _run(tmp_path, processed, index)
+    assert outcome == "wrote" and "parsed 2/2 files" in line
+    assert _run(tmp_path, processed, index)[0] == "unchanged"
+
+
+def test_changed_file_is_the_only_one_parsed_again(tmp_path):
+    classified, processed, index = _setup(tmp_path)
+    _run(tmp_path, processed, index)
+    p = classified / f"{SCHEMA_HASH}__feb.csv"
+    p.write_text("client_id,client_name\n1,renamed\n", encoding="utf-8")
+    os.utime(p, ns=(p.stat().st_atime_ns, p.stat().st_mtime_ns + 10**9))
+    outcome, line = _run(tmp_path, processed, index)
+    assert outcome == "wrote" and "parsed 1/2 files" in line
+
+
+def test_changed_catalog_entry_invalidates_its_fragment(tmp_path):
+    _, processed, index = _setup(tmp_path)
+    _run(tmp_path, processed, index)
+    key = (SCHEMA_HASH, "jan.csv")
+    index[key] = replace(index[key], raw_headers=("client_id",))
+    outcome, line = _run(tmp_path, processed, index)
+    assert outcome == "wrote" and "parsed 1/2 files" in line
+
+
+def test_unreadable_input_fails_only_its_item(tmp_path):
+    classified, processed, index = _setup(tmp_path)
+    (classified / f"{SCHEMA_HASH}__mar.csv").symlink_to(tmp_path / "missing.csv")  # listed, but stat() fails
+    outcome, line = _run(tmp_path, processed, index)
+    assert outcome == "failed" and line.startswith("FAIL (plan): ")
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.pipelines.parquet_stream import write_parquet_streaming
+from src.pipelines.sanitize import sanitize_for_parquet
+
+
+def _fragments(tmp_path):
+    n = 150
+    jan = pd.DataFrame({
+        "client_id": np.arange(n),
+        "visits": np.where(np.arange(n) % 7 == 0, np.nan, np.arange(n) % 5).astype("float64"),
+        "status": ["active", "closed", "on hold"] * (n // 3),
+        "location": ["north"] * n,
+        "source_file": ["jan.csv"] * n,
+    })
+    feb = pd.DataFrame({
+        "client_id": np.arange(n, n + 40),
+        "status": ["active", "paused"] * 20,  # no visits / location columns
+        "note": ["x"] * 40,
+        "source_file": ["feb.csv"] * 40,
+    })
+    paths = []
+    for name, df in [("jan", jan), ("feb", feb)]:
+        p = tmp_path / f"{name}.parquet"
+        sanitize_for_parquet(df, compact_dtypes=False).to_parquet(p, index=False)
+        paths.append(p)
+    return paths
+
+
+@pytest.mark.parametrize("compact_dtypes", [True, False])
+def test_streaming_assembly_writes_the_same_schema_as_one_frame(tmp_path, compact_dtypes):
+    paths = _fragments(tmp_path)
+    whole = sanitize_for_parquet(pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True),
+                                 compact_dtypes=compact_dtypes)
+    whole.to_parquet(tmp_path / "regular.parquet", index=False)
+    write_parquet_streaming(paths, tmp_path / "streaming.parquet", row_group_rows=64, compact_dtypes=compact_dtypes)
+
+    regular, streaming = (pd.read_parquet(tmp_path / f"{m}.parquet") for m in ("regular", "streaming"))
+    pd.testing.assert_frame_equal(regular, streaming)
+    assert pq.read_schema(tmp_path / "regular.parquet").remove_metadata().equals(
+        pq.read_schema(tmp_path / "streaming.parquet").remove_metadata()
+    )
+    if compact_dtypes:
+        assert str(streaming["visits"].dtype) == "Int8" and str(streaming["status"].dtype) == "category"
@@ -0,0 +1,43 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import src.pipelines.consolidate_schema as consolidate
+from src.io.csv_dialect import sniff_csv_head
+
+
+def _as_text(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow infers types, the pandas fallback keeps text: compare cell text
+    return df.astype(object).where(df.notna(), None).map(lambda v: None if v is None else str(v))
+
+
+def _arrow_rejects_everything(*args, **kwargs):
+    raise pa.ArrowInvalid("forced fallback")
+
+
+@pytest.mark.parametrize("columns", [(), ("client_id", "client_name", "notes", "notes")])
+def test_arrow_reader_and_pandas_fallback_agree(tmp_path, monkeypatch, columns):
+    p = tmp_path / "export.csv"
+    p.write_text(
+        "Client export;;;;\n"
+        "generated 2024-01-31;;;;\n"
+        "client_id;client_name;notes;notes;\n"
+        '1;"Smith; Anna";"first line\nsecond line";a;\n'
+        "2;Jones;;b;\n"
+        "3;Brown;plain;c;\n"
+        "4;None;NA;<NA>;\n",
+        encoding="utf-8",
+    )
+    dialect, _ = sniff_csv_head(p, 20)
+    assert dialect.delimiter == ";"
+
+    arrow = consolidate.read_csv_full(p, header_row_index=2, dialect=dialect, columns=columns)
+    monkeypatch.setattr(consolidate.pacsv, "read_csv", _arrow_rejects_everything)
+    fallback = consolidate.read_csv_full(p, header_row_index=2, dialect=dialect, columns=columns)
+
+    expected = ["client_id", "client_name", "notes", "notes.1"] + ([] if columns else ["Unnamed: 4"])
+    assert list(arrow.columns) == list(fallback.columns) == expected
+    pd.testing.assert_frame_equal(_as_text(arrow), _as_text(fallback))
+    assert arrow.loc[0, "client_name"] == "Smith; Anna"
+    assert arrow.loc[0, "notes"] == "first line\nsecond line"
+    assert arrow[["client_name", "notes", "notes.1"]].iloc[1:].isna().sum().tolist() == [1, 2, 1]
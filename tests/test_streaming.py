@@ -0,0 +1,39 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from helpers import make_project, read_staging, run_main
+
+# Columns that depend on the run, not on which files were chosen
+_RUN_COLUMNS = ["run_ts", "copy_bytes", "copy_seconds", "copy_bytes_per_s"]
+
+
+def _lake(root: Path) -> Path:
+    """Same-schema CSVs with identical mtimes and mixed-case names, so walk order != path order."""
+    lake = root / "lake"
+    lake.mkdir()
+    for i, name in enumerate(["b_export.csv", "A_export.csv", "d_export.csv", "C_export.csv", "e_export.csv"]):
+        p = lake / name
+        p.write_text(f"client_id,client_name\n{i},name {i}\n", encoding="utf-8")
+        os.utime(p, ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+    return lake
+
+
+def _run(root: Path, lake: Path, *extra: str) -> pd.DataFrame:
+    project = make_project(root / ("streaming" if extra else "regular"), settings={"copy": {"keep_last_n_per_schema": 2}})
+    run_main(project, lake, *extra)
+    df = read_staging(project, "classification_manifest").drop(columns=_RUN_COLUMNS)
+    df["dst_path"] = df["dst_path"].map(lambda p: Path(p).name if isinstance(p, str) else p)
+    df = df.astype(object).where(df.notna(), None)  # all-null columns: object in one mode, str in the other
+    return df.sort_values("src_path").reset_index(drop=True)
+
+
+def test_streaming_and_regular_keep_the_same_files_on_mtime_ties(tmp_path):
+    lake = _lake(tmp_path)
+    regular = _run(tmp_path, lake)
+    streaming = _run(tmp_path, lake, "--streaming")
+
+    pd.testing.assert_frame_equal(regular, streaming, check_dtype=False)
+    kept = regular.loc[regular["copy_status"].eq("copied"), "src_path"].map(lambda p: Path(p).name)
+    assert sorted(kept) == ["A_export.csv", "b_export.csv"]
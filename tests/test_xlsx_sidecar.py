@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow as pa
+
+from src.io.xlsx_sidecar import evict_sidecars, read_with_sidecar, sidecar_path
+
+
+def _parse():
+    return pd.DataFrame({"client": ["a", "b"] * 5000, "visits": range(10000)})
+
+
+def _uncompressed_size(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def test_sidecar_is_compressed_and_read_back(tmp_path):
+    first = read_with_sidecar(tmp_path, "abc", 0, _parse)
+    assert sidecar_path(tmp_path, "abc", 0).stat().st_size < _uncompressed_size(first) / 2
+
+    cached = read_with_sidecar(tmp_path, "abc", 0, lambda: (_ for _ in ()).throw(AssertionError("parsed again")))
+    pd.testing.assert_frame_equal(first, cached)
+
+
+def test_evict_keeps_only_current_sidecars_of_catalog_hashes(tmp_path):
+    for h in ("keep", "gone"):
+        read_with_sidecar(tmp_path, h, 0, _parse)
+    old = tmp_path / "keep__h0__v1.arrow"
+    old.write_bytes(b"")
+
+    assert evict_sidecars(tmp_path, {"keep"}) == 2
+    assert [p.name for p in tmp_path.iterdir()] == [sidecar_path(tmp_path, "keep", 0).name]